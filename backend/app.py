@@ -1,4 +1,5 @@
 import os
+import datetime
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -50,7 +51,7 @@ def create_app():
     # 5. Importação dos Modelos
     # Isso é necessário para que o 'db' e o 'migrate' saibam das tabelas
     with app.app_context():
-        from models import users, companies, chats, negotiations, reports, evaluations, audit_log
+        from models import users, companies, chats, negotiations, reports, evaluations, audit_log, counters, refresh_tokens, kpis, imports
         
         # --- ERRO ESTAVA AQUI ---
         # A verificação (query) do 'Role' foi REMOVIDA DAQUI
@@ -70,8 +71,25 @@ def create_app():
     # 7. Importa os callbacks do JWT
     import utils.security
 
+    # 7.1 Registra os eventos do ORM que mantêm os contadores
+    # e que invalidam o cache de identidade e o índice do autocomplete
+    import services.counter_service
+    import services.identity_cache
+    import services.company_search_service
+    import services.kpi_service
+    import services.reputation_service
+
+    # 7.2 Uploads recebidos em memória (ou em disco acima do limite), com hash na leitura
+    from services.upload_store_service import UploadRequest
+    app.request_class = UploadRequest
+
     # 8. Registra o novo comando (seed_db) no Flask
     app.cli.add_command(seed_db_command)
+    app.cli.add_command(reconcile_counters_command)
+    app.cli.add_command(backfill_kpis_command)
+    app.cli.add_command(rebuild_reputation_command)
+    app.cli.add_command(import_worker_command)
+    app.cli.add_command(gc_uploads_command)
 
     # 9. Rotas de Teste e Error Handlers
     @app.route('/api/')
@@ -108,6 +126,10 @@ def seed_db_command():
                 db.session.add(new_role)
             db.session.commit()
             print("Cargos criados com sucesso.")
+
+            # Os cargos ficam em cache por processo; descarta o cache deste
+            from services.identity_cache import IdentityCache
+            IdentityCache.invalidate_roles()
         else:
             print("Cargos já existem. Nada a fazer.")
     except Exception as e:
@@ -115,6 +137,93 @@ def seed_db_command():
         print(f"Erro ao criar cargos: {e}")
         print("As tabelas já existem? Você rodou 'flask db upgrade' primeiro?")
 
+@click.command('reconcile_counters')
+@click.option('--message-days', default=7, show_default=True,
+              help='Quantos dias de contadores de mensagens recalcular.')
+@with_appcontext
+def reconcile_counters_command(message_days):
+    """
+    Recalcula a tabela de contadores (platform_counters) a partir das tabelas de origem.
+    Execute: flask reconcile_counters
+    """
+    from services.counter_service import CounterService
+
+    try:
+        total = CounterService.reconcile(message_days=message_days)
+        print(f"Contadores reconciliados com sucesso ({total} contadores).")
+    except Exception as e:
+        print(f"Erro ao reconciliar contadores: {e}")
+
+@click.command('backfill_kpis')
+@click.option('--days', default=90, show_default=True,
+              help='Quantos dias (até hoje) recalcular.')
+@with_appcontext
+def backfill_kpis_command(days):
+    """
+    Recalcula os KPIs diários das empresas (company_daily_kpis) a partir das negociações.
+    Execute: flask backfill_kpis --days 365
+    """
+    from services.kpi_service import KpiService
+
+    try:
+        end = KpiService.local_day()
+        start = end - datetime.timedelta(days=days)
+        total = KpiService.backfill(start, end)
+        print(f"KPIs recalculados de {start} a {end} ({total} linhas).")
+    except Exception as e:
+        print(f"Erro ao recalcular KPIs: {e}")
+
+@click.command('rebuild_reputation')
+@with_appcontext
+def rebuild_reputation_command():
+    """
+    Recalcula a reputação das empresas (company_reputations) a partir das avaliações.
+    Execute: flask rebuild_reputation
+    """
+    from services.reputation_service import ReputationService
+
+    try:
+        total = ReputationService.rebuild()
+        print(f"Reputação recalculada ({total} empresas).")
+    except Exception as e:
+        print(f"Erro ao recalcular reputação: {e}")
+
+@click.command('import_worker')
+@click.option('--once', is_flag=True, default=False,
+              help='Processa os jobs pendentes e sai (em vez de aguardar novos).')
+@with_appcontext
+def import_worker_command(once):
+    """
+    Processa a fila de importações de planilhas (retoma jobs interrompidos).
+    Execute: flask import_worker
+    """
+    from services.import_job_service import ImportJobService
+
+    try:
+        ImportJobService.run_worker(once=once)
+    except KeyboardInterrupt:
+        print("Worker de importação encerrado.")
+
+@click.command('gc_uploads')
+@click.option('--ttl-hours', type=float, default=None,
+              help='Remove uploads sem uso há mais horas que isso (padrão: UPLOAD_TTL_HOURS).')
+@click.option('--quota-mb', type=float, default=None,
+              help='Tamanho máximo da pasta de uploads (padrão: UPLOAD_QUOTA_MB).')
+@with_appcontext
+def gc_uploads_command(ttl_hours, quota_mb):
+    """
+    Limpa a pasta de uploads (arquivos expirados e excesso sobre a cota).
+    Execute: flask gc_uploads (ex: diariamente, via cron)
+    """
+    from services.upload_store_service import UploadStoreService
+
+    try:
+        stats = UploadStoreService.collect_garbage(ttl_hours=ttl_hours, quota_mb=quota_mb)
+        print(f"Uploads removidos: {stats['removed']} ({stats['freed_bytes'] / 1024 / 1024:.1f} MB). "
+              f"Mantidos: {stats['kept']} ({stats['kept_bytes'] / 1024 / 1024:.1f} MB).")
+    except Exception as e:
+        print(f"Erro ao limpar os uploads: {e}")
+
 # Ponto de entrada para rodar o servidor
 if __name__ == "__main__":
     app = create_app()
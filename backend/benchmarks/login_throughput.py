@@ -0,0 +1,56 @@
+# backend/benchmarks/login_throughput.py
+
+"""
+Benchmark: vazão de logins (verificações bcrypt) por núcleo.
+
+Compara a verificação na própria thread (como era antes) com o pool
+de processos de utils/password_pool.py, usando várias threads de
+"requisição" simultâneas, como num worker Flask com threads.
+
+Execute a partir de backend/:
+    python -m benchmarks.login_throughput --requests 200 --threads 16
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import password_pool
+
+
+def run(label, verify, password_hash, total_requests, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as requests_pool:
+        results = list(requests_pool.map(lambda _: verify(password_hash, 'Senha123'), range(total_requests)))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    return label, total_requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=password_pool.app_config.BCRYPT_LOG_ROUNDS)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    workers = password_pool._workers() or cores
+    password_hash = password_pool._bcrypt_hash('Senha123', args.rounds)
+
+    # Aquece o pool (a criação dos processos não entra na medição)
+    password_pool.check_password(password_hash, 'Senha123')
+
+    rows = [
+        run('inline (thread da requisição)', password_pool._bcrypt_check, password_hash, args.requests, args.threads),
+        run(f'pool ({workers} processos)', password_pool.check_password, password_hash, args.requests, args.threads),
+    ]
+
+    print(f"bcrypt custo={args.rounds}, {args.requests} logins, {args.threads} threads, {cores} núcleos")
+    for label, per_second in rows:
+        print(f"  {label:<32} {per_second:8.1f} logins/s   {per_second / cores:6.2f} logins/s por núcleo")
+
+
+if __name__ == '__main__':
+    main()
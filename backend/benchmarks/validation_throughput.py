@@ -0,0 +1,89 @@
+# backend/benchmarks/validation_throughput.py
+
+"""
+Benchmark: validação vetorizada de planilhas (services/validation_service.py).
+
+Gera N linhas sintéticas de pedido (CNPJ com pontuação, e-mail, preço em
+formato brasileiro e quantidade, ~2% inválidas) e mede o tempo de
+ValidationService.validate contra os validadores escalares de utils/validators.py.
+
+Execute a partir de backend/:
+    python -m benchmarks.validation_throughput --rows 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.validation_service import ValidationService, FieldSpec
+from utils import vectorized_validators as vv
+from utils.validators import validate_cnpj, validate_email
+
+SCHEMA = {
+    'cnpj': FieldSpec('cnpj', 'CNPJ', required=True),
+    'email': FieldSpec('email', 'E-mail', required=True),
+    'preco': FieldSpec('money', 'Preço', output='preco_centavos'),
+    'quantidade': FieldSpec('quantity', 'Quantidade', required=True)
+}
+
+
+def make_cnpjs(rng, rows):
+    """CNPJs válidos formatados (00.000.000/0000-00), gerados com os mesmos pesos do validador."""
+    base = rng.integers(0, 10, size=(rows, 12))
+    rest = (base * vv.CNPJ_WEIGHTS_DV1).sum(axis=1) % 11
+    dv1 = np.where(rest < 2, 0, 11 - rest)
+    with_dv1 = np.column_stack([base, dv1])
+    rest = (with_dv1 * vv.CNPJ_WEIGHTS_DV2).sum(axis=1) % 11
+    dv2 = np.where(rest < 2, 0, 11 - rest)
+    digits = pd.Series([''.join(map(str, row)) for row in np.column_stack([with_dv1, dv2])])
+    return (digits.str[:2] + '.' + digits.str[2:5] + '.' + digits.str[5:8] + '/'
+            + digits.str[8:12] + '-' + digits.str[12:])
+
+
+def make_frame(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    cents = rng.integers(1, 10_000_000, size=rows)
+    df = pd.DataFrame({
+        'cnpj': make_cnpjs(rng, rows),
+        'email': pd.Series(rng.integers(0, 10 ** 9, size=rows)).map('cliente{}@empresa.com.br'.format),
+        'preco': pd.Series(cents // 100).map('R$ {:,}'.format).str.replace(',', '.')
+                 + ',' + pd.Series(cents % 100).map('{:02d}'.format),
+        'quantidade': pd.Series(rng.integers(1, 5000, size=rows)).astype(str)
+    })
+    # ~2% de linhas com algum erro
+    broken = rng.random(rows) < 0.02
+    df.loc[broken, 'cnpj'] = '11.111.111/1111-11'
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--scalar-sample', type=int, default=100_000,
+                        help='Linhas usadas para estimar o tempo dos validadores escalares.')
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+
+    start = time.perf_counter()
+    result = ValidationService.validate(df, SCHEMA)
+    vectorized = time.perf_counter() - start
+
+    sample = df.head(args.scalar_sample)
+    start = time.perf_counter()
+    for cnpj, email in zip(sample['cnpj'], sample['email']):
+        validate_cnpj(cnpj)
+        validate_email(email)
+    scalar = (time.perf_counter() - start) * len(df) / max(len(sample), 1)
+
+    print(f"{len(df)} linhas, {int(result.invalid.sum())} inválidas")
+    print(f"  vetorizado (CNPJ, e-mail, preço, quantidade): {vectorized:6.2f} s")
+    print(f"  escalar (só CNPJ e e-mail, estimado):         {scalar:6.2f} s")
+    for message, total in result.summary().items():
+        print(f"    {message}: {total}")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,9 @@ class Config:
     # Chaves de Segurança
     SECRET_KEY = "zipbum-amanda-flask-sk-muito-secreto-123"
     JWT_SECRET_KEY = "zipbum-amanda-jwt-sk-muito-secreto-456"
+    # Refresh token já trocado ainda aceito por alguns segundos (renovações
+    # simultâneas do mesmo navegador não são tratadas como roubo do token)
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS = 10
     
     # --- CONEXÃO DIRETA NEON DB ---
     # Conforme solicitado, usando o link direto.
@@ -29,6 +32,13 @@ class Config:
     # Google reCAPTCHA (Substitua pelas suas chaves)
     RECAPTCHA_SITE_KEY = "6LfhuAssAAAAAI3GfXs_5vif4Uq9d8dj_UAayXvV"
     RECAPTCHA_SECRET_KEY = "6LfhuAssAAAAAEkzx2ZeBH1d82WQgg8J-2HYhkH6"
+    # 'google' (siteverify) ou 'stub' (verificador local, sem rede)
+    RECAPTCHA_BACKEND = os.getenv("RECAPTCHA_BACKEND", "google")
+    RECAPTCHA_MIN_SCORE = 0.5
+    RECAPTCHA_TIMEOUT = (2, 3) # (conexão, leitura) em segundos
+    RECAPTCHA_POOL_SIZE = 10
+    RECAPTCHA_CACHE_TTL = 120 # segundos (validade de um token do Google)
+    RECAPTCHA_CACHE_MAX = 10000
 
     # Configurações de Formato
     PYTHON_DATE_FORMAT = "%d/%m/%Y %H:%M:%S"
@@ -38,9 +48,61 @@ class Config:
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'static/uploads')
     ALLOWED_EXTENSIONS = {'csv', 'xlsx'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
+    # Uploads até este tamanho são lidos da memória; acima, vão para um temporário em disco
+    UPLOAD_SPOOL_BYTES = 8 * 1024 * 1024
+    # Limpeza dos uploads ('flask gc_uploads'): sem uso há mais de TTL horas,
+    # ou os usados há mais tempo quando a pasta passa da cota
+    UPLOAD_TTL_HOURS = 72
+    UPLOAD_QUOTA_MB = 2048
+
+    # Orçamento de memória por importação (ver utils/memory_meter.py).
+    # A memória é estimada pelo tamanho do arquivo x fator do formato; acima do
+    # orçamento a planilha é lida/processada em blocos, acima do máximo é recusada.
+    IMPORT_MEMORY_BUDGET_MB = 256
+    IMPORT_MEMORY_MAX_MB = 4096
+    IMPORT_MEMORY_EXPANSION = {'csv': 8, 'xlsx': 40} # XLSX é XML compactado
+    IMPORT_MEMORY_TRACEMALLOC = False # True: mede o pico de cada etapa (mais lento)
+
+    # Jobs de importação (processados em blocos, com checkpoint)
+    IMPORT_CHUNK_ROWS = 5000
+    IMPORT_JOB_STALE_SECONDS = 120 # sem heartbeat por este tempo, outro worker retoma o job
+    IMPORT_JOB_MAX_ATTEMPTS = 3
+    IMPORT_WORKER_POLL_SECONDS = 2
+    # True: o próprio processo web inicia o job numa thread (sem 'flask import_worker')
+    IMPORT_INLINE_WORKER = True
 
     DEV_SECRET_CODE = "Qazxcvbnmlp7@"
 
+    # Limitação de tentativas de login (janela deslizante)
+    # 'memory' (por processo) ou 'redis' (compartilhado entre workers)
+    LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")
+    LOGIN_THROTTLE_REDIS_URL = os.getenv("LOGIN_THROTTLE_REDIS_URL", "redis://localhost:6379/0")
+    LOGIN_THROTTLE_IP_LIMIT = 20 # tentativas por IP...
+    LOGIN_THROTTLE_IP_WINDOW = 60 # ...a cada 60 segundos
+    LOGIN_THROTTLE_ACCOUNT_LIMIT = 5 # falhas por conta...
+    LOGIN_THROTTLE_ACCOUNT_WINDOW = 900 # ...a cada 15 minutos
+
+    # Cache de identidade (utilizadores autenticados) por processo
+    IDENTITY_CACHE_TTL = 60 # segundos
+    IDENTITY_CACHE_MAX = 10000
+
+    # Autocomplete de empresas (índice de prefixos em memória, por processo)
+    # Acima deste nº de entradas (palavra, empresa) a busca vai para o banco (~100 bytes/entrada)
+    COMPANY_INDEX_MAX_ENTRIES = 2000000
+    COMPANY_INDEX_SYNC_INTERVAL = 30 # segundos entre sincronizações com outros workers
+    COMPANY_INDEX_SYNC_OVERLAP = 60 # segundos relidos a cada sincronização (transações longas)
+
+    # Reputação das empresas: meia-vida (dias) do peso de uma avaliação na média recente
+    REPUTATION_HALF_LIFE_DAYS = 90
+
+    # Senhas (bcrypt)
+    # Custo dos novos hashes; ao mudar, os hashes antigos são refeitos no próximo login
+    BCRYPT_LOG_ROUNDS = 12
+    # Processos do pool de hash (None = nº de CPUs, 0 = executa na thread da requisição)
+    PASSWORD_POOL_WORKERS = None
+    PASSWORD_POOL_MAX_PENDING = 64
+    PASSWORD_POOL_TIMEOUT = 10 # segundos
+
 # --- REMOVIDO DevelopmentConfig (localhost) ---
 
 # --- REMOVIDO ProductionConfig ---
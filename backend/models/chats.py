@@ -48,7 +48,8 @@ class Message(db.Model):
     moderation_reason = db.Column(db.String(255), nullable=True)
     
     # Timestamp (Formato DD/MM/YYYY HH:MM:SS)
-    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+    # Indexado para a reconciliação dos contadores de mensagens por dia
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), index=True)
 
     # Relação
     chat = db.relationship('Chat', back_populates='messages')
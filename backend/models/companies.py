@@ -7,6 +7,16 @@ class Company(db.Model):
     Modelo para Empresas (Clientes ZIPBUM).
     """
     __tablename__ = 'companies'
+
+    # Índices da listagem paginada do Admin (filtro + ordenação por created_at, id)
+    __table_args__ = (
+        db.Index('ix_companies_created_at_id', 'created_at', 'id'),
+        db.Index('ix_companies_uf_created_at_id', 'uf', 'created_at', 'id'),
+        db.Index('ix_companies_active_created_at_id', 'is_active', 'created_at', 'id'),
+        db.Index('ix_companies_uf_cidade_created_at', 'uf', db.text('lower(cidade)'), 'created_at'),
+        # Sincronização do índice do autocomplete entre workers
+        db.Index('ix_companies_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True) 
     cnpj = db.Column(db.String(18), unique=True, nullable=False, index=True) 
@@ -22,6 +32,9 @@ class Company(db.Model):
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=func.now())
     
     users = db.relationship('User', back_populates='company')
+
+    # Reputação agregada (uma linha, mantida pelo ReputationService)
+    reputation = db.relationship('CompanyReputation', back_populates='company', uselist=False)
     
     # --- CORREÇÃO AQUI ---
     # Relação com negociações (descomentadas)
@@ -51,7 +64,8 @@ class Company(db.Model):
             'uf': self.uf,
             'cidade': self.cidade,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'reputation': self.reputation.to_dict() if self.reputation else None
         }
 
     def __repr__(self):
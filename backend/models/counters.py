@@ -0,0 +1,25 @@
+# backend/models/counters.py
+from app import db
+from sqlalchemy.sql import func
+
+class PlatformCounter(db.Model):
+    """
+    Modelo para Contadores da plataforma (ex: 'companies.total').
+    Os valores são mantidos pelo CounterService a cada insert/update/delete,
+    evitando COUNT(*) nas tabelas grandes.
+    """
+    __tablename__ = 'platform_counters'
+
+    # Nome do contador (ex: 'companies.active', 'companies.uf.SP')
+    name = db.Column(db.String(100), primary_key=True)
+
+    value = db.Column(db.BigInteger, default=0, nullable=False)
+
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __init__(self, name, value=0):
+        self.name = name
+        self.value = value
+
+    def __repr__(self):
+        return f'<PlatformCounter {self.name}={self.value}>'
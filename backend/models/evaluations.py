@@ -49,4 +49,50 @@ class Evaluation(db.Model):
         }
 
     def __repr__(self):
-        return f'<Evaluation {self.id} (Rating: {self.rating})>'
\ No newline at end of file
+        return f'<Evaluation {self.id} (Rating: {self.rating})>'
+
+class CompanyReputation(db.Model):
+    """
+    Modelo para a Reputação agregada de uma empresa (uma linha por empresa).
+    Mantido pelo ReputationService a cada nova avaliação, evitando
+    agregar as avaliações de todas as negociações da empresa.
+    """
+    __tablename__ = 'company_reputations'
+
+    company_id = db.Column(db.String(36), db.ForeignKey('companies.id'), primary_key=True)
+
+    # Totais de todas as avaliações recebidas
+    ratings_count = db.Column(db.Integer, default=0, nullable=False)
+    ratings_sum = db.Column(db.Integer, default=0, nullable=False)
+
+    # Histograma por estrelas (1 a 5)
+    stars_1 = db.Column(db.Integer, default=0, nullable=False)
+    stars_2 = db.Column(db.Integer, default=0, nullable=False)
+    stars_3 = db.Column(db.Integer, default=0, nullable=False)
+    stars_4 = db.Column(db.Integer, default=0, nullable=False)
+    stars_5 = db.Column(db.Integer, default=0, nullable=False)
+
+    # Média recente: somas com decaimento exponencial (meia-vida em REPUTATION_HALF_LIFE_DAYS),
+    # "trazidas" até decayed_at a cada nova avaliação
+    decayed_sum = db.Column(db.Float, default=0, nullable=False)
+    decayed_count = db.Column(db.Float, default=0, nullable=False)
+    decayed_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    company = db.relationship('Company', back_populates='reputation')
+
+    def to_dict(self):
+        return {
+            'ratings_count': self.ratings_count,
+            'average': round(self.ratings_sum / self.ratings_count, 2) if self.ratings_count else None,
+            # O decaimento afeta soma e peso por igual, então a razão já é a média recente
+            'recent_average': round(self.decayed_sum / self.decayed_count, 2) if self.decayed_count else None,
+            'histogram': {
+                '1': self.stars_1, '2': self.stars_2, '3': self.stars_3,
+                '4': self.stars_4, '5': self.stars_5
+            }
+        }
+
+    def __repr__(self):
+        return f'<CompanyReputation {self.company_id} ({self.ratings_count} avaliações)>'
@@ -0,0 +1,147 @@
+# backend/models/imports.py
+from app import db
+from sqlalchemy.sql import func
+
+class ImportBatch(db.Model):
+    """
+    Modelo para uma Importação de planilha (uma execução do mapeamento).
+    Guarda quem importou, de qual arquivo, e o resultado.
+    É também o job da importação em blocos: 'next_row' é o checkpoint
+    (gravado na mesma transação de cada bloco importado).
+    """
+    __tablename__ = 'import_batches'
+
+    id = db.Column(db.String(36), primary_key=True) # UUID
+
+    company_id = db.Column(db.String(36), db.ForeignKey('companies.id'), nullable=True, index=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+
+    # Nome do arquivo em UPLOAD_FOLDER (o 'file_path_id' devolvido no upload)
+    file_path_id = db.Column(db.String(255), nullable=False)
+
+    # Tipo de importação (por enquanto só 'orders': itens de pedido)
+    import_type = db.Column(db.String(50), default='orders', nullable=False)
+
+    # Status: 'queued', 'processing', 'completed', 'failed'
+    status = db.Column(db.String(20), default='queued', nullable=False, index=True)
+
+    # Mapeamento de colunas escolhido no import.js (JSON)
+    mapping_json = db.Column(db.Text, nullable=True)
+
+    total_rows = db.Column(db.Integer, default=0, nullable=False)
+    imported_rows = db.Column(db.Integer, default=0, nullable=False)
+    rejected_rows = db.Column(db.Integer, default=0, nullable=False)
+
+    # Importação por diferença (fingerprints): das linhas importadas, quantas
+    # alteraram um item existente e quantas já estavam iguais; e quantos itens
+    # de importações anteriores sumiram da planilha e foram removidos
+    updated_rows = db.Column(db.Integer, default=0, nullable=False)
+    unchanged_rows = db.Column(db.Integer, default=0, nullable=False)
+    deleted_rows = db.Column(db.Integer, default=0, nullable=False)
+
+    # Modo "substituir": a planilha é o retrato completo dos itens da empresa
+    # e os itens ausentes dela são removidos. Escolhido no mapeamento; por
+    # padrão a importação só insere e atualiza (planilhas parciais, de outro
+    # vendedor, não apagam os itens das demais)
+    replace_missing = db.Column(db.Boolean, default=False, nullable=False)
+
+    # Checkpoint: próxima linha (posição na planilha mapeada) a processar
+    next_row = db.Column(db.Integer, default=0, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=True)
+
+    # Controle do worker (retomada após queda ou deploy)
+    worker_id = db.Column(db.String(100), nullable=True)
+    heartbeat_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    error_message = db.Column(db.Text, nullable=True)
+
+    # Primeiras linhas com erro e contagem por mensagem (JSON)
+    errors_json = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+    started_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    finished_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'company_id': self.company_id,
+            'file_path_id': self.file_path_id,
+            'import_type': self.import_type,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'imported_rows': self.imported_rows,
+            'rejected_rows': self.rejected_rows,
+            'updated_rows': self.updated_rows,
+            'unchanged_rows': self.unchanged_rows,
+            'deleted_rows': self.deleted_rows,
+            'replace_missing': self.replace_missing,
+            'rows_done': self.next_row,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<ImportBatch {self.id} ({self.status})>'
+
+class ImportedOrderItem(db.Model):
+    """
+    Modelo para os Itens de pedido importados de uma planilha.
+    Gravados em massa (COPY) pelo ImportService, nunca um a um pelo ORM.
+    """
+    __tablename__ = 'import_order_items'
+
+    # Atualização/remoção dos itens pela chave da linha (importação por diferença)
+    __table_args__ = (
+        db.Index('ix_import_order_items_company_row_key', 'company_id', 'row_key'),
+    )
+
+    # BigInteger: cresce rápido (uma linha por linha de planilha)
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+
+    batch_id = db.Column(db.String(36), db.ForeignKey('import_batches.id'), nullable=False, index=True)
+    company_id = db.Column(db.String(36), db.ForeignKey('companies.id'), nullable=True, index=True)
+
+    # Linha de origem na planilha (para relatórios de erro)
+    row_number = db.Column(db.Integer, nullable=False)
+
+    # Chave estável da linha (ver FingerprintService.row_keys); nula nos itens
+    # importados antes da importação por diferença
+    row_key = db.Column(db.BigInteger, nullable=True)
+
+    # CNPJ do comprador, só dígitos
+    cnpj_comprador = db.Column(db.String(14), nullable=False)
+    razao_social = db.Column(db.String(255), nullable=True)
+    sku_produto = db.Column(db.String(100), nullable=False)
+    quantidade = db.Column(db.Integer, nullable=False)
+    # Preço em centavos (evita arredondamento de ponto flutuante)
+    preco_unitario_centavos = db.Column(db.BigInteger, nullable=True)
+
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f'<ImportedOrderItem {self.id} (SKU: {self.sku_produto})>'
+
+class ImportFingerprint(db.Model):
+    """
+    Modelo para a "impressão digital" de cada linha já importada, por empresa
+    e tipo de importação. Permite importar só a diferença quando a mesma
+    planilha é enviada de novo com poucas linhas alteradas.
+    """
+    __tablename__ = 'import_fingerprints'
+
+    company_id = db.Column(db.String(36), db.ForeignKey('companies.id'), primary_key=True)
+    import_type = db.Column(db.String(50), primary_key=True)
+    # Chave estável da linha (identifica "a mesma linha" entre envios)
+    row_key = db.Column(db.BigInteger, primary_key=True)
+
+    # Hash do conteúdo (valores já convertidos) da linha
+    row_hash = db.Column(db.BigInteger, nullable=False)
+
+    # Última importação que gravou a linha
+    batch_id = db.Column(db.String(36), db.ForeignKey('import_batches.id'), nullable=True)
+
+    def __repr__(self):
+        return f'<ImportFingerprint {self.company_id}/{self.import_type}/{self.row_key}>'
@@ -0,0 +1,33 @@
+# backend/models/kpis.py
+from app import db
+from sqlalchemy.sql import func
+
+class CompanyDailyKPI(db.Model):
+    """
+    Modelo para os KPIs diários de negociação de uma empresa (rollup).
+    Uma linha por (empresa, dia no fuso America/Sao_Paulo), mantida pelo
+    KpiService a cada negociação/proposta, evitando varrer as tabelas de origem.
+    Médias e taxas são derivadas das somas na leitura.
+    """
+    __tablename__ = 'company_daily_kpis'
+
+    company_id = db.Column(db.String(36), db.ForeignKey('companies.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+
+    # Negociações abertas e fechadas (com sucesso / sem sucesso) no dia
+    negotiations_opened = db.Column(db.Integer, default=0, nullable=False)
+    negotiations_won = db.Column(db.Integer, default=0, nullable=False)
+    negotiations_lost = db.Column(db.Integer, default=0, nullable=False)
+
+    # Propostas enviadas nas negociações da empresa (para o valor médio)
+    proposals_count = db.Column(db.Integer, default=0, nullable=False)
+    proposals_value_sum = db.Column(db.Float, default=0, nullable=False)
+
+    # Respostas (aceite/rejeição) da empresa às propostas recebidas
+    responses_count = db.Column(db.Integer, default=0, nullable=False)
+    response_seconds_sum = db.Column(db.Float, default=0, nullable=False)
+
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f'<CompanyDailyKPI {self.company_id} {self.day}>'
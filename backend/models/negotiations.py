@@ -63,6 +63,9 @@ class Proposal(db.Model):
     
     # Timestamp (Formato DD/MM/YYYY HH:MM:SS)
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+
+    # Quando a outra parte aceitou/rejeitou (tempo de resposta nos KPIs)
+    responded_at = db.Column(db.DateTime(timezone=True), nullable=True)
     
     # Relações
     negotiation = db.relationship('Negotiation', back_populates='proposals')
@@ -0,0 +1,41 @@
+# backend/models/refresh_tokens.py
+from app import db
+from sqlalchemy.sql import func
+
+class RefreshToken(db.Model):
+    """
+    Modelo para os Refresh Tokens emitidos (rotação com detecção de reuso).
+
+    Cada login abre uma "família"; cada /refresh consome o token atual e
+    emite o próximo na mesma família. Se um token já consumido for
+    apresentado de novo, a família inteira é revogada.
+    """
+    __tablename__ = 'refresh_tokens'
+
+    # 'jti' (JWT ID) do refresh token
+    jti = db.Column(db.String(36), primary_key=True)
+
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # Família de rotação (um por login)
+    family_id = db.Column(db.String(36), nullable=False, index=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    used_at = db.Column(db.DateTime(timezone=True), nullable=True) # Quando foi trocado por um novo
+    revoked_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    # Renovação simultânea (janela de tolerância): IP que trocou o token e
+    # quando a única reapresentação aceita foi usada
+    used_ip = db.Column(db.String(45), nullable=True)
+    grace_used_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    def __init__(self, jti, user_id, family_id, expires_at):
+        self.jti = jti
+        self.user_id = user_id
+        self.family_id = family_id
+        self.expires_at = expires_at
+
+    def __repr__(self):
+        return f'<RefreshToken {self.jti} (User: {self.user_id}, Family: {self.family_id})>'
@@ -1,6 +1,7 @@
 import datetime
 from sqlalchemy.sql import func # Para timestamps automáticos
-from app import db, bcrypt # Importa 'db' e 'bcrypt' do app.py
+from app import db # Importa 'db' do app.py
+from utils.password_pool import hash_password, check_password
 
 class Role(db.Model):
     """
@@ -32,6 +33,19 @@ class User(db.Model):
     Modelo para Usuários da plataforma.
     """
     __tablename__ = 'users'
+
+    # Índices da listagem paginada do Admin (ordenação por cursor + filtros)
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+        db.Index('ix_users_email_id', 'email', 'id'),
+        db.Index('ix_users_full_name_id', 'full_name', 'id'),
+        # Listagem paginada da equipa da empresa (ordem alfabética)
+        db.Index('ix_users_company_full_name_id', 'company_id', 'full_name', 'id'),
+        # Filtro por prefixo de e-mail (LIKE 'abc%') independente da collation
+        db.Index('ix_users_email_pattern', 'email', postgresql_ops={'email': 'varchar_pattern_ops'}),
+        # Poucos utilizadores bloqueados: índice parcial
+        db.Index('ix_users_blocked', 'id', postgresql_where=db.text('is_blocked')),
+    )
     
     # Usamos String(36) para armazenar um UUID (como string)
     id = db.Column(db.String(36), primary_key=True) 
@@ -41,8 +55,8 @@ class User(db.Model):
     
     # Chaves Estrangeiras
     # Opcional para admins (nullable=True)
-    company_id = db.Column(db.String(36), db.ForeignKey('companies.id'), nullable=True) 
-    role_id = db.Column(db.Integer, db.ForeignKey('roles.id'), nullable=False)
+    company_id = db.Column(db.String(36), db.ForeignKey('companies.id'), nullable=True, index=True) 
+    role_id = db.Column(db.Integer, db.ForeignKey('roles.id'), nullable=False, index=True)
     
     # Status
     is_active = db.Column(db.Boolean, default=True, nullable=False)
@@ -77,12 +91,12 @@ class User(db.Model):
         self.company_id = company_id
 
     def set_password(self, password):
-        """Cria um hash seguro da senha."""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        """Cria um hash seguro da senha (no pool de processos do bcrypt)."""
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        """Verifica se a senha fornecida bate com o hash."""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        """Verifica se a senha fornecida bate com o hash (no pool de processos do bcrypt)."""
+        return check_password(self.password_hash, password)
 
     def to_dict(self):
         """Retorna um dicionário serializável do usuário (sem a senha)."""
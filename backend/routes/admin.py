@@ -1,27 +1,113 @@
 # backend/routes/admin.py
 
-from flask import request, jsonify
+from flask import request, jsonify, Response, stream_with_context
 from . import admin_bp # Importa o Blueprint
 from models.users import User, Role
 from models.companies import Company
 from models.reports import Report
 from services.role_service import RoleService, roles_required
+from services.counter_service import CounterService
+from services.identity_cache import IdentityCache
+from services.export_service import ExportService
+from services.date_service import DateService
 from utils.constants import Cargos
+from utils.security import get_user_identity, get_user_role_from_token
+from utils.pagination import parse_limit, decode_cursor, parse_datetime, apply_keyset, fetch_page, page_response
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql import func, false
 from app import db
 
 # Níveis de permissão de Admin (ZIPBUM)
 ADMIN_LEVELS = [Cargos.ADMIN_ZIPBUM, Cargos.HELPER_N1, Cargos.HELPER_N2, Cargos.HELPER_N3]
 
+# Ordenações permitidas na listagem de utilizadores (parâmetro 'sort')
+USER_SORT_COLUMNS = {
+    'created_at': User.created_at,
+    'email': User.email,
+    'full_name': User.full_name
+}
+
+def _as_bool(value) -> bool:
+    """Aceita booleanos do JSON ou 'true'/'false' da query string."""
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() == 'true'
+
+def _user_filter_criteria(filters):
+    """
+    Converte os filtros de utilizadores (role_level, company_id, is_blocked, email)
+    em condições SQLAlchemy. Usado pela listagem e pelas ações em massa.
+    Retorna (condições, erro).
+    """
+    criteria = []
+    if filters.get('role_level') is not None:
+        try:
+            role_level = int(filters.get('role_level'))
+        except (TypeError, ValueError):
+            return None, "role_level deve ser um número."
+        role = IdentityCache.get_role_by_level(role_level)
+        criteria.append(User.role_id == role.id if role else false())
+    if filters.get('company_id'):
+        criteria.append(User.company_id == filters.get('company_id'))
+    if filters.get('is_blocked') is not None:
+        criteria.append(User.is_blocked.is_(_as_bool(filters.get('is_blocked'))))
+    if filters.get('email'):
+        # Os e-mails são gravados em minúsculas; o LIKE 'prefixo%' usa o índice pattern_ops
+        prefix = str(filters.get('email')).lower().strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        criteria.append(User.email.like(f"{prefix}%", escape='\\'))
+    return criteria, None
+
 @admin_bp.route('/users', methods=['GET'])
 @roles_required(ADMIN_LEVELS) # Protegido!
 def get_all_users():
     """
-    (Admin) Retorna uma lista de todos os utilizadores no sistema.
+    (Admin) Retorna os utilizadores do sistema, paginados por cursor.
+
+    Query string (todos opcionais):
+      - role_level: nível do cargo (0-7)
+      - company_id: ID da empresa
+      - is_blocked: 'true' ou 'false'
+      - email: prefixo do e-mail
+      - sort: 'created_at' (padrão), 'email' ou 'full_name'
+      - order: 'desc' (padrão) ou 'asc'
+      - limit / cursor: paginação (o cursor vem em 'next_cursor')
     """
+    args = request.args
+    sort = args.get('sort', 'created_at')
+    if sort not in USER_SORT_COLUMNS:
+        return jsonify({"error": f"Ordenação inválida. Use: {', '.join(USER_SORT_COLUMNS)}."}), 400
+    descending = args.get('order', 'desc').lower() != 'asc'
+    limit = parse_limit(args.get('limit'))
+
+    cursor_values = None
+    if args.get('cursor'):
+        cursor_values = decode_cursor(args.get('cursor'))
+        if not cursor_values or len(cursor_values) != 2:
+            return jsonify({"error": "Cursor inválido."}), 400
+        if sort == 'created_at':
+            cursor_values[0] = parse_datetime(cursor_values[0])
+
     try:
-        users = User.query.all()
-        # Usamos o .to_dict() que definimos no modelo User
-        return jsonify([user.to_dict() for user in users]), 200
+        # Carrega Role e Company no mesmo SELECT (evita uma query por utilizador)
+        query = User.query.options(joinedload(User.role), joinedload(User.company))
+
+        # Filtros
+        criteria, error = _user_filter_criteria(args)
+        if error:
+            return jsonify({"error": error}), 400
+        query = query.filter(*criteria)
+
+        sort_column = USER_SORT_COLUMNS[sort]
+        query = apply_keyset(query, sort_column, User.id, cursor_values, descending)
+        users, next_cursor = fetch_page(query, limit, lambda u: [getattr(u, sort), u.id])
+
+        items = []
+        for user in users:
+            item = user.to_dict()
+            item['company_name'] = user.company.razao_social if user.company else None
+            items.append(item)
+
+        return jsonify(page_response(items, next_cursor, limit)), 200
     except Exception as e:
         print(f"Erro ao buscar utilizadores: {e}")
         return jsonify({"error": "Erro interno ao buscar utilizadores."}), 500
@@ -30,15 +116,86 @@ def get_all_users():
 @roles_required(ADMIN_LEVELS) # Protegido!
 def get_all_companies():
     """
-    (Admin) Retorna uma lista de todas as empresas registadas.
+    (Admin) Retorna as empresas registadas, paginadas por cursor
+    (mais recentes primeiro).
+
+    Query string (todos opcionais):
+      - uf, cidade, is_active ('true'/'false')
+      - created_from / created_to: datas ISO 8601 (ex: 2025-01-31)
+      - limit / cursor: paginação (o cursor vem em 'next_cursor')
+
+    O 'total' vem dos contadores mantidos (CounterService) e só é
+    devolvido para os filtros que eles cobrem (uf e/ou is_active);
+    nos demais casos vem null.
     """
+    args = request.args
+    limit = parse_limit(args.get('limit'))
+
+    cursor_values = None
+    if args.get('cursor'):
+        cursor_values = decode_cursor(args.get('cursor'))
+        if not cursor_values or len(cursor_values) != 2:
+            return jsonify({"error": "Cursor inválido."}), 400
+        cursor_values[0] = parse_datetime(cursor_values[0])
+
+    uf = args.get('uf', '').upper().strip() or None
+    cidade = args.get('cidade', '').strip() or None
+    is_active = None
+    if args.get('is_active') is not None:
+        is_active = args.get('is_active').lower() == 'true'
+
+    created_from = created_to = None
+    if args.get('created_from'):
+        created_from = parse_datetime(args.get('created_from'))
+        if created_from is None:
+            return jsonify({"error": "created_from inválido (use ISO 8601)."}), 400
+    if args.get('created_to'):
+        created_to = parse_datetime(args.get('created_to'))
+        if created_to is None:
+            return jsonify({"error": "created_to inválido (use ISO 8601)."}), 400
+
     try:
-        companies = Company.query.all()
-        return jsonify([company.to_dict() for company in companies]), 200
+        # A reputação vai no mesmo SELECT (embutida em company.to_dict())
+        query = Company.query.options(joinedload(Company.reputation))
+        if uf:
+            query = query.filter(Company.uf == uf)
+        if cidade:
+            query = query.filter(func.lower(Company.cidade) == cidade.lower())
+        if is_active is not None:
+            query = query.filter(Company.is_active.is_(is_active))
+        if created_from:
+            query = query.filter(Company.created_at >= created_from)
+        if created_to:
+            query = query.filter(Company.created_at < created_to)
+
+        query = apply_keyset(query, Company.created_at, Company.id, cursor_values, descending=True)
+        companies, next_cursor = fetch_page(query, limit, lambda c: [c.created_at, c.id])
+
+        # Total a partir dos contadores (O(1)), apenas para filtros cobertos
+        total = None
+        if not (cidade or created_from or created_to):
+            total = CounterService.count_companies(uf=uf, is_active=is_active)
+
+        items = [company.to_dict() for company in companies]
+        return jsonify(page_response(items, next_cursor, limit, total=total)), 200
     except Exception as e:
         print(f"Erro ao buscar empresas: {e}")
         return jsonify({"error": "Erro interno ao buscar empresas."}), 500
 
+@admin_bp.route('/stats', methods=['GET'])
+@roles_required(ADMIN_LEVELS)
+def get_dashboard_stats():
+    """
+    (Admin) Números do painel: utilizadores por cargo, empresas ativas,
+    negociações abertas, denúncias pendentes e mensagens de hoje.
+    Lidos da tabela de contadores, sem COUNT(*) nas tabelas grandes.
+    """
+    try:
+        return jsonify(CounterService.get_dashboard_stats()), 200
+    except Exception as e:
+        print(f"Erro ao buscar estatísticas: {e}")
+        return jsonify({"error": "Erro interno ao buscar estatísticas."}), 500
+
 @admin_bp.route('/user/changerole', methods=['POST'])
 @roles_required([Cargos.ADMIN_ZIPBUM]) # Apenas Admin Nível 0 pode mudar cargos
 def change_user_role():
@@ -66,6 +223,96 @@ def change_user_role():
         print(f"Erro ao mudar cargo: {e}")
         return jsonify({"error": "Erro interno ao mudar cargo."}), 500
 
+# Limite de IDs por pedido em massa
+BULK_MAX_USER_IDS = 5000
+
+@admin_bp.route('/users/bulk', methods=['POST'])
+@roles_required(ADMIN_LEVELS)
+def bulk_update_users():
+    """
+    (Admin) Aplica uma ação a vários utilizadores num único UPDATE.
+
+    Corpo JSON:
+      - action: 'change_role' (apenas Admin Nível 0), 'block' ou 'unblock'
+      - user_ids: lista de IDs  OU  filter: {role_level, company_id, is_blocked, email}
+      - new_role_level: obrigatório para 'change_role'
+      - days: (opcional) duração do bloqueio; sem 'days' o bloqueio não expira
+    O próprio autor e utilizadores de nível igual ou acima do dele nunca são
+    alterados (aparecem como "forbidden" no resultado).
+    """
+    data = request.json or {}
+    action = data.get('action')
+    user_ids = data.get('user_ids')
+    filters = data.get('filter')
+
+    actor_level = get_user_role_from_token()
+    if action == 'change_role' and actor_level != Cargos.ADMIN_ZIPBUM:
+        return jsonify({"error": "Apenas o Admin ZIPBUM pode mudar cargos."}), 403
+    if user_ids is not None and (not isinstance(user_ids, list) or len(user_ids) > BULK_MAX_USER_IDS):
+        return jsonify({"error": f"user_ids deve ser uma lista com até {BULK_MAX_USER_IDS} IDs."}), 400
+
+    criteria = None
+    if not user_ids and filters:
+        criteria, error = _user_filter_criteria(filters)
+        if error:
+            return jsonify({"error": error}), 400
+
+    try:
+        result = RoleService.bulk_update_users(
+            action,
+            actor_id=get_user_identity(),
+            actor_level=actor_level,
+            user_ids=list(dict.fromkeys(user_ids)) if user_ids else None,
+            criteria=criteria,
+            new_role_level=data.get('new_role_level'),
+            days=data.get('days'),
+            ip_address=request.remote_addr
+        )
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Erro na ação em massa: {e}")
+        return jsonify({"error": "Erro interno ao aplicar a ação em massa."}), 500
+
+@admin_bp.route('/export/<string:entity>', methods=['GET'])
+@roles_required([Cargos.ADMIN_ZIPBUM])
+def export_entity(entity):
+    """
+    (Admin) Exporta 'users', 'companies' ou 'messages' em streaming
+    (chunked transfer encoding), sem carregar a tabela em memória.
+
+    Query string (opcionais):
+      - format: 'ndjson' (padrão) ou 'csv'
+      - gzip: 'true' para comprimir (arquivo .gz)
+      - created_from / created_to: datas ISO 8601
+    """
+    args = request.args
+    if entity not in ExportService.entities():
+        return jsonify({"error": f"Entidade inválida. Use: {', '.join(ExportService.entities())}."}), 404
+    fmt = args.get('format', 'ndjson').lower()
+    if fmt not in ExportService.FORMATS:
+        return jsonify({"error": "Formato inválido. Use 'ndjson' ou 'csv'."}), 400
+    compress = args.get('gzip', 'false').lower() == 'true'
+
+    created_from = parse_datetime(args.get('created_from')) if args.get('created_from') else None
+    created_to = parse_datetime(args.get('created_to')) if args.get('created_to') else None
+    if (args.get('created_from') and not created_from) or (args.get('created_to') and not created_to):
+        return jsonify({"error": "Datas inválidas (use ISO 8601)."}), 400
+
+    stmt = ExportService.build_statement(entity, created_from, created_to)
+    filename = f"{entity}_{DateService.get_now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    if compress:
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    return Response(
+        stream_with_context(ExportService.generate(stmt, fmt, compress)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 @admin_bp.route('/reports', methods=['GET'])
 @roles_required(ADMIN_LEVELS)
 def get_pending_reports():
@@ -2,14 +2,21 @@
 
 from flask import request, jsonify
 from . import auth_bp # Importa o Blueprint
-from models.users import User, Role
+from models.users import User
 from models.companies import Company
 from utils.validators import validate_email, validate_password_strength, validate_cnpj, format_cnpj, clean_cnpj
-from utils.security import hash_password, check_password, create_access_token
+from utils.security import hash_password, check_password, password_needs_rehash
+from utils.password_pool import PasswordPoolBusyError
+from services.date_service import DateService
+from services.identity_cache import IdentityCache
+from services.recaptcha_service import RecaptchaService, RecaptchaUnavailableError
+from services.throttle_service import LoginThrottle
+from services.token_service import TokenService, RefreshTokenReuseError
+from utils.security import jwt_required
+from flask_jwt_extended import get_jwt
 from utils.constants import Cargos
 from config import get_config
 from app import db
-import requests # Para verificar o reCAPTCHA
 import uuid
 
 # Carrega a configuração para chaves (reCAPTCHA, Dev Code)
@@ -31,16 +38,13 @@ def register():
     password = data.get('password')
     cnpj = data.get('cnpj')
     
-    # 2. Verificação do reCAPTCHA
-    recaptcha_secret = app_config.RECAPTCHA_SECRET_KEY
-    recaptcha_token = data.get('recaptcha_token')
-    response = requests.post(
-        'https://www.google.com/recaptcha/api/siteverify',
-        data={'secret': recaptcha_secret, 'response': recaptcha_token}
-    )
-    recaptcha_result = response.json()
-    if not recaptcha_result.get('success') or recaptcha_result.get('score', 0) < 0.5:
-        return jsonify({"error": "Falha na verificação do reCAPTCHA."}), 401
+    # 2. Verificação do reCAPTCHA (sessão com pool, timeout estrito e cache curto)
+    try:
+        if not RecaptchaService.verify(data.get('recaptcha_token'), request.remote_addr):
+            return jsonify({"error": "Falha na verificação do reCAPTCHA."}), 401
+    except RecaptchaUnavailableError as e:
+        print(f"reCAPTCHA indisponível: {e}")
+        return jsonify({"error": "Verificação do reCAPTCHA indisponível. Tente novamente."}), 503
 
     # 3. Validação de Regras de Negócio
     if not validate_email(email):
@@ -84,7 +88,7 @@ def register():
         if password == app_config.DEV_SECRET_CODE and "admin@zipbum" in email:
             role_level = Cargos.DEVELOPER
         
-        role = Role.query.filter_by(permission_level=role_level).first()
+        role = IdentityCache.get_role_by_level(role_level)
         if not role:
             return jsonify({"error": f"Cargo de nível {role_level} não encontrado no banco."}), 500
 
@@ -121,12 +125,26 @@ def login():
     if not email or not password:
         return jsonify({"error": "E-mail e senha são obrigatórios."}), 400
 
+    # Limitação por IP e por conta, ANTES de qualquer query ou bcrypt
+    # (a tentativa fica reservada como falha até a senha ser validada)
+    retry_after = LoginThrottle.acquire(request.remote_addr, email)
+    if retry_after:
+        response = jsonify({"error": "Muitas tentativas de login. Tente novamente mais tarde."})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+
     try:
         user = User.query.filter_by(email=email).first()
 
         # Verifica se o usuário existe E a senha está correta
         if not user or not user.check_password(password):
             return jsonify({"error": "Credenciais inválidas."}), 401
+        LoginThrottle.register_success(email)
+
+        # Se o custo do bcrypt mudou (BCRYPT_LOG_ROUNDS), refaz o hash com a senha já validada
+        if password_needs_rehash(user.password_hash):
+            user.set_password(password)
+            db.session.commit()
             
         # Verifica se o usuário está ativo (não bloqueado)
         if not user.is_active or user.is_blocked:
@@ -143,13 +161,44 @@ def login():
         # O token é criado usando o *objeto* 'user'
         # O callback @jwt.user_identity_loader (em security.py) usa o user.id
         # O callback @jwt.additional_claims_loader (em security.py) usa o user.role
-        access_token = create_access_token(identity=user)
+        # O refresh token permite renovar o access token sem novo bcrypt
+        access_token, refresh_token = TokenService.issue_tokens(user)
+        db.session.commit()
         
         return jsonify(
             access_token=access_token,
+            refresh_token=refresh_token,
             user=user.to_dict() # Envia os dados do usuário para o frontend
         ), 200
 
+    except PasswordPoolBusyError:
+        LoginThrottle.release(email)
+        return jsonify({"error": "Servidor ocupado. Tente novamente em instantes."}), 503
     except Exception as e:
         print(f"Erro no login: {e}")
+        return jsonify({"error": "Erro interno no servidor."}), 500
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Troca um refresh token válido por um novo par (access + refresh).
+    O refresh token usado é consumido (rotação); reapresentá-lo revoga a sessão.
+    Os claims vêm do cache de identidade: nenhuma senha é verificada.
+    """
+    claims = get_jwt()
+    snapshot = IdentityCache.get_user(claims['sub'])
+
+    if not snapshot or not snapshot.is_active:
+        return jsonify({"error": "Usuário não encontrado ou inativo."}), 401
+    if snapshot.is_blocked and (not snapshot.blocked_until or snapshot.blocked_until > DateService.get_now()):
+        return jsonify({"error": "Usuário bloqueado."}), 403
+
+    try:
+        access_token, refresh_token = TokenService.rotate(claims['jti'], snapshot, request.remote_addr)
+        return jsonify(access_token=access_token, refresh_token=refresh_token), 200
+    except RefreshTokenReuseError as e:
+        return jsonify({"error": str(e)}), 401
+    except Exception as e:
+        print(f"Erro ao renovar token: {e}")
         return jsonify({"error": "Erro interno no servidor."}), 500
\ No newline at end of file
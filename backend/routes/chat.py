@@ -7,6 +7,7 @@ from models.chats import Chat, Message
 from models.negotiations import Negotiation
 from services.ai_service import AIService
 from services.moderation_service import ModerationService
+from services.identity_cache import IdentityCache
 from services.date_service import DateService
 from utils.security import jwt_required, get_user_identity
 from utils.constants import SenderRoles, Cargos
@@ -64,11 +65,13 @@ def send_message():
 
     # 1. Verifica se o Chat existe e o usuário tem permissão
     chat = Chat.query.get(chat_id)
-    user = User.query.get(user_id)
+    user = IdentityCache.get_user(user_id) # Sem query num acerto do cache
     
     if not chat:
         return jsonify({"error": "Chat não encontrado."}), 404
-    if chat.user_id != user_id and user.role.permission_level > Cargos.HELPER_N3:
+    if not user:
+        return jsonify({"error": "Utilizador não encontrado."}), 404
+    if chat.user_id != user_id and user.role_level > Cargos.HELPER_N3:
          # Apenas o próprio usuário ou um admin/helper podem ver o chat
         return jsonify({"error": "Acesso negado a este chat."}), 403
 
@@ -77,8 +80,8 @@ def send_message():
     
     if is_blocked:
         # 2a. Se for bloqueado:
-        # Aplica a penalidade
-        ModerationService.apply_block(user, reason)
+        # Aplica a penalidade (precisa do objeto do ORM, não da fotografia do cache)
+        ModerationService.apply_block(User.query.get(user_id), reason)
         # Gera a mensagem de bloqueio
         block_message_content = ModerationService.get_block_message(reason)
         
@@ -154,11 +157,13 @@ def get_chat_history(chat_id):
     """
     user_id = get_user_identity()
     chat = Chat.query.get(chat_id)
-    user = User.query.get(user_id)
+    user = IdentityCache.get_user(user_id) # Sem query num acerto do cache
 
     if not chat:
         return jsonify({"error": "Chat não encontrado."}), 404
-    if chat.user_id != user_id and user.role.permission_level > Cargos.HELPER_N3:
+    if not user:
+        return jsonify({"error": "Utilizador não encontrado."}), 404
+    if chat.user_id != user_id and user.role_level > Cargos.HELPER_N3:
         return jsonify({"error": "Acesso negado a este chat."}), 403
         
     try:
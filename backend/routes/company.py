@@ -1,35 +1,89 @@
 # backend/routes/company.py
 
-from flask import request, jsonify
+from flask import request, jsonify, make_response
 from . import company_bp # Importa o Blueprint
-from models.users import User, Role
+from models.users import User
 from models.companies import Company
 from utils.security import jwt_required, get_user_identity
 from services.role_service import roles_required
+from services.identity_cache import IdentityCache
+from services.csv_service import CSVService
+from services.seller_onboarding_service import SellerOnboardingService
+from services.company_search_service import CompanySearchService
+from services.kpi_service import KpiService
+from services.reputation_service import ReputationService
 from utils.constants import Cargos
 from utils.validators import validate_email, validate_password_strength
+from utils.password_pool import PasswordPoolBusyError
+from utils.pagination import parse_limit, decode_cursor, apply_keyset, fetch_page, page_response
+from config import get_config
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql import func
 from app import db
+import datetime
+import hashlib
 import uuid
 
 # Apenas Representantes (Nível 4) podem gerir a equipa
 COMPANY_ADMIN_LEVELS = [Cargos.REPRESENTANTE]
 
+# Carrega a configuração (para UPLOAD_FOLDER)
+app_config = get_config()
+
 @company_bp.route('/team', methods=['GET'])
 @roles_required(COMPANY_ADMIN_LEVELS + [Cargos.VENDEDOR]) # Representante ou Vendedor
 def get_company_team():
     """
-    (Empresa) Retorna todos os utilizadores (Vendedores e Representantes)
-    associados à empresa do utilizador logado.
+    (Empresa) Retorna os utilizadores (Vendedores e Representantes)
+    associados à empresa do utilizador logado, paginados por cursor
+    (ordem alfabética).
+
+    Suporta GET condicional: o ETag/Last-Modified derivam do maior
+    updated_at da equipa (e do tamanho dela); se nada mudou, responde
+    304 sem carregar nem serializar os membros.
     """
     user_id = get_user_identity()
-    user = User.query.get(user_id)
+    user = IdentityCache.get_user(user_id) # Sem query num acerto do cache
     
     if not user or not user.company_id:
         return jsonify({"error": "Utilizador não está associado a uma empresa."}), 404
+
+    limit = parse_limit(request.args.get('limit'))
+    cursor_values = None
+    if request.args.get('cursor'):
+        cursor_values = decode_cursor(request.args.get('cursor'))
+        if not cursor_values or len(cursor_values) != 2:
+            return jsonify({"error": "Cursor inválido."}), 400
         
     try:
-        team_members = User.query.filter_by(company_id=user.company_id).all()
-        return jsonify([member.to_dict() for member in team_members]), 200
+        # Versão da equipa: (nº de membros, última alteração) numa só query agregada
+        member_count, last_modified = db.session.query(
+            func.count(User.id),
+            func.max(func.coalesce(User.updated_at, User.created_at))
+        ).filter(User.company_id == user.company_id).one()
+
+        version = f"{user.company_id}:{member_count}:{last_modified.isoformat() if last_modified else ''}"
+        page_key = f"{request.args.get('cursor', '')}:{limit}"
+        etag = hashlib.sha1(f"{version}:{page_key}".encode('utf-8')).hexdigest()
+
+        not_modified = request.if_none_match.contains(etag) if request.if_none_match else (
+            last_modified is not None and request.if_modified_since is not None
+            and last_modified.replace(microsecond=0) <= request.if_modified_since
+        )
+        if not_modified:
+            response = make_response('', 304)
+        else:
+            query = User.query.options(joinedload(User.role)).filter(User.company_id == user.company_id)
+            query = apply_keyset(query, User.full_name, User.id, cursor_values)
+            members, next_cursor = fetch_page(query, limit, lambda m: [m.full_name, m.id])
+            response = jsonify(page_response([member.to_dict() for member in members], next_cursor, limit))
+
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        # O navegador sempre revalida (e recebe 304 quando nada mudou)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
         
     except Exception as e:
         print(f"Erro ao buscar equipa: {e}")
@@ -42,7 +96,7 @@ def add_seller_to_team():
     (Representante) Adiciona um novo Vendedor (Nível 5) à sua empresa.
     """
     user_id = get_user_identity()
-    user = User.query.get(user_id) # Este é o Representante
+    user = IdentityCache.get_user(user_id) # Este é o Representante (do cache)
     
     if not user or not user.company_id:
         return jsonify({"error": "Apenas representantes de empresa podem adicionar vendedores."}), 403
@@ -62,7 +116,7 @@ def add_seller_to_team():
 
     try:
         # Busca o cargo "Vendedor" (Nível 5)
-        seller_role = Role.query.filter_by(permission_level=Cargos.VENDEDOR).first()
+        seller_role = IdentityCache.get_role_by_level(Cargos.VENDEDOR)
         if not seller_role:
             return jsonify({"error": "Cargo de Vendedor não encontrado no sistema."}), 500
             
@@ -86,4 +140,110 @@ def add_seller_to_team():
     except Exception as e:
         db.session.rollback()
         print(f"Erro ao adicionar vendedor: {e}")
-        return jsonify({"error": "Erro interno ao adicionar vendedor."}), 500
\ No newline at end of file
+        return jsonify({"error": "Erro interno ao adicionar vendedor."}), 500
+
+@company_bp.route('/sellers/bulk', methods=['POST'])
+@roles_required(COMPANY_ADMIN_LEVELS) # Apenas Representante pode adicionar
+def bulk_add_sellers():
+    """
+    (Representante) Cadastra vários Vendedores a partir de uma planilha
+    (CSV/XLSX) com as colunas nome, email e senha.
+    Retorna um relatório por linha (criado ou motivo do erro).
+    """
+    user = IdentityCache.get_user(get_user_identity())
+    if not user or not user.company_id:
+        return jsonify({"error": "Apenas representantes de empresa podem adicionar vendedores."}), 403
+
+    if 'file' not in request.files or request.files['file'].filename == '':
+        return jsonify({"error": "Nenhum arquivo enviado. (Verifique o 'name' do form-data)"}), 400
+    file = request.files['file']
+    if not CSVService.allowed_file(file.filename):
+        return jsonify({"error": "Extensão de arquivo não permitida (use .csv ou .xlsx)."}), 400
+
+    try:
+        # Lido direto do upload recebido (em memória ou no temporário do UploadSpool)
+        df, error = CSVService.read_dataframe(file.stream, ext=file.filename.rsplit('.', 1)[1].lower())
+        if error:
+            return jsonify({"error": error}), 400
+        if len(df) > SellerOnboardingService.MAX_ROWS:
+            return jsonify({"error": f"A planilha excede o limite de {SellerOnboardingService.MAX_ROWS} linhas."}), 400
+
+        df, error = SellerOnboardingService.normalize_columns(df)
+        if error:
+            return jsonify({"error": error}), 400
+
+        report = SellerOnboardingService.onboard(df, user.company_id, user.id, request.remote_addr)
+        return jsonify(report), 201 if report["created"] else 200
+
+    except PasswordPoolBusyError:
+        return jsonify({"error": "Servidor ocupado. Tente novamente em instantes."}), 503
+    except Exception as e:
+        print(f"Erro no cadastro em massa de vendedores: {e}")
+        return jsonify({"error": "Erro interno ao cadastrar vendedores."}), 500
+
+@company_bp.route('/autocomplete', methods=['GET'])
+@jwt_required()
+def autocomplete_companies():
+    """
+    Sugestões de empresas ativas pelo início da razão social, do nome
+    fantasia ou do CNPJ (ex: ?q=comer sil&limit=10). Sem distinção de
+    acentos e maiúsculas. A empresa do próprio utilizador é omitida.
+    """
+    query = (request.args.get('q') or '').strip()
+    if len(query) < 2:
+        return jsonify({"items": []}), 200
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), 20))
+    except ValueError:
+        limit = 10
+
+    user = IdentityCache.get_user(get_user_identity())
+    try:
+        items = CompanySearchService.search(query[:100], limit, exclude_id=user.company_id if user else None)
+        return jsonify({"items": items}), 200
+    except Exception as e:
+        print(f"Erro no autocomplete de empresas: {e}")
+        return jsonify({"error": "Erro interno ao buscar empresas."}), 500
+
+@company_bp.route('/kpis', methods=['GET'])
+@roles_required(COMPANY_ADMIN_LEVELS + [Cargos.VENDEDOR])
+def get_company_kpis():
+    """
+    (Empresa) Painel de negociações da empresa: abertas, fechadas, taxa de
+    sucesso, valor médio das propostas e tempo médio de resposta, por dia
+    (America/Sao_Paulo). Parâmetros: from/to (AAAA-MM-DD), padrão últimos 30 dias.
+    Lido do rollup company_daily_kpis (uma linha por dia).
+    """
+    user = IdentityCache.get_user(get_user_identity())
+    if not user or not user.company_id:
+        return jsonify({"error": "Utilizador não está associado a uma empresa."}), 404
+
+    try:
+        end = datetime.date.fromisoformat(request.args['to']) if request.args.get('to') else KpiService.local_day()
+        start = datetime.date.fromisoformat(request.args['from']) if request.args.get('from') \
+            else end - datetime.timedelta(days=29)
+    except ValueError:
+        return jsonify({"error": "Datas inválidas. Use o formato AAAA-MM-DD."}), 400
+    if start > end:
+        return jsonify({"error": "'from' deve ser anterior a 'to'."}), 400
+    if (end - start).days >= KpiService.MAX_RANGE_DAYS:
+        return jsonify({"error": f"Período máximo de {KpiService.MAX_RANGE_DAYS} dias."}), 400
+
+    try:
+        return jsonify(KpiService.get_dashboard(user.company_id, start, end)), 200
+    except Exception as e:
+        print(f"Erro ao buscar KPIs da empresa: {e}")
+        return jsonify({"error": "Erro interno ao buscar indicadores."}), 500
+
+@company_bp.route('/<string:company_id>/reputation', methods=['GET'])
+@jwt_required()
+def get_company_reputation(company_id):
+    """
+    Reputação de uma empresa: nº de avaliações, média geral, média recente
+    e histograma por estrelas. Leitura única pela chave primária.
+    """
+    try:
+        return jsonify(ReputationService.get_reputation(company_id)), 200
+    except Exception as e:
+        print(f"Erro ao buscar reputação da empresa: {e}")
+        return jsonify({"error": "Erro interno ao buscar reputação."}), 500
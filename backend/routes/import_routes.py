@@ -1,14 +1,20 @@
 # backend/routes/import_routes.py
 
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from . import import_bp # Importa o Blueprint
 from services.csv_service import CSVService
+from services.import_service import ImportService
+from services.import_job_service import ImportJobService
+from services.upload_cache_service import UploadCacheService
+from services.upload_store_service import UploadStoreService
+from services.identity_cache import IdentityCache
 from services.role_service import roles_required
+from models.imports import ImportBatch
+from utils.security import get_user_identity
 from utils.constants import Cargos
 from config import get_config
 from werkzeug.utils import secure_filename
 import os
-import uuid
 
 # Carrega a configuração (para UPLOAD_FOLDER)
 app_config = get_config()
@@ -36,49 +42,99 @@ def upload_spreadsheet():
         return jsonify({"error": "Extensão de arquivo não permitida (use .csv ou .xlsx)."}), 400
 
     try:
-        # 4. Salva o arquivo temporariamente com um nome seguro
-        
-        # Gera um nome de arquivo único para evitar conflitos
-        filename = secure_filename(file.filename)
-        unique_filename = f"{str(uuid.uuid4())}_{filename}"
-        
-        # Caminho completo para salvar
-        upload_folder = app_config.UPLOAD_FOLDER
-        if not os.path.exists(upload_folder):
-            os.makedirs(upload_folder) # Cria a pasta se não existir
-            
-        file_path = os.path.join(upload_folder, unique_filename)
-        
-        file.save(file_path)
+        # 4. Guarda o arquivo pelo hash do conteúdo (calculado enquanto o
+        # upload era recebido) e lê apenas o cabeçalho e a prévia.
+        # Uploads pequenos são lidos direto da memória; reenvios da mesma
+        # planilha reaproveitam o arquivo e a leitura já feita.
+        file_path_id, headers, preview, error = UploadStoreService.ingest(file.stream, file.filename, preview_rows=10)
 
-        # 5. Processa a planilha usando o CSVService
-        data, error = CSVService.read_spreadsheet(file_path)
-        
         if error:
-            # (Opcional) Remover o arquivo se a leitura falhar
-            os.remove(file_path)
             return jsonify({"error": error}), 400
-            
-        # 6. Extrai os cabeçalhos (nomes das colunas) da planilha
-        if not data:
-            os.remove(file_path)
-            return jsonify({"error": "Planilha está vazia."}), 400
-            
-        headers = list(data[0].keys())
-
-        # 7. Sucesso! Retorna os dados, cabeçalhos e o caminho do arquivo
+
+        # 5. Sucesso! Retorna os dados, cabeçalhos e o caminho do arquivo
         # O frontend usará 'file_path_id' (o nome do arquivo)
         # para enviar na próxima etapa (mapeamento).
         return jsonify({
             "message": "Arquivo lido com sucesso!",
-            "file_path_id": unique_filename, # ID para a próxima etapa
+            "file_path_id": file_path_id, # ID para a próxima etapa
             "headers": headers, # Colunas da planilha
-            "data_preview": data[:10] # Prévia dos 10 primeiros registros
+            "data_preview": preview # Prévia dos 10 primeiros registros
         }), 200
 
     except Exception as e:
         print(f"Erro no upload da planilha: {e}")
-        # Tenta remover o arquivo se der erro
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
-        return jsonify({"error": f"Erro interno no servidor: {e}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Erro interno no servidor: {e}"}), 500
+
+@import_bp.route('/process_mapping', methods=['POST'])
+@roles_required([Cargos.REPRESENTANTE, Cargos.VENDEDOR, Cargos.ADMIN_ZIPBUM])
+def process_mapping():
+    """
+    Etapa 2: valida o mapeamento de colunas e enfileira a importação
+    do arquivo enviado no upload (job processado em blocos).
+    Body: {"file_path_id": "...", "mapping": {"Coluna na Planilha": "campo_do_sistema"},
+           "replace_missing": false}
+    Com "replace_missing", a planilha substitui os itens da empresa: os que
+    não aparecem nela são removidos. Sem ele, só insere e atualiza.
+    Acompanhe o progresso em GET /api/import/jobs/<id>.
+    """
+    data = request.json or {}
+    file_path_id = data.get('file_path_id') or ''
+    mapping = data.get('mapping')
+    replace_missing = data.get('replace_missing') is True
+
+    # O ID é só o nome do arquivo em UPLOAD_FOLDER (sem caminhos)
+    if not file_path_id or secure_filename(file_path_id) != file_path_id:
+        return jsonify({"error": "file_path_id inválido."}), 400
+    file_path = os.path.join(app_config.UPLOAD_FOLDER, file_path_id)
+    if not UploadStoreService.exists(file_path):
+        return jsonify({"error": "Arquivo não encontrado. Faça o upload novamente."}), 404
+
+    user = IdentityCache.get_user(get_user_identity())
+    if not user:
+        return jsonify({"error": "Utilizador não encontrado."}), 404
+
+    try:
+        # Confere o mapeamento já na requisição (pelo esquema do cache, sem ler os dados)
+        if not isinstance(mapping, dict) or not mapping:
+            return jsonify({"error": "Nenhuma coluna mapeada."}), 400
+        columns = UploadCacheService.columns(file_path)
+        if columns is None:
+            columns, _, error = CSVService.read_preview(file_path, rows=1)
+            if error:
+                return jsonify({"error": error}), 400
+        error = ImportService.validate_mapping(columns, mapping)
+        if error:
+            return jsonify({"error": error}), 400
+
+        UploadStoreService.touch(file_path) # Upload em uso: adia a limpeza (TTL)
+        batch = ImportJobService.create_job(file_path_id, mapping, user.company_id, user.id,
+                                              request.remote_addr, replace_missing)
+        if current_app.config.get('IMPORT_INLINE_WORKER'):
+            ImportJobService.start_inline(current_app._get_current_object(), batch.id)
+        return jsonify(ImportJobService.progress(batch)), 202
+
+    except Exception as e:
+        print(f"Erro ao processar o mapeamento: {e}")
+        return jsonify({"error": "Erro interno ao importar a planilha."}), 500
+
+@import_bp.route('/jobs/<string:batch_id>', methods=['GET'])
+@roles_required([Cargos.REPRESENTANTE, Cargos.VENDEDOR, Cargos.ADMIN_ZIPBUM])
+def get_import_job(batch_id):
+    """
+    Progresso de uma importação: linhas processadas, importadas e
+    rejeitadas, percentual, estimativa de término e primeiros erros.
+    """
+    user = IdentityCache.get_user(get_user_identity())
+    if not user:
+        return jsonify({"error": "Utilizador não encontrado."}), 404
+
+    try:
+        batch = ImportBatch.query.get(batch_id)
+        # Só quem importou (ou um admin) vê o job
+        if not batch or (batch.user_id != user.id and user.role_level > Cargos.ADMIN_ZIPBUM):
+            return jsonify({"error": "Importação não encontrada."}), 404
+        return jsonify(ImportJobService.progress(batch)), 200
+
+    except Exception as e:
+        print(f"Erro ao buscar o job de importação: {e}")
+        return jsonify({"error": "Erro interno ao buscar a importação."}), 500
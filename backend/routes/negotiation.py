@@ -6,6 +6,7 @@ from models.users import User
 from models.negotiations import Negotiation, Proposal
 from utils.security import jwt_required, get_user_identity
 from utils.constants import StatusProposta
+from services.date_service import DateService
 from app import db
 import uuid
 import json
@@ -82,6 +83,7 @@ def action_on_proposal(proposal_id, action):
         else:
             return jsonify({"error": "Ação inválida. Use 'accept' ou 'reject'."}), 400
 
+        proposal.responded_at = DateService.get_now()
         db.session.commit()
         return jsonify({"message": message, "proposal_status": proposal.status}), 200
 
@@ -0,0 +1,257 @@
+# backend/services/company_search_service.py
+
+import bisect
+import datetime
+import re
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+from typing import Dict, List, Optional
+from sqlalchemy import event, or_
+from models.companies import Company
+from config import get_config
+from app import db
+
+# Carrega a configuração (orçamento de memória e sincronização)
+app_config = get_config()
+
+# Dados mínimos de cada empresa guardados no índice
+CompanyEntry = namedtuple('CompanyEntry', ['id', 'razao_social', 'nome_fantasia', 'cnpj', 'uf', 'is_active'])
+
+def fold(text: str) -> str:
+    """Remove acentos e caixa: 'Comércio São João' -> 'comercio sao joao'."""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+class CompanyPrefixIndex:
+    """
+    Índice de prefixos em memória para o autocomplete de empresas.
+
+    Cada palavra (sem acento, minúscula) da razão social e do nome fantasia,
+    e os dígitos do CNPJ, viram uma entrada (token, company_id) numa lista
+    ordenada. A busca por prefixo é um bisect + varredura do intervalo,
+    O(log n + k), sem acessar o banco.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._entries: List[tuple] = []  # (token, company_id), ordenada
+        self._companies: Dict[str, CompanyEntry] = {}
+        self._tokens: Dict[str, List[str]] = {}
+        self.ready = False
+        self.over_budget = False
+        self.synced_at = None  # datetime do último sincronismo com o banco
+
+    @staticmethod
+    def tokens_of(company: CompanyEntry) -> List[str]:
+        tokens = set(tokenize(company.razao_social)) | set(tokenize(company.nome_fantasia))
+        cnpj_digits = re.sub(r'[^0-9]', '', company.cnpj or '')
+        if cnpj_digits:
+            tokens.add(cnpj_digits)
+        return sorted(tokens)
+
+    def build(self, companies: List[CompanyEntry]):
+        """(Re)constrói o índice inteiro."""
+        entries, tokens_by_company = [], {}
+        for company in companies:
+            tokens = self.tokens_of(company)
+            tokens_by_company[company.id] = tokens
+            entries.extend((token, company.id) for token in tokens)
+            if len(entries) > self.max_entries:
+                with self._lock:
+                    self.over_budget = True
+                    self.ready = False
+                    self._entries, self._companies, self._tokens = [], {}, {}
+                print(f"[Autocomplete] Orçamento de memória excedido ({self.max_entries} entradas). Usando o banco.")
+                return
+        entries.sort()
+        with self._lock:
+            self._entries = entries
+            self._companies = {company.id: company for company in companies}
+            self._tokens = tokens_by_company
+            self.over_budget = False
+            self.ready = True
+
+    def upsert(self, company: CompanyEntry):
+        with self._lock:
+            self.remove(company.id)
+            tokens = self.tokens_of(company)
+            if len(self._entries) + len(tokens) > self.max_entries:
+                self.over_budget = True
+                self.ready = False
+                return
+            for token in tokens:
+                bisect.insort(self._entries, (token, company.id))
+            self._companies[company.id] = company
+            self._tokens[company.id] = tokens
+
+    def remove(self, company_id: str):
+        with self._lock:
+            for token in self._tokens.pop(company_id, []):
+                position = bisect.bisect_left(self._entries, (token, company_id))
+                if position < len(self._entries) and self._entries[position] == (token, company_id):
+                    del self._entries[position]
+            self._companies.pop(company_id, None)
+
+    def _ids_with_prefix(self, prefix: str, cap: int) -> set:
+        ids = set()
+        position = bisect.bisect_left(self._entries, (prefix,))
+        while position < len(self._entries) and len(ids) < cap:
+            token, company_id = self._entries[position]
+            if not token.startswith(prefix):
+                break
+            ids.add(company_id)
+            position += 1
+        return ids
+
+    def search(self, query: str, limit: int = 10, exclude_id: Optional[str] = None) -> List[CompanyEntry]:
+        """
+        Busca empresas ativas cujas palavras começam com TODOS os termos da consulta.
+        Ex: 'com sil' encontra 'Comercial Silva LTDA'.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Começa pelo termo mais longo (o mais seletivo)
+        terms.sort(key=len, reverse=True)
+        with self._lock:
+            candidates = self._ids_with_prefix(terms[0], cap=limit * 50)
+            results = []
+            for company_id in candidates:
+                company = self._companies.get(company_id)
+                if not company or not company.is_active or company_id == exclude_id:
+                    continue
+                tokens = self._tokens[company_id]
+                if all(any(token.startswith(term) for token in tokens) for term in terms[1:]):
+                    results.append(company)
+
+        first = fold(query).strip()
+        # Primeiro quem começa exatamente pela consulta, depois ordem alfabética
+        results.sort(key=lambda c: (not fold(c.razao_social).startswith(first), fold(c.razao_social)))
+        return results[:limit]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"ready": self.ready, "over_budget": self.over_budget,
+                    "companies": len(self._companies), "entries": len(self._entries),
+                    "max_entries": self.max_entries}
+
+class CompanySearchService:
+    """
+    Serviço do autocomplete de empresas (razão social, nome fantasia e CNPJ).
+
+    O índice é construído na primeira busca de cada processo, atualizado no
+    commit de inserts/updates de Company feitos por este processo e,
+    a cada COMPANY_INDEX_SYNC_INTERVAL segundos, sincronizado com as
+    alterações feitas por outros workers (created_at/updated_at recentes).
+    Se o orçamento de memória for excedido, a busca vai para o banco.
+    """
+
+    index = CompanyPrefixIndex(app_config.COMPANY_INDEX_MAX_ENTRIES)
+    _build_lock = threading.Lock()
+    _last_sync_check = 0.0
+
+    @staticmethod
+    def entry_of(company) -> CompanyEntry:
+        return CompanyEntry(company.id, company.razao_social, company.nome_fantasia,
+                            company.cnpj, company.uf, company.is_active)
+
+    @classmethod
+    def ensure_ready(cls):
+        """Constrói o índice (primeira chamada) ou sincroniza alterações de outros processos."""
+        index = cls.index
+        if index.over_budget:
+            return
+        if not index.ready:
+            with cls._build_lock:
+                if not index.ready and not index.over_budget:
+                    started = time.perf_counter()
+                    synced_at = db.session.query(db.func.clock_timestamp()).scalar()
+                    rows = db.session.query(Company.id, Company.razao_social, Company.nome_fantasia,
+                                            Company.cnpj, Company.uf, Company.is_active).all()
+                    index.build([CompanyEntry(*row) for row in rows])
+                    index.synced_at = synced_at
+                    cls._last_sync_check = time.monotonic()
+                    print(f"[Autocomplete] Índice construído: {len(rows)} empresas em "
+                          f"{(time.perf_counter() - started) * 1000:.0f} ms.")
+            return
+
+        if time.monotonic() - cls._last_sync_check >= app_config.COMPANY_INDEX_SYNC_INTERVAL:
+            with cls._build_lock:
+                cls._last_sync_check = time.monotonic()
+                # clock_timestamp(), não now() (início da transação). E relê uma
+                # margem antes da última sincronização: updated_at vem do now()
+                # de quem gravou, então uma transação iniciada antes dela e
+                # confirmada depois tem updated_at "no passado". Reaplicar uma
+                # empresa no índice é inofensivo (upsert)
+                synced_at = db.session.query(db.func.clock_timestamp()).scalar()
+                since = index.synced_at - datetime.timedelta(seconds=app_config.COMPANY_INDEX_SYNC_OVERLAP)
+                changed = Company.query.filter(or_(Company.created_at >= since,
+                                                   Company.updated_at >= since)).all()
+                for company in changed:
+                    index.upsert(cls.entry_of(company))
+                index.synced_at = synced_at
+
+    @classmethod
+    def search(cls, query: str, limit: int = 10, exclude_id: Optional[str] = None) -> List[Dict]:
+        cls.ensure_ready()
+        if cls.index.ready:
+            companies = cls.index.search(query, limit, exclude_id)
+        else:
+            companies = cls._search_db(query, limit, exclude_id)
+        return [{
+            'id': c.id,
+            'razao_social': c.razao_social,
+            'nome_fantasia': c.nome_fantasia,
+            'cnpj': c.cnpj,
+            'uf': c.uf
+        } for c in companies]
+
+    @staticmethod
+    def _search_db(query: str, limit: int, exclude_id: Optional[str]) -> List[CompanyEntry]:
+        """Alternativa sem índice em memória (prefixo da razão social ou do CNPJ)."""
+        term = query.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        digits = re.sub(r'[^0-9]', '', query)
+        conditions = [Company.razao_social.ilike(f"{term}%", escape='\\')]
+        if digits:
+            conditions.append(db.func.regexp_replace(Company.cnpj, '[^0-9]', '', 'g').like(f"{digits}%"))
+        q = Company.query.filter(Company.is_active.is_(True), or_(*conditions))
+        if exclude_id:
+            q = q.filter(Company.id != exclude_id)
+        return [CompanySearchService.entry_of(c) for c in q.order_by(Company.razao_social).limit(limit)]
+
+# --- Atualização do índice no commit (eventos da sessão) ---
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed_companies(session, flush_context):
+    pending = session.info.setdefault('company_index_pending', {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Company):
+            pending[obj.id] = CompanySearchService.entry_of(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Company):
+            pending[obj.id] = None
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_changed_companies(session):
+    pending = session.info.pop('company_index_pending', None)
+    if not pending or not CompanySearchService.index.ready:
+        return
+    for company_id, entry in pending.items():
+        if entry is None:
+            CompanySearchService.index.remove(company_id)
+        else:
+            CompanySearchService.index.upsert(entry)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changed_companies(session):
+    session.info.pop('company_index_pending', None)
@@ -0,0 +1,310 @@
+# backend/services/counter_service.py
+
+import datetime
+from typing import Dict, Iterable, Optional
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
+from models.counters import PlatformCounter
+from models.companies import Company
+from models.users import User
+from models.negotiations import Negotiation
+from models.reports import Report
+from models.chats import Message
+from services.date_service import DateService
+from services.identity_cache import IdentityCache
+from utils.constants import StatusNegociacao, StatusDenuncia
+from app import db
+
+class CounterService:
+    """
+    Serviço para os contadores mantidos da plataforma (tabela platform_counters).
+
+    Os contadores são atualizados na MESMA transação que altera a linha de origem
+    (via eventos do ORM), então um rollback desfaz também o contador.
+    Atenção: UPDATE/INSERT em massa (fora do ORM) não disparam os eventos e
+    devem chamar CounterService.increment manualmente.
+    """
+
+    # Nomes dos contadores de empresas
+    COMPANIES_TOTAL = 'companies.total'
+    COMPANIES_ACTIVE = 'companies.active'
+
+    # Demais contadores do painel Admin
+    USERS_TOTAL = 'users.total'
+    NEGOTIATIONS_OPEN = 'negotiations.open'
+    REPORTS_PENDING = 'reports.pending'
+
+    # Prefixos de todos os contadores mantidos (usado na reconciliação)
+    MANAGED_PREFIXES = ('companies.', 'users.', 'negotiations.', 'reports.', 'messages.')
+
+    @staticmethod
+    def user_role_key(role_id: int) -> str:
+        """Nome do contador de utilizadores por cargo (pelo ID do cargo)."""
+        return f"users.role.{role_id}"
+
+    @staticmethod
+    def messages_day_key(day) -> str:
+        """Nome do contador de mensagens de um dia (fuso America/Sao_Paulo)."""
+        return f"messages.day.{day.isoformat()}"
+
+    @staticmethod
+    def company_uf_key(uf: str, active: bool = False) -> str:
+        """Nome do contador de empresas por UF (opcionalmente só as ativas)."""
+        key = f"companies.uf.{(uf or '').upper()}"
+        return f"{key}.active" if active else key
+
+    @staticmethod
+    def increment(connection, deltas: Dict[str, int]):
+        """
+        Aplica incrementos (ou decrementos) aos contadores com um único UPSERT.
+        'connection' é a conexão da transação corrente (ex: a recebida nos eventos do ORM).
+        """
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        table = PlatformCounter.__table__
+        stmt = pg_insert(table).values([{'name': name, 'value': delta} for name, delta in sorted(deltas.items())])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={'value': table.c.value + stmt.excluded.value, 'updated_at': func.now()}
+        )
+        connection.execute(stmt)
+
+    @staticmethod
+    def get_counters(names: Iterable[str]) -> Dict[str, int]:
+        """Lê vários contadores pela chave primária. Contadores inexistentes valem 0."""
+        names = list(names)
+        rows = db.session.query(PlatformCounter.name, PlatformCounter.value) \
+            .filter(PlatformCounter.name.in_(names)).all()
+        values = {name: 0 for name in names}
+        values.update({name: value for name, value in rows})
+        return values
+
+    @staticmethod
+    def count_companies(uf: Optional[str] = None, is_active: Optional[bool] = None) -> int:
+        """
+        Total de empresas para os filtros suportados pelos contadores (UF e/ou ativo).
+        """
+        if uf:
+            total_key = CounterService.company_uf_key(uf)
+            active_key = CounterService.company_uf_key(uf, active=True)
+        else:
+            total_key = CounterService.COMPANIES_TOTAL
+            active_key = CounterService.COMPANIES_ACTIVE
+
+        counters = CounterService.get_counters([total_key, active_key])
+        if is_active is None:
+            return counters[total_key]
+        if is_active:
+            return counters[active_key]
+        return counters[total_key] - counters[active_key]
+
+    @staticmethod
+    def get_dashboard_stats() -> Dict:
+        """
+        Números do painel Admin, lidos dos contadores com um único SELECT
+        (mais a tabela de cargos, que tem 8 linhas).
+        """
+        roles = IdentityCache.get_roles()
+        today_key = CounterService.messages_day_key(DateService.get_now().date())
+
+        names = [
+            CounterService.USERS_TOTAL,
+            CounterService.COMPANIES_TOTAL,
+            CounterService.COMPANIES_ACTIVE,
+            CounterService.NEGOTIATIONS_OPEN,
+            CounterService.REPORTS_PENDING,
+            today_key
+        ] + [CounterService.user_role_key(role.id) for role in roles]
+        counters = CounterService.get_counters(names)
+
+        return {
+            "users_total": counters[CounterService.USERS_TOTAL],
+            "users_by_role": [{
+                "role": role.name,
+                "role_level": role.permission_level,
+                "count": counters[CounterService.user_role_key(role.id)]
+            } for role in roles],
+            "companies_total": counters[CounterService.COMPANIES_TOTAL],
+            "companies_active": counters[CounterService.COMPANIES_ACTIVE],
+            "negotiations_open": counters[CounterService.NEGOTIATIONS_OPEN],
+            "reports_pending": counters[CounterService.REPORTS_PENDING],
+            "messages_today": counters[today_key]
+        }
+
+    @staticmethod
+    def reconcile(message_days: int = 7) -> int:
+        """
+        Recalcula todos os contadores a partir das tabelas de origem e
+        substitui os valores atuais. Usado pelo comando 'flask reconcile_counters'.
+
+        A tabela de contadores fica bloqueada (EXCLUSIVE) até o commit, então
+        os incrementos concorrentes esperam e são aplicados por cima do valor
+        reconciliado. Mensagens são recontadas apenas nos últimos 'message_days' dias.
+        Retorna o número de contadores gravados.
+        """
+        try:
+            db.session.execute(db.text("LOCK TABLE platform_counters IN EXCLUSIVE MODE"))
+
+            values = {}
+
+            # Empresas (total, ativas, por UF)
+            company_rows = db.session.query(Company.uf, Company.is_active, func.count()) \
+                .group_by(Company.uf, Company.is_active).all()
+            for uf, is_active, total in company_rows:
+                for name, delta in CounterService.company_deltas(uf, is_active, total).items():
+                    values[name] = values.get(name, 0) + delta
+
+            # Utilizadores (total e por cargo)
+            values[CounterService.USERS_TOTAL] = 0
+            for role_id, total in db.session.query(User.role_id, func.count()).group_by(User.role_id).all():
+                values[CounterService.user_role_key(role_id)] = total
+                values[CounterService.USERS_TOTAL] += total
+
+            # Negociações abertas e denúncias pendentes
+            values[CounterService.NEGOTIATIONS_OPEN] = db.session.query(func.count(Negotiation.id)) \
+                .filter(Negotiation.status == StatusNegociacao.ATIVA).scalar()
+            values[CounterService.REPORTS_PENDING] = db.session.query(func.count(Report.id)) \
+                .filter(Report.status == StatusDenuncia.PENDENTE).scalar()
+
+            # Mensagens por dia (fuso local), só na janela recente. A janela
+            # começa à meia-noite local do dia mais antigo: esse dia é
+            # substituído abaixo e precisa ser recontado inteiro
+            today = DateService.get_now().date()
+            first_day = today - datetime.timedelta(days=message_days)
+            since = datetime.datetime.combine(first_day, datetime.time.min, tzinfo=DateService.TIMEZONE)
+            local_day = func.date(func.timezone(DateService.TIMEZONE_STR, Message.created_at))
+            message_rows = db.session.query(local_day, func.count()) \
+                .filter(Message.created_at >= since).group_by(local_day).all()
+            for day, total in message_rows:
+                values[CounterService.messages_day_key(day)] = total
+
+            # Substitui os contadores (preserva dias de mensagens fora da janela)
+            managed = or_(*[PlatformCounter.name.startswith(prefix)
+                               for prefix in CounterService.MANAGED_PREFIXES if prefix != 'messages.'])
+            db.session.query(PlatformCounter).filter(managed).delete(synchronize_session=False)
+            db.session.query(PlatformCounter).filter(PlatformCounter.name.in_(
+                [CounterService.messages_day_key(today - datetime.timedelta(days=offset))
+                 for offset in range(message_days + 1)]
+            )).delete(synchronize_session=False)
+
+            db.session.bulk_insert_mappings(PlatformCounter, [
+                {'name': name, 'value': value} for name, value in values.items()
+            ])
+            db.session.commit()
+            return len(values)
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def company_deltas(uf: str, is_active: bool, sign: int) -> Dict[str, int]:
+        """Incrementos que uma empresa (uf, ativo) representa nos contadores."""
+        deltas = {
+            CounterService.COMPANIES_TOTAL: sign,
+            CounterService.company_uf_key(uf): sign
+        }
+        if is_active:
+            deltas[CounterService.COMPANIES_ACTIVE] = sign
+            deltas[CounterService.company_uf_key(uf, active=True)] = sign
+        return deltas
+
+# --- Eventos do ORM (registrados na importação deste módulo, feita no app.py) ---
+
+def _merge(*deltas: Dict[str, int]) -> Dict[str, int]:
+    merged = {}
+    for delta in deltas:
+        for name, value in delta.items():
+            merged[name] = merged.get(name, 0) + value
+    return merged
+
+def _old_value(target, attr: str):
+    """Valor anterior de um atributo alterado no flush corrente."""
+    history = inspect(target).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, attr)
+
+@event.listens_for(Company, 'after_insert')
+def _company_inserted(mapper, connection, target):
+    is_active = target.is_active if target.is_active is not None else True
+    CounterService.increment(connection, CounterService.company_deltas(target.uf, is_active, +1))
+
+@event.listens_for(Company, 'after_update')
+def _company_updated(mapper, connection, target):
+    state = inspect(target)
+    if not (state.attrs.uf.history.has_changes() or state.attrs.is_active.history.has_changes()):
+        return
+    old = CounterService.company_deltas(_old_value(target, 'uf'), _old_value(target, 'is_active'), -1)
+    new = CounterService.company_deltas(target.uf, target.is_active, +1)
+    CounterService.increment(connection, _merge(old, new))
+
+@event.listens_for(Company, 'after_delete')
+def _company_deleted(mapper, connection, target):
+    CounterService.increment(connection, CounterService.company_deltas(target.uf, target.is_active, -1))
+
+@event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    CounterService.increment(connection, {
+        CounterService.USERS_TOTAL: +1,
+        CounterService.user_role_key(target.role_id): +1
+    })
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    if not inspect(target).attrs.role_id.history.has_changes():
+        return
+    CounterService.increment(connection, {
+        CounterService.user_role_key(_old_value(target, 'role_id')): -1,
+        CounterService.user_role_key(target.role_id): +1
+    })
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    CounterService.increment(connection, {
+        CounterService.USERS_TOTAL: -1,
+        CounterService.user_role_key(target.role_id): -1
+    })
+
+def _status_listeners(model, counter_name: str, counted_status: str):
+    """
+    Registra os eventos de um contador do tipo "linhas com status X"
+    (ex: negociações 'active', denúncias 'pending').
+    """
+    def is_counted(status):
+        # O default da coluna é aplicado no flush; None significa o default
+        return (status if status is not None else counted_status) == counted_status
+
+    @event.listens_for(model, 'after_insert')
+    def _inserted(mapper, connection, target):
+        if is_counted(target.status):
+            CounterService.increment(connection, {counter_name: +1})
+
+    @event.listens_for(model, 'after_update')
+    def _updated(mapper, connection, target):
+        if not inspect(target).attrs.status.history.has_changes():
+            return
+        delta = int(is_counted(target.status)) - int(is_counted(_old_value(target, 'status')))
+        CounterService.increment(connection, {counter_name: delta})
+
+    @event.listens_for(model, 'after_delete')
+    def _deleted(mapper, connection, target):
+        if is_counted(target.status):
+            CounterService.increment(connection, {counter_name: -1})
+
+_status_listeners(Negotiation, CounterService.NEGOTIATIONS_OPEN, StatusNegociacao.ATIVA)
+_status_listeners(Report, CounterService.REPORTS_PENDING, StatusDenuncia.PENDENTE)
+
+@event.listens_for(Message, 'after_insert')
+def _message_inserted(mapper, connection, target):
+    # created_at é preenchido pelo banco (now()); o dia local de "agora" é equivalente
+    day = DateService.get_now().date()
+    CounterService.increment(connection, {CounterService.messages_day_key(day): +1})
+
+@event.listens_for(Message, 'after_delete')
+def _message_deleted(mapper, connection, target):
+    created_at = inspect(target).dict.get('created_at')
+    if created_at is not None:
+        day = created_at.astimezone(DateService.TIMEZONE).date()
+        CounterService.increment(connection, {CounterService.messages_day_key(day): -1})
@@ -1,13 +1,28 @@
 # backend/services/csv_service.py
 
 import pandas as pd
+import codecs
+import csv
+import datetime
 import os
-from typing import List, Dict, Tuple
+from typing import BinaryIO, Iterator, List, Dict, Optional, Tuple, Union
 from config import get_config
 
 # Carrega a configuração para obter a pasta de UPLOAD
 app_config = get_config()
 
+# Bytes lidos do início do CSV para detectar codificação e separador
+SNIFF_BYTES = 64 * 1024
+# Separadores aceitos (na ordem de preferência em caso de empate)
+CSV_DELIMITERS = ';,\t|'
+# Linhas lidas por vez na leitura em blocos
+CSV_CHUNK_ROWS = 50000
+# Linhas por lote na leitura em streaming do XLSX
+XLSX_CHUNK_ROWS = 10000
+
+# Origem de uma planilha: caminho do arquivo ou buffer binário já em memória
+Source = Union[str, BinaryIO]
+
 class CSVService:
     """
     Serviço para processar (ler e validar) arquivos CSV e XLSX.
@@ -26,49 +41,263 @@ class CSVService:
         Lê um arquivo (CSV ou XLSX) e o converte para uma lista de dicionários.
         Retorna (dados, erro)
         """
-        if not os.path.exists(file_path):
+        df, error = CSVService.read_dataframe(file_path)
+        if error:
+            return None, error
+
+        # Converte o DataFrame do Pandas para o formato JSON (lista de dicts)
+        return df.to_dict('records'), None
+
+    @staticmethod
+    def read_dataframe(file_path: Source, nrows: Optional[int] = None,
+                       ext: Optional[str] = None) -> Tuple[pd.DataFrame, str]:
+        """
+        Lê um arquivo (CSV ou XLSX) e o retorna como DataFrame de strings
+        (para processamento vetorizado, sem passar por lista de dicts).
+        Com 'nrows', lê apenas as primeiras linhas (modo prévia).
+        'file_path' também pode ser um buffer binário (upload ainda em memória),
+        com a extensão informada em 'ext'.
+        Retorna (DataFrame, erro)
+        """
+        if isinstance(file_path, str) and not os.path.exists(file_path):
             return None, "Arquivo não encontrado no servidor."
             
         try:
             # Identifica a extensão
-            ext = file_path.rsplit('.', 1)[1].lower()
+            if ext is None:
+                ext = file_path.rsplit('.', 1)[1].lower()
             
             if ext == 'csv':
-                # Tenta detectar o separador (;, ou \t)
-                try:
-                    df = pd.read_csv(file_path, sep=None, engine='python', encoding='utf-8-sig')
-                except Exception:
-                     # Fallback para latin1 se utf-8 falhar
-                    df = pd.read_csv(file_path, sep=None, engine='python', encoding='latin1')
+                df = CSVService._read_csv(file_path, nrows=nrows)
 
             elif ext == 'xlsx':
-                df = pd.read_excel(file_path, engine='openpyxl')
+                # Streaming (modo somente leitura): para após 'nrows' linhas
+                chunks = list(CSVService.iter_xlsx_chunks(file_path, max_rows=nrows))
+                if not chunks:
+                    return None, "A planilha está vazia ou em formato incorreto."
+                df = pd.concat(chunks) if len(chunks) > 1 else chunks[0]
                 
             else:
                 return None, "Formato de arquivo não suportado."
 
             # Limpeza: Remove linhas completamente vazias
-            df.dropna(how='all', inplace=True)
+            df = CSVService.drop_empty_rows(df)
             
-            # Limpeza: Converte colunas para tipos 'str' para evitar
-            # problemas de formatação (ex: 5.0 -> "5")
-            df = df.astype(str)
-            
-            # Limpeza: Substitui 'NaN' (Not a Number) por strings vazias
-            df.fillna('', inplace=True)
-            
-            # Converte o DataFrame do Pandas para o formato JSON (lista de dicts)
-            data = df.to_dict('records')
-            
-            if not data:
+            if df.empty:
                 return None, "A planilha está vazia ou em formato incorreto."
 
-            return data, None
+            return df, None
 
         except Exception as e:
             print(f"Erro ao ler planilha: {e}")
             return None, f"Erro ao processar o arquivo: {e}"
 
+    @staticmethod
+    def read_preview(file_path: Source, rows: int = 10,
+                     ext: Optional[str] = None) -> Tuple[List[str], List[Dict], str]:
+        """
+        Lê só o cabeçalho e as primeiras 'rows' linhas (usado no upload).
+        Retorna (cabeçalhos, prévia, erro)
+        """
+        df, error = CSVService.read_dataframe(file_path, nrows=rows, ext=ext)
+        if error:
+            return None, None, error
+        return list(df.columns), df.to_dict('records'), None
+
+    @staticmethod
+    def drop_empty_rows(df: pd.DataFrame) -> pd.DataFrame:
+        """Remove as linhas em que todas as células estão vazias (DataFrame de strings)."""
+        if df.empty:
+            return df
+        non_empty = (df != '').any(axis=1)
+        return df if non_empty.all() else df[non_empty]
+
+    @staticmethod
+    def _rewind(source: Source) -> Source:
+        """Buffers em memória são relidos do início a cada leitura."""
+        if not isinstance(source, str):
+            source.seek(0)
+        return source
+
+    # --- CSV ---
+
+    @staticmethod
+    def sniff_csv(file_path: Source) -> Tuple[str, str]:
+        """
+        Detecta a codificação e o separador olhando só o início do arquivo.
+        Retorna (encoding, separador).
+        """
+        if isinstance(file_path, str):
+            with open(file_path, 'rb') as f:
+                sample = f.read(SNIFF_BYTES)
+        else:
+            sample = CSVService._rewind(file_path).read(SNIFF_BYTES)
+
+        # O decoder incremental tolera um caractere cortado no fim da amostra
+        try:
+            text = codecs.getincrementaldecoder('utf-8-sig')().decode(sample, final=False)
+            encoding = 'utf-8-sig'
+        except UnicodeDecodeError:
+            text = sample.decode('latin1')
+            encoding = 'latin1'
+
+        lines = text.splitlines()
+        if len(sample) == SNIFF_BYTES and len(lines) > 1:
+            lines = lines[:-1] # A última linha da amostra pode estar incompleta
+        sample_text = '\n'.join(lines[:50])
+        try:
+            delimiter = csv.Sniffer().sniff(sample_text, delimiters=CSV_DELIMITERS).delimiter
+        except csv.Error:
+            # Sem padrão claro: o separador mais frequente no cabeçalho
+            header = lines[0] if lines else ''
+            delimiter = max(CSV_DELIMITERS, key=header.count) if header else ','
+        return encoding, delimiter
+
+    @staticmethod
+    def _csv_options(file_path: Source) -> Dict:
+        encoding, delimiter = CSVService.sniff_csv(file_path)
+        return {
+            'sep': delimiter,
+            'encoding': encoding,
+            'engine': 'c',
+            # Tudo como texto, sem conversão para NaN (dispensa fillna/astype)
+            'dtype': str,
+            'keep_default_na': False,
+            'na_filter': False,
+            'skip_blank_lines': True
+        }
+
+    @staticmethod
+    def _read_csv(file_path: Source, nrows: Optional[int] = None) -> pd.DataFrame:
+        options = CSVService._csv_options(file_path)
+        try:
+            return pd.read_csv(CSVService._rewind(file_path), nrows=nrows, **options)
+        except UnicodeDecodeError:
+            # Início em UTF-8 válido, mas algum byte depois não: relê em latin1
+            options['encoding'] = 'latin1'
+            return pd.read_csv(CSVService._rewind(file_path), nrows=nrows, **options)
+
+    @staticmethod
+    def iter_csv_chunks(file_path: Source, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Lê um CSV em blocos de 'chunk_rows' linhas (DataFrames de strings),
+        com a memória limitada pelo tamanho do bloco.
+        """
+        options = CSVService._csv_options(file_path)
+        done = 0 # Linhas já entregues (o índice dos blocos é a posição no arquivo)
+        while True:
+            try:
+                for chunk in pd.read_csv(CSVService._rewind(file_path), chunksize=chunk_rows, **options):
+                    if chunk.index[-1] < done:
+                        continue # Já entregue antes de reler em latin1
+                    done = chunk.index[-1] + 1
+                    yield CSVService.drop_empty_rows(chunk)
+                return
+            except UnicodeDecodeError:
+                # Início em UTF-8 válido, mas algum byte depois (em qualquer
+                # bloco) não: relê em latin1 e continua de onde parou
+                if options['encoding'] == 'latin1':
+                    raise
+                options['encoding'] = 'latin1'
+
+    # --- XLSX ---
+
+    @staticmethod
+    def _cell_to_str(value) -> str:
+        """Converte o valor de uma célula do openpyxl em texto (como nas colunas do CSV)."""
+        if value is None:
+            return ''
+        value_type = type(value)
+        if value_type is str:
+            return value
+        if value_type is float:
+            return str(int(value)) if value.is_integer() else repr(value)
+        if value_type is datetime.datetime:
+            if value.hour == value.minute == value.second == value.microsecond == 0:
+                return value.strftime('%Y-%m-%d')
+            return value.isoformat(sep=' ')
+        return str(value)
+
+    @staticmethod
+    def _header_names(values) -> List[str]:
+        """Nomes das colunas: vazias viram 'Unnamed: i' e repetidas 'nome.1' (como no pandas)."""
+        names, seen = [], {}
+        for i, value in enumerate(values):
+            name = CSVService._cell_to_str(value).strip() or f"Unnamed: {i}"
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            names.append(name)
+        # Remove colunas vazias sobrando à direita
+        while names and names[-1].startswith('Unnamed: ') and len(names) > 1:
+            names.pop()
+        return names
+
+    @staticmethod
+    def iter_xlsx_chunks(file_path: Source, chunk_rows: int = XLSX_CHUNK_ROWS,
+                         max_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Lê a primeira aba de um XLSX em lotes de 'chunk_rows' linhas (DataFrames
+        de strings) com o openpyxl em modo somente leitura: as linhas são lidas
+        do XML sob demanda, sem carregar a pasta de trabalho inteira na memória.
+        Com 'max_rows', para assim que ler essa quantidade de linhas.
+        """
+        from openpyxl import load_workbook
+
+        # data_only: valores calculados em vez das fórmulas
+        workbook = load_workbook(CSVService._rewind(file_path), read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            # Algumas ferramentas gravam a dimensão da aba errada; ignora e lê tudo
+            sheet.reset_dimensions()
+            rows = sheet.iter_rows(values_only=True)
+
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = CSVService._header_names(header)
+            width = len(columns)
+            to_str = CSVService._cell_to_str
+
+            batch, total = [], 0
+            for row in rows:
+                values = [to_str(value) for value in row[:width]]
+                if len(values) < width:
+                    values.extend([''] * (width - len(values)))
+                batch.append(values)
+                total += 1
+                if max_rows is not None and total >= max_rows:
+                    break
+                if len(batch) >= chunk_rows:
+                    yield CSVService._xlsx_chunk(batch, columns, total)
+                    batch = []
+            if batch or total == 0:
+                yield CSVService._xlsx_chunk(batch, columns, total)
+        finally:
+            # No modo somente leitura o arquivo fica aberto até o close()
+            workbook.close()
+
+    @staticmethod
+    def _xlsx_chunk(batch: List[List[str]], columns: List[str], total: int) -> pd.DataFrame:
+        """Lote de linhas com o índice contínuo entre lotes (posição da linha na aba)."""
+        start = total - len(batch)
+        df = pd.DataFrame(batch, columns=columns, index=pd.RangeIndex(start, total))
+        return CSVService.drop_empty_rows(df)
+
+    @staticmethod
+    def iter_chunks(file_path: Source, chunk_rows: int = CSV_CHUNK_ROWS,
+                    ext: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Lê um CSV ou XLSX em blocos de DataFrames de strings. O índice segue
+        a posição da linha no arquivo inteiro (como no read_dataframe).
+        """
+        ext = ext or file_path.rsplit('.', 1)[-1].lower()
+        if ext == 'xlsx':
+            return CSVService.iter_xlsx_chunks(file_path, chunk_rows=min(chunk_rows, XLSX_CHUNK_ROWS))
+        return CSVService.iter_csv_chunks(file_path, chunk_rows=chunk_rows)
+
     @staticmethod
     def map_columns(data: List[Dict], mapping: Dict) -> Tuple[List[Dict], str]:
         """
@@ -0,0 +1,124 @@
+# backend/services/export_service.py
+
+import csv
+import datetime
+import io
+import json
+import zlib
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import select
+from models.users import User, Role
+from models.companies import Company
+from models.chats import Message
+from app import db
+
+class ExportService:
+    """
+    Serviço de exportação de dados (NDJSON ou CSV) para o Admin.
+
+    As linhas são lidas com um cursor do lado do servidor (yield_per) e
+    escritas em blocos, então a memória usada não depende do tamanho da tabela.
+    """
+
+    FORMATS = ('ndjson', 'csv')
+
+    # Linhas buscadas por vez no cursor do servidor
+    YIELD_PER = 2000
+
+    @staticmethod
+    def _statements() -> Dict:
+        """SELECTs (apenas colunas, sem objetos do ORM) de cada entidade exportável."""
+        return {
+            'users': select(
+                User.id, User.full_name, User.email, User.company_id,
+                Role.name.label('role'), Role.permission_level.label('role_level'),
+                User.is_active, User.is_blocked, User.blocked_until, User.created_at
+            ).join(Role, User.role_id == Role.id).order_by(User.created_at, User.id),
+
+            'companies': select(
+                Company.id, Company.cnpj, Company.razao_social, Company.nome_fantasia,
+                Company.uf, Company.cidade, Company.is_active, Company.created_at
+            ).order_by(Company.created_at, Company.id),
+
+            'messages': select(
+                Message.id, Message.chat_id, Message.sender_role, Message.content,
+                Message.is_moderated, Message.moderation_reason, Message.created_at
+            ).order_by(Message.created_at, Message.id),
+        }
+
+    @staticmethod
+    def entities() -> List[str]:
+        return list(ExportService._statements().keys())
+
+    @staticmethod
+    def build_statement(entity: str, created_from: Optional[datetime.datetime] = None,
+                        created_to: Optional[datetime.datetime] = None):
+        """Monta o SELECT da entidade, com o filtro opcional por data de criação."""
+        stmt = ExportService._statements()[entity]
+        created_at = stmt.selected_columns.created_at
+        if created_from:
+            stmt = stmt.where(created_at >= created_from)
+        if created_to:
+            stmt = stmt.where(created_at < created_to)
+        return stmt
+
+    @staticmethod
+    def _serialize(value):
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def stream_rows(stmt) -> Iterator[List]:
+        """
+        Gera as linhas em partições de YIELD_PER, numa conexão própria
+        com cursor do lado do servidor (não materializa o resultado).
+        O primeiro item gerado é a lista de nomes das colunas.
+        """
+        with db.engine.connect() as connection:
+            result = connection.execution_options(yield_per=ExportService.YIELD_PER).execute(stmt)
+            yield list(result.keys())
+            for partition in result.partitions():
+                yield partition
+
+    @staticmethod
+    def generate(stmt, fmt: str, compress: bool = False) -> Iterator[bytes]:
+        """
+        Converte as linhas em blocos de bytes NDJSON ou CSV
+        (um bloco por partição), opcionalmente comprimidos com gzip.
+        """
+        rows = ExportService.stream_rows(stmt)
+        columns = next(rows)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # 31 = formato gzip
+
+        def emit(chunk: str) -> bytes:
+            data = chunk.encode('utf-8')
+            return compressor.compress(data) if compressor else data
+
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for partition in rows:
+                writer.writerows([[ExportService._serialize(v) for v in row] for row in partition])
+                chunk = emit(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate(0)
+                if chunk:
+                    yield chunk
+            header_only = buffer.getvalue()
+            if header_only:
+                yield emit(header_only)
+        else:
+            for partition in rows:
+                lines = [
+                    json.dumps({col: ExportService._serialize(v) for col, v in zip(columns, row)},
+                               ensure_ascii=False)
+                    for row in partition
+                ]
+                chunk = emit('\n'.join(lines) + '\n')
+                if chunk:
+                    yield chunk
+
+        if compressor:
+            yield compressor.flush()
@@ -0,0 +1,91 @@
+# backend/services/fingerprint_service.py
+
+from typing import Iterable, List, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete
+from models.imports import ImportFingerprint
+from app import db
+
+# Separador entre campos no texto canônico da linha (não aparece em planilhas)
+FIELD_SEPARATOR = '\x1f'
+
+class FingerprintService:
+    """
+    "Impressões digitais" das linhas importadas, para importar só a diferença.
+
+    Cada linha tem uma chave estável (row_key: os campos que identificam a
+    linha, ex: CNPJ + SKU) e um hash do conteúdo (row_hash). Ao reenviar a
+    planilha, linhas com chave nova são inseridas, com hash diferente são
+    atualizadas, iguais são ignoradas, e, no modo "substituir" (escolhido no
+    mapeamento), chaves que sumiram são removidas.
+    Os hashes são calculados por coluna (pandas), sem laço Python por linha.
+    """
+
+    DELETE_BATCH_KEYS = 1000
+
+    @staticmethod
+    def _canonical(columns: Iterable[pd.Series]) -> pd.Series:
+        """Junta os campos de cada linha num texto único (vazio para nulos)."""
+        text = None
+        for column in columns:
+            part = column.astype(object).where(column.notna(), '').astype(str)
+            text = part if text is None else text + FIELD_SEPARATOR + part
+        return text
+
+    @staticmethod
+    def _hash(text: pd.Series) -> np.ndarray:
+        """Hash de 64 bits (SipHash com chave fixa do pandas), como int64 para o BigInteger."""
+        return pd.util.hash_pandas_object(text, index=False).to_numpy().view(np.int64)
+
+    @staticmethod
+    def row_keys(key_columns: List[pd.Series]) -> pd.Series:
+        """
+        Chave de cada linha a partir dos campos identificadores já normalizados.
+        Linhas repetidas na planilha são numeradas (1ª, 2ª ocorrência...) para
+        que cada uma tenha a sua chave.
+        """
+        text = FingerprintService._canonical(key_columns)
+        occurrence = text.groupby(text, sort=False).cumcount()
+        keys = FingerprintService._hash(text + FIELD_SEPARATOR + occurrence.astype(str))
+        return pd.Series(keys, index=text.index)
+
+    @staticmethod
+    def row_hashes(typed: pd.DataFrame) -> np.ndarray:
+        """Hash do conteúdo de cada linha (valores já convertidos, ex: centavos)."""
+        return FingerprintService._hash(FingerprintService._canonical(typed[column] for column in typed.columns))
+
+    @staticmethod
+    def load(company_id: str, import_type: str) -> pd.Series:
+        """Fingerprints gravados da empresa: Series row_hash indexada por row_key."""
+        rows = db.session.query(ImportFingerprint.row_key, ImportFingerprint.row_hash) \
+            .filter_by(company_id=company_id, import_type=import_type).all()
+        keys = np.fromiter((row_key for row_key, _ in rows), dtype=np.int64, count=len(rows))
+        hashes = np.fromiter((row_hash for _, row_hash in rows), dtype=np.int64, count=len(rows))
+        return pd.Series(hashes, index=pd.Index(keys))
+
+    @staticmethod
+    def diff(known: pd.Series, keys: np.ndarray, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Compara as linhas com os fingerprints gravados. Retorna (máscara de novas, máscara de alteradas)."""
+        if not len(known):
+            return np.ones(len(keys), dtype=bool), np.zeros(len(keys), dtype=bool)
+        positions = known.index.get_indexer(keys)
+        new = positions == -1
+        changed = ~new & (known.to_numpy()[positions] != hashes)
+        return new, changed
+
+    @staticmethod
+    def missing(known: pd.Series, seen_keys: np.ndarray) -> List[int]:
+        """Chaves gravadas que não aparecem mais na planilha."""
+        return [int(key) for key in known.index[~known.index.isin(seen_keys)]]
+
+    @staticmethod
+    def forget(connection, company_id: str, import_type: str, keys: List[int]):
+        """Remove os fingerprints das chaves (na transação corrente)."""
+        table = ImportFingerprint.__table__
+        for start in range(0, len(keys), FingerprintService.DELETE_BATCH_KEYS):
+            connection.execute(delete(table).where(
+                table.c.company_id == company_id,
+                table.c.import_type == import_type,
+                table.c.row_key.in_(keys[start:start + FingerprintService.DELETE_BATCH_KEYS])
+            ))
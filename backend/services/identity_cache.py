@@ -0,0 +1,161 @@
+# backend/services/identity_cache.py
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Iterable, List, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import joinedload
+from models.users import User, Role
+from config import get_config
+from app import db
+
+# Carrega a configuração (TTL e tamanho do cache)
+app_config = get_config()
+
+# "Fotografias" imutáveis (não são objetos do ORM, então podem ser
+# reaproveitadas entre requisições sem DetachedInstanceError)
+RoleSnapshot = namedtuple('RoleSnapshot', ['id', 'name', 'permission_level'])
+UserSnapshot = namedtuple('UserSnapshot', [
+    'id', 'email', 'full_name', 'company_id',
+    'role_id', 'role_name', 'role_level',
+    'is_active', 'is_blocked', 'blocked_until'
+])
+
+class IdentityCache:
+    """
+    Cache por processo dos cargos (Roles) e dos utilizadores autenticados.
+
+    - Cargos: carregados uma vez (a tabela só muda no 'flask seed_db').
+    - Utilizadores: TTL curto (IDENTITY_CACHE_TTL) e invalidação explícita
+      quando cargo, bloqueio ou empresa mudam (eventos do ORM abaixo e
+      RoleService.bulk_update_users para os UPDATEs em massa).
+    """
+
+    _lock = threading.Lock()
+    _roles_by_level = None
+    _roles_by_id = None
+    _users: "OrderedDict[str, tuple]" = OrderedDict()
+
+    # --- Cargos ---
+
+    @classmethod
+    def _load_roles(cls):
+        with cls._lock:
+            if cls._roles_by_level is not None:
+                return
+            roles = [RoleSnapshot(r.id, r.name, r.permission_level) for r in Role.query.all()]
+            if not roles:
+                # Banco ainda sem 'seed_db': não guarda o vazio
+                return
+            cls._roles_by_id = {role.id: role for role in roles}
+            cls._roles_by_level = {role.permission_level: role for role in roles}
+
+    @classmethod
+    def get_roles(cls) -> List[RoleSnapshot]:
+        """Todos os cargos, ordenados pelo nível."""
+        cls._load_roles()
+        return sorted((cls._roles_by_level or {}).values(), key=lambda role: role.permission_level)
+
+    @classmethod
+    def get_role_by_level(cls, level: int) -> Optional[RoleSnapshot]:
+        cls._load_roles()
+        return (cls._roles_by_level or {}).get(level)
+
+    @classmethod
+    def get_role_by_id(cls, role_id: int) -> Optional[RoleSnapshot]:
+        cls._load_roles()
+        return (cls._roles_by_id or {}).get(role_id)
+
+    @classmethod
+    def invalidate_roles(cls):
+        with cls._lock:
+            cls._roles_by_level = None
+            cls._roles_by_id = None
+
+    # --- Utilizadores ---
+
+    @staticmethod
+    def snapshot_of(user: User) -> UserSnapshot:
+        """Cria a fotografia de um utilizador do ORM (com o cargo já carregado)."""
+        role = user.role
+        return UserSnapshot(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            company_id=user.company_id,
+            role_id=user.role_id,
+            role_name=role.name if role else None,
+            role_level=role.permission_level if role else None,
+            is_active=user.is_active,
+            is_blocked=user.is_blocked,
+            blocked_until=user.blocked_until
+        )
+
+    @classmethod
+    def get_user(cls, user_id: str) -> Optional[UserSnapshot]:
+        """
+        Retorna a fotografia do utilizador. Num acerto do cache não faz
+        nenhuma query; numa falta faz um único SELECT (utilizador + cargo).
+        """
+        if not user_id:
+            return None
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._users.get(user_id)
+            if entry and entry[0] > now:
+                cls._users.move_to_end(user_id)
+                return entry[1]
+
+        user = User.query.options(joinedload(User.role)).filter_by(id=user_id).first()
+        if not user:
+            return None
+        snapshot = cls.snapshot_of(user)
+        cls.put_user(snapshot)
+        return snapshot
+
+    @classmethod
+    def put_user(cls, snapshot: UserSnapshot):
+        with cls._lock:
+            cls._users[snapshot.id] = (time.monotonic() + app_config.IDENTITY_CACHE_TTL, snapshot)
+            cls._users.move_to_end(snapshot.id)
+            while len(cls._users) > app_config.IDENTITY_CACHE_MAX:
+                cls._users.popitem(last=False)
+
+    @classmethod
+    def invalidate_user(cls, user_id: str):
+        with cls._lock:
+            cls._users.pop(user_id, None)
+
+    @classmethod
+    def invalidate_users(cls, user_ids: Iterable[str]):
+        with cls._lock:
+            for user_id in user_ids:
+                cls._users.pop(user_id, None)
+
+# --- Invalidação automática (eventos do ORM) ---
+
+# Campos que, ao mudar, tornam a fotografia do utilizador obsoleta
+_IDENTITY_FIELDS = ('role_id', 'company_id', 'is_active', 'is_blocked', 'blocked_until', 'email', 'full_name')
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('identity_cache_changed', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if obj in session.deleted or any(state.attrs[f].history.has_changes() for f in _IDENTITY_FIELDS):
+                changed.add(obj.id)
+    # Invalida já no flush (e de novo no commit, abaixo) para
+    # encurtar a janela em que outra requisição recarregaria o valor antigo
+    IdentityCache.invalidate_users(changed)
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    changed = session.info.pop('identity_cache_changed', None)
+    if changed:
+        IdentityCache.invalidate_users(changed)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('identity_cache_changed', None)
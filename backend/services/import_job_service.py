@@ -0,0 +1,393 @@
+# backend/services/import_job_service.py
+
+import datetime
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+import pandas as pd
+from sqlalchemy import or_, text
+from sqlalchemy.orm import aliased
+from models.imports import ImportBatch
+from models.audit_log import AuditLog
+from services.import_service import ImportService
+from services.fingerprint_service import FingerprintService
+from services.upload_cache_service import UploadCacheService
+from services.upload_store_service import UploadStoreService
+from utils import memory_meter
+from config import get_config
+from app import db
+
+# Carrega a configuração (tamanho dos blocos, timeouts do worker)
+app_config = get_config()
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+class ImportJobService:
+    """
+    Jobs de importação de planilhas, fora da requisição HTTP.
+
+    O job (ImportBatch) é processado em blocos de IMPORT_CHUNK_ROWS linhas.
+    Cada bloco é gravado (COPY) e o checkpoint (next_row, contadores,
+    heartbeat) é atualizado na MESMA transação, então um bloco nunca é
+    importado duas vezes. Se o worker cair, o job fica sem heartbeat e
+    outro worker o retoma a partir do checkpoint.
+    """
+
+    @staticmethod
+    def worker_id() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    @staticmethod
+    def create_job(file_path_id: str, mapping: Dict[str, str], company_id: str,
+                   user_id: str, ip_address: str = None, replace_missing: bool = False) -> ImportBatch:
+        """
+        Enfileira a importação (status 'queued'). Com replace_missing, os itens
+        da empresa ausentes da planilha são removidos ao final.
+        """
+        batch = ImportBatch(
+            id=str(uuid.uuid4()),
+            company_id=company_id,
+            user_id=user_id,
+            file_path_id=file_path_id,
+            import_type='orders',
+            status='queued',
+            mapping_json=json.dumps(mapping),
+            replace_missing=replace_missing,
+            chunk_size=app_config.IMPORT_CHUNK_ROWS
+        )
+        try:
+            db.session.add(batch)
+            db.session.add(AuditLog(
+                action='import_queued',
+                user_id=user_id,
+                ip_address=ip_address,
+                target_type='import_batch',
+                target_id=batch.id,
+                details_json=json.dumps({"file": file_path_id, "replace_missing": replace_missing})
+            ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return batch
+
+    @staticmethod
+    def claim(worker_id: str, batch_id: Optional[str] = None) -> Optional[ImportBatch]:
+        """
+        Reserva um job na fila (ou um job 'processing' abandonado) para este worker.
+        FOR UPDATE SKIP LOCKED: dois workers nunca pegam o mesmo job.
+        """
+        stale_before = _now() - datetime.timedelta(seconds=app_config.IMPORT_JOB_STALE_SECONDS)
+        skipped = []
+        try:
+            while True:
+                query = ImportBatch.query.filter(or_(
+                    ImportBatch.status == 'queued',
+                    (ImportBatch.status == 'processing') & (ImportBatch.heartbeat_at < stale_before)
+                ), ~ImportJobService._busy(stale_before))
+                if batch_id:
+                    query = query.filter(ImportBatch.id == batch_id)
+                if skipped:
+                    query = query.filter(ImportBatch.id.notin_(skipped))
+                batch = query.order_by(ImportBatch.created_at).with_for_update(skip_locked=True).first()
+                if not batch:
+                    db.session.rollback()
+                    return None
+
+                # O filtro acima não basta: dois workers podem pegar, ao mesmo
+                # tempo, jobs diferentes da mesma empresa. Com a trava da empresa,
+                # o segundo espera o primeiro confirmar e então o vê 'processing'
+                if batch.company_id:
+                    ImportJobService._lock_company(batch.company_id, batch.import_type)
+                    if db.session.query(ImportJobService._busy(stale_before, batch)).scalar():
+                        db.session.rollback()
+                        skipped.append(batch.id)
+                        continue
+
+                # Job abandonado: o worker anterior caiu no meio dele (ex: sem
+                # memória). Conta como tentativa, para um job que derruba o
+                # worker não ser retomado para sempre
+                if batch.status == 'processing':
+                    batch.attempts += 1
+                    if batch.attempts >= app_config.IMPORT_JOB_MAX_ATTEMPTS:
+                        print(f"[Import] Job {batch.id} abandonado {batch.attempts}x; marcando como falho.")
+                        batch.status = 'failed'
+                        batch.error_message = "O processamento foi interrompido repetidas vezes."
+                        batch.finished_at = _now()
+                        db.session.commit()
+                        continue
+
+                batch.status = 'processing'
+                batch.worker_id = worker_id
+                batch.heartbeat_at = _now()
+                batch.started_at = batch.started_at or batch.heartbeat_at
+                db.session.commit()
+                return batch
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def _busy(stale_before: datetime.datetime, batch: Optional[ImportBatch] = None):
+        """
+        EXISTS de outro job da mesma empresa e tipo em andamento (heartbeat recente).
+        Um job por vez por empresa e tipo: a importação por diferença compara
+        com os fingerprints gravados, que outro job da mesma empresa alteraria.
+        """
+        running = aliased(ImportBatch)
+        if batch is None:
+            company_id, import_type, batch_id = ImportBatch.company_id, ImportBatch.import_type, ImportBatch.id
+        else:
+            company_id, import_type, batch_id = batch.company_id, batch.import_type, batch.id
+        return db.session.query(running.id).filter(
+            running.company_id == company_id,
+            running.import_type == import_type,
+            running.id != batch_id,
+            running.status == 'processing',
+            running.heartbeat_at >= stale_before
+        ).exists()
+
+    @staticmethod
+    def _lock_company(company_id: str, import_type: str):
+        """Trava (advisory lock do Postgres, até o fim da transação) os jobs da empresa e tipo."""
+        db.session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+                           {"key": f"import:{company_id}:{import_type}"})
+
+    @staticmethod
+    def run(batch_id: str, worker_id: str):
+        """Processa um job já reservado, do checkpoint até o fim."""
+        batch = ImportBatch.query.get(batch_id)
+        meter = memory_meter.MemoryMeter(f"import {batch_id}")
+        try:
+            file_path = os.path.join(app_config.UPLOAD_FOLDER, batch.file_path_id)
+            mapping = json.loads(batch.mapping_json or '{}')
+            with meter.stage('leitura'):
+                mapped, total_rows, error = ImportJobService._open_sheet(file_path, mapping)
+            if error:
+                ImportJobService._fail(batch_id, error)
+                return
+
+            # Importação por diferença: chaves da planilha inteira e fingerprints já gravados
+            keys = known = None
+            if batch.company_id:
+                with meter.stage('chaves'):
+                    keys = ImportJobService._row_keys(file_path, mapping, mapped)
+                    known = FingerprintService.load(batch.company_id, batch.import_type)
+                db.session.rollback()
+
+            chunk_size = batch.chunk_size or app_config.IMPORT_CHUNK_ROWS
+            start = batch.next_row
+            while start < total_rows:
+                # Trava o job; se outro worker o assumiu, para aqui
+                batch = ImportJobService._lock(batch_id)
+                if batch.worker_id != worker_id or batch.status != 'processing':
+                    db.session.rollback()
+                    print(f"[Import] Job {batch_id} assumido por outro worker; parando.")
+                    return
+                start = batch.next_row
+                with meter.stage('bloco'):
+                    chunk = ImportJobService._chunk(file_path, mapping, mapped, start, chunk_size)
+                    chunk_keys = keys.iloc[start:start + chunk_size] if keys is not None else None
+                    result, counts = ImportService.import_chunk(batch, chunk, chunk_keys, known)
+                rejected = int(result.invalid.sum())
+                batch.total_rows = total_rows
+                batch.imported_rows += len(chunk) - rejected
+                batch.rejected_rows += rejected
+                batch.updated_rows += counts["updated"]
+                batch.unchanged_rows += counts["unchanged"]
+                batch.next_row = start + len(chunk)
+                batch.heartbeat_at = _now()
+                batch.errors_json = ImportJobService._merge_errors(batch.errors_json, result)
+                db.session.commit()
+                start = batch.next_row
+
+            batch = ImportJobService._lock(batch_id)
+            if keys is not None and batch.replace_missing:
+                with meter.stage('remoção'):
+                    batch.deleted_rows = ImportService.delete_missing(batch, keys.to_numpy(), known)
+            batch.total_rows = total_rows
+            batch.status = 'completed'
+            batch.finished_at = _now()
+            batch.error_message = None
+            db.session.add(AuditLog(
+                action='import_processed',
+                user_id=batch.user_id,
+                target_type='import_batch',
+                target_id=batch.id,
+                details_json=json.dumps({"file": batch.file_path_id, "imported": batch.imported_rows,
+                                         "rejected": batch.rejected_rows, "updated": batch.updated_rows,
+                                         "unchanged": batch.unchanged_rows, "deleted": batch.deleted_rows,
+                                         "memory": meter.summary()})
+            ))
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"[Import] Erro no job {batch_id}: {e}")
+            ImportJobService._retry_or_fail(batch_id, str(e))
+        finally:
+            meter.log()
+
+    @staticmethod
+    def _open_sheet(file_path: str, mapping: Dict[str, str]) -> Tuple[Optional[pd.DataFrame], int, str]:
+        """
+        Prepara a leitura da planilha conforme o orçamento de memória.
+        Retorna (planilha mapeada, total de linhas, erro); no modo em blocos
+        a planilha mapeada é None e cada bloco é lido do cache em _chunk.
+        """
+        mode = UploadStoreService.memory_plan(file_path)
+        if mode == 'reject':
+            return None, 0, "A planilha é grande demais para ser importada."
+
+        if mode == 'chunked':
+            available, error = UploadCacheService.ensure(file_path)
+            if error:
+                return None, 0, error
+            if available:
+                error = ImportService.validate_mapping(UploadCacheService.columns(file_path), mapping)
+                return None, UploadCacheService.row_count(file_path), error
+            print(f"[Import] Sem cache colunar ('pyarrow'): {file_path} será lida inteira na memória.")
+
+        df, error = UploadCacheService.read(file_path, columns=list(mapping))
+        if error:
+            return None, 0, error
+        mapped, error = ImportService.apply_mapping(df, mapping)
+        if error:
+            return None, 0, error
+        return mapped, len(mapped), None
+
+    @staticmethod
+    def _chunk(file_path: str, mapping: Dict[str, str], mapped: Optional[pd.DataFrame],
+               start: int, size: int) -> pd.DataFrame:
+        """Linhas [start, start + size) da planilha mapeada (da memória ou do cache)."""
+        if mapped is not None:
+            return mapped.iloc[start:start + size]
+        df = UploadCacheService.load(file_path, columns=list(mapping), rows=size, offset=start)
+        chunk, error = ImportService.apply_mapping(df, mapping)
+        if error:
+            raise ValueError(error)
+        return chunk
+
+    @staticmethod
+    def _row_keys(file_path: str, mapping: Dict[str, str], mapped: Optional[pd.DataFrame]) -> pd.Series:
+        """Chaves de todas as linhas; no modo em blocos, lê do cache só as colunas das chaves."""
+        if mapped is not None:
+            return ImportService.row_keys(mapped)
+        key_columns = {column: field for column, field in mapping.items() if field in ImportService.KEY_FIELDS}
+        df = UploadCacheService.load(file_path, columns=list(key_columns))
+        return ImportService.row_keys(df.rename(columns=key_columns))
+
+    @staticmethod
+    def _lock(batch_id: str) -> ImportBatch:
+        """SELECT ... FOR UPDATE do job (populate_existing: não usa o objeto já carregado na sessão)."""
+        return (ImportBatch.query.filter_by(id=batch_id)
+                .populate_existing().with_for_update().one())
+
+    @staticmethod
+    def _merge_errors(errors_json: Optional[str], result) -> str:
+        """Acumula as primeiras linhas com erro e a contagem por mensagem."""
+        errors = json.loads(errors_json) if errors_json else {"rows": [], "summary": {}}
+        room = ImportService.MAX_REPORTED_ERRORS - len(errors["rows"])
+        if room > 0:
+            errors["rows"].extend(ImportService.error_report(result)[:room])
+        for message, total in result.summary().items():
+            errors["summary"][message] = errors["summary"].get(message, 0) + total
+        return json.dumps(errors)
+
+    @staticmethod
+    def _fail(batch_id: str, message: str):
+        batch = ImportBatch.query.get(batch_id)
+        batch.status = 'failed'
+        batch.error_message = message
+        batch.finished_at = _now()
+        db.session.commit()
+
+    @staticmethod
+    def _retry_or_fail(batch_id: str, message: str):
+        """Erro inesperado: volta para a fila (do checkpoint) ou falha após IMPORT_JOB_MAX_ATTEMPTS."""
+        try:
+            batch = ImportJobService._lock(batch_id)
+            batch.attempts += 1
+            batch.error_message = message
+            if batch.attempts >= app_config.IMPORT_JOB_MAX_ATTEMPTS:
+                batch.status = 'failed'
+                batch.finished_at = _now()
+            else:
+                batch.status = 'queued'
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[Import] Não foi possível registrar a falha do job {batch_id}: {e}")
+
+    @staticmethod
+    def progress(batch: ImportBatch) -> Dict:
+        """Estado do job para o endpoint de status (com estimativa de término)."""
+        data = batch.to_dict()
+        errors = json.loads(batch.errors_json) if batch.errors_json else {"rows": [], "summary": {}}
+        data['errors'] = errors["rows"]
+        data['error_summary'] = errors["summary"]
+
+        eta_seconds = None
+        if batch.status == 'processing' and batch.started_at and batch.total_rows and batch.next_row:
+            elapsed = (_now() - batch.started_at).total_seconds()
+            rate = batch.next_row / elapsed if elapsed > 0 else 0
+            if rate:
+                eta_seconds = round((batch.total_rows - batch.next_row) / rate)
+        data['percent'] = round(100 * batch.next_row / batch.total_rows, 1) if batch.total_rows else None
+        data['eta_seconds'] = eta_seconds
+        return data
+
+    # --- Execução ---
+
+    @staticmethod
+    def work(worker_id: str, batch_id: Optional[str] = None) -> bool:
+        """Reserva e processa um job. Retorna False se não havia job disponível."""
+        batch = ImportJobService.claim(worker_id, batch_id)
+        if not batch:
+            return False
+        ImportJobService.run(batch.id, worker_id)
+        return True
+
+    @staticmethod
+    def run_worker(once: bool = False):
+        """Laço do worker ('flask import_worker'): processa a fila até ser interrompido."""
+        worker_id = ImportJobService.worker_id()
+        print(f"[Import] Worker {worker_id} iniciado.")
+        while True:
+            try:
+                found = ImportJobService.work(worker_id)
+            except Exception as e:
+                db.session.rollback()
+                print(f"[Import] Erro no worker: {e}")
+                found = False
+            if once and not found:
+                return
+            if not found:
+                time.sleep(app_config.IMPORT_WORKER_POLL_SECONDS)
+            db.session.remove()
+
+    @staticmethod
+    def start_inline(app, batch_id: str):
+        """
+        Processa o job numa thread do próprio processo web (IMPORT_INLINE_WORKER).
+        Se o processo cair, o job é retomado por 'flask import_worker' ou pelo
+        próximo job iniciado após o prazo de IMPORT_JOB_STALE_SECONDS.
+        """
+        def target():
+            with app.app_context():
+                try:
+                    ImportJobService.work(ImportJobService.worker_id(), batch_id)
+                    # Aproveita a thread para retomar jobs abandonados
+                    while ImportJobService.work(ImportJobService.worker_id()):
+                        pass
+                except Exception as e:
+                    print(f"[Import] Erro no worker inline: {e}")
+                finally:
+                    db.session.remove()
+
+        threading.Thread(target=target, name=f"import-{batch_id}", daemon=True).start()
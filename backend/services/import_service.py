@@ -0,0 +1,247 @@
+# backend/services/import_service.py
+
+import io
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, delete, insert, update
+from models.imports import ImportBatch, ImportedOrderItem, ImportFingerprint
+from services.fingerprint_service import FingerprintService
+from services.validation_service import ValidationService, ValidationResult, FieldSpec
+from utils import vectorized_validators as vv
+from app import db
+
+class ImportService:
+    """
+    Etapa final da importação de planilhas (após o upload e o mapeamento),
+    executada em blocos pelos jobs do ImportJobService.
+
+    O mapeamento é um rename/select de colunas do DataFrame, a validação e a
+    conversão de tipos são feitas por coluna e as linhas válidas vão para o banco com COPY
+    (ou INSERTs em lote, se o driver não suportar COPY), sem objetos do ORM.
+    """
+
+    # Campos do sistema (os mesmos oferecidos no import.js) e seus limites
+    SYSTEM_FIELDS = {
+        'cnpj_comprador': 'CNPJ do Comprador',
+        'razao_social': 'Razão Social (Comprador)',
+        'sku_produto': 'SKU do Produto',
+        'quantidade': 'Quantidade',
+        'preco_unitario': 'Preço Unitário'
+    }
+    REQUIRED_FIELDS = ('cnpj_comprador', 'sku_produto', 'quantidade')
+    # Campos que identificam a linha entre envios (importação por diferença)
+    KEY_FIELDS = ('cnpj_comprador', 'sku_produto')
+
+    # Regras de validação/conversão de cada campo
+    ORDER_SCHEMA = {
+        'cnpj_comprador': FieldSpec('cnpj', 'CNPJ do comprador', required=True),
+        'razao_social': FieldSpec('text', 'Razão social'),
+        'sku_produto': FieldSpec('text', 'SKU do produto', required=True, max_length=100),
+        'quantidade': FieldSpec('quantity', 'Quantidade', required=True),
+        'preco_unitario': FieldSpec('money', 'Preço unitário', output='preco_unitario_centavos')
+    }
+
+    # Colunas gravadas em import_order_items (na ordem do COPY)
+    TARGET_COLUMNS = ['batch_id', 'company_id', 'row_number', 'cnpj_comprador', 'razao_social',
+                      'sku_produto', 'quantidade', 'preco_unitario_centavos']
+
+    # Colunas que definem o conteúdo da linha (hash da importação por diferença)
+    HASHED_COLUMNS = ['cnpj_comprador', 'razao_social', 'sku_produto', 'quantidade', 'preco_unitario_centavos']
+
+    COPY_BATCH_ROWS = 50000
+    MAX_REPORTED_ERRORS = 100
+
+    @staticmethod
+    def validate_mapping(columns: List[str], mapping: Dict[str, str]) -> str:
+        """
+        Confere o mapeamento {"Coluna na Planilha": "campo_do_sistema"} contra
+        as colunas da planilha. Retorna a mensagem de erro ou None.
+        """
+        if not isinstance(mapping, dict) or not mapping:
+            return "Nenhuma coluna mapeada."
+
+        unknown = [column for column in mapping if column not in columns]
+        if unknown:
+            return f"Colunas não encontradas na planilha: {', '.join(unknown)}."
+        invalid = [field for field in mapping.values() if field not in ImportService.SYSTEM_FIELDS]
+        if invalid:
+            return f"Campos do sistema inválidos: {', '.join(invalid)}."
+        if len(set(mapping.values())) != len(mapping):
+            return "Cada campo do sistema só pode ser mapeado uma vez."
+        missing = [field for field in ImportService.REQUIRED_FIELDS if field not in mapping.values()]
+        if missing:
+            labels = [ImportService.SYSTEM_FIELDS[field] for field in missing]
+            return f"Campos obrigatórios não mapeados: {', '.join(labels)}."
+        return None
+
+    @staticmethod
+    def apply_mapping(df: pd.DataFrame, mapping: Dict[str, str]) -> Tuple[pd.DataFrame, str]:
+        """
+        Aplica o mapeamento como um select + rename de colunas.
+        Campos opcionais não mapeados ficam vazios.
+        """
+        error = ImportService.validate_mapping(list(df.columns), mapping)
+        if error:
+            return None, error
+
+        mapped = df[list(mapping)].rename(columns=mapping)
+        for field in ImportService.SYSTEM_FIELDS:
+            if field not in mapped.columns:
+                mapped[field] = ''
+        return mapped[list(ImportService.SYSTEM_FIELDS)], None
+
+    @staticmethod
+    def coerce(df: pd.DataFrame) -> ValidationResult:
+        """
+        Valida e converte os campos mapeados (texto) para os tipos da tabela,
+        coluna a coluna (ValidationService).
+        """
+        result = ValidationService.validate(df, ImportService.ORDER_SCHEMA)
+        result.typed['razao_social'] = result.typed['razao_social'].str.slice(0, 255)
+        return result
+
+    @staticmethod
+    def sheet_row(index_value) -> int:
+        """Linha na planilha: +1 do cabeçalho, +1 porque a planilha começa em 1."""
+        return int(index_value) + 2
+
+    @staticmethod
+    def error_report(result: ValidationResult) -> List[Dict]:
+        """Mensagens das primeiras MAX_REPORTED_ERRORS linhas inválidas."""
+        index = result.typed.index
+        return [{
+            "row": ImportService.sheet_row(index[position]),
+            "errors": result.errors_at(position)
+        } for position in np.flatnonzero(result.invalid)[:ImportService.MAX_REPORTED_ERRORS]]
+
+    @staticmethod
+    def row_keys(mapped: pd.DataFrame) -> pd.Series:
+        """
+        Chave estável das linhas de pedido (CNPJ do comprador + SKU), calculada
+        sobre a planilha mapeada inteira, antes da validação.
+        Só precisa das colunas KEY_FIELDS.
+        """
+        return FingerprintService.row_keys([
+            vv.clean_digits(mapped['cnpj_comprador']),
+            mapped['sku_produto'].str.strip()
+        ])
+
+    @staticmethod
+    def _records(rows: pd.DataFrame, columns: List[str]) -> List[Dict]:
+        """Linhas como dicionários de escalares Python (nulos viram None)."""
+        values = {column: [None if pd.isna(value) else value for value in rows[column].tolist()]
+                  for column in columns}
+        return [dict(zip(columns, row)) for row in zip(*(values[column] for column in columns))]
+
+    @staticmethod
+    def copy_rows(table, columns: List[str], rows: pd.DataFrame):
+        """
+        Grava as linhas em 'table' com COPY ... FROM STDIN (psycopg2) em blocos
+        de COPY_BATCH_ROWS linhas; sem suporte a COPY, faz INSERTs em lote (executemany).
+        """
+        connection = db.session.connection()
+        cursor = connection.connection.cursor()
+        try:
+            if hasattr(cursor, 'copy_expert'):
+                sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+                for start in range(0, len(rows), ImportService.COPY_BATCH_ROWS):
+                    buffer = io.StringIO()
+                    # Campo vazio sem aspas = NULL no COPY csv
+                    rows.iloc[start:start + ImportService.COPY_BATCH_ROWS].to_csv(
+                        buffer, columns=columns, header=False, index=False, na_rep='')
+                    buffer.seek(0)
+                    cursor.copy_expert(sql, buffer)
+                return
+        finally:
+            cursor.close()
+
+        for start in range(0, len(rows), ImportService.COPY_BATCH_ROWS):
+            records = ImportService._records(rows.iloc[start:start + ImportService.COPY_BATCH_ROWS], columns)
+            connection.execute(insert(table), records)
+
+    @staticmethod
+    def bulk_insert(rows: pd.DataFrame):
+        """Grava as linhas (já com as TARGET_COLUMNS) em import_order_items."""
+        ImportService.copy_rows(ImportedOrderItem.__table__, ImportService.TARGET_COLUMNS, rows)
+
+    @staticmethod
+    def _update_by_key(table, rows: pd.DataFrame, columns: List[str], company_id: str, **filters):
+        """UPDATE em lote (executemany) das linhas de 'table' pela chave (company_id, row_key)."""
+        if not len(rows):
+            return
+        records = ImportService._records(rows, columns + ['row_key'])
+        for record in records:
+            record['b_row_key'] = record.pop('row_key')
+        conditions = [table.c.company_id == company_id, table.c.row_key == bindparam('b_row_key')]
+        conditions += [table.c[name] == value for name, value in filters.items()]
+        db.session.connection().execute(update(table).where(*conditions), records)
+
+    @staticmethod
+    def import_chunk(batch: ImportBatch, mapped: pd.DataFrame, keys: pd.Series = None,
+                     known: pd.Series = None) -> Tuple[ValidationResult, Dict[str, int]]:
+        """
+        Valida um bloco de linhas já mapeadas e grava as válidas (COPY) na
+        transação corrente, sem commit: quem chama grava o checkpoint do
+        job na mesma transação.
+
+        Com 'keys' (chaves das linhas do bloco) e 'known' (fingerprints já
+        gravados da empresa), grava só a diferença: insere as linhas novas,
+        atualiza as alteradas e ignora as iguais.
+        Retorna (resultado da validação, {"inserted", "updated", "unchanged"}).
+        """
+        result = ImportService.coerce(mapped)
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        valid_mask = ~result.invalid
+        valid = result.typed[valid_mask].copy()
+        if not len(valid):
+            return result, counts
+
+        valid.insert(0, 'row_number', valid.index.to_numpy() + 2)
+        valid.insert(0, 'company_id', batch.company_id)
+        valid.insert(0, 'batch_id', batch.id)
+        if keys is None:
+            ImportService.bulk_insert(valid)
+            counts["inserted"] = len(valid)
+            return result, counts
+
+        valid['row_key'] = keys.to_numpy()[valid_mask]
+        valid['row_hash'] = FingerprintService.row_hashes(valid[ImportService.HASHED_COLUMNS])
+        new, changed = FingerprintService.diff(known, valid['row_key'].to_numpy(), valid['row_hash'].to_numpy())
+
+        if new.any():
+            inserted = valid[new]
+            ImportService.copy_rows(ImportedOrderItem.__table__, ImportService.TARGET_COLUMNS + ['row_key'], inserted)
+            fingerprints = inserted[['company_id', 'row_key', 'row_hash', 'batch_id']].copy()
+            fingerprints.insert(1, 'import_type', batch.import_type)
+            ImportService.copy_rows(ImportFingerprint.__table__, list(fingerprints.columns), fingerprints)
+
+        if changed.any():
+            updated = valid[changed]
+            ImportService._update_by_key(ImportedOrderItem.__table__, updated,
+                                         ['batch_id', 'row_number'] + ImportService.HASHED_COLUMNS, batch.company_id)
+            ImportService._update_by_key(ImportFingerprint.__table__, updated, ['row_hash', 'batch_id'],
+                                         batch.company_id, import_type=batch.import_type)
+
+        counts["inserted"] = int(new.sum())
+        counts["updated"] = int(changed.sum())
+        counts["unchanged"] = len(valid) - counts["inserted"] - counts["updated"]
+        return result, counts
+
+    @staticmethod
+    def delete_missing(batch: ImportBatch, seen_keys: np.ndarray, known: pd.Series) -> int:
+        """
+        Modo "substituir" (batch.replace_missing): remove os itens (e
+        fingerprints) da empresa cujas chaves não aparecem na nova planilha.
+        Linhas presentes mas inválidas não são removidas.
+        """
+        missing = FingerprintService.missing(known, seen_keys)
+        connection = db.session.connection()
+        table = ImportedOrderItem.__table__
+        for start in range(0, len(missing), FingerprintService.DELETE_BATCH_KEYS):
+            connection.execute(delete(table).where(
+                table.c.company_id == batch.company_id,
+                table.c.row_key.in_(missing[start:start + FingerprintService.DELETE_BATCH_KEYS])
+            ))
+        FingerprintService.forget(connection, batch.company_id, batch.import_type, missing)
+        return len(missing)
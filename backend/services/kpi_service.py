@@ -0,0 +1,267 @@
+# backend/services/kpi_service.py
+
+import datetime
+from typing import Dict
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
+from models.kpis import CompanyDailyKPI
+from models.negotiations import Negotiation, Proposal
+from models.users import User
+from services.date_service import DateService
+from utils.constants import StatusNegociacao, StatusProposta
+from app import db
+
+# Colunas somáveis do rollup
+KPI_FIELDS = (
+    'negotiations_opened', 'negotiations_won', 'negotiations_lost',
+    'proposals_count', 'proposals_value_sum',
+    'responses_count', 'response_seconds_sum'
+)
+
+# Status de proposta que contam como resposta da outra parte
+RESPONSE_STATUSES = (StatusProposta.ACEITA, StatusProposta.REJEITADA)
+
+class KpiService:
+    """
+    Serviço dos KPIs diários de negociação por empresa (tabela company_daily_kpis).
+
+    Assim como o CounterService, o rollup é atualizado na MESMA transação
+    da negociação/proposta (eventos do ORM abaixo), com um UPSERT de incrementos.
+    O painel lê no máximo MAX_RANGE_DAYS linhas pela chave primária,
+    independentemente do volume de negociações.
+    """
+
+    MAX_RANGE_DAYS = 366
+
+    @staticmethod
+    def local_day(dt=None) -> datetime.date:
+        """Dia (America/Sao_Paulo) de um datetime; sem argumento, o dia de hoje."""
+        if dt is None:
+            return DateService.get_now().date()
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=DateService.UTC_TIMEZONE)
+        return dt.astimezone(DateService.TIMEZONE).date()
+
+    @staticmethod
+    def increment(connection, rows: Dict[tuple, Dict[str, float]]):
+        """
+        Aplica incrementos ao rollup com um único UPSERT.
+        'rows' mapeia (company_id, dia) -> {coluna: incremento}.
+        """
+        values = []
+        for (company_id, day), deltas in sorted(rows.items()):
+            if not company_id:
+                continue
+            row = {field: 0 for field in KPI_FIELDS}
+            row.update({field: delta for field, delta in deltas.items() if delta})
+            row.update({'company_id': company_id, 'day': day})
+            values.append(row)
+        if not values:
+            return
+        table = CompanyDailyKPI.__table__
+        stmt = pg_insert(table).values(values)
+        set_ = {field: table.c[field] + stmt.excluded[field] for field in KPI_FIELDS}
+        set_['updated_at'] = func.now()
+        connection.execute(stmt.on_conflict_do_update(index_elements=[table.c.company_id, table.c.day], set_=set_))
+
+    @staticmethod
+    def get_dashboard(company_id: str, start: datetime.date, end: datetime.date) -> Dict:
+        """
+        Série diária e totais do período [start, end] (dias locais).
+        Dias sem movimento aparecem zerados.
+        """
+        rows = CompanyDailyKPI.query.filter(
+            CompanyDailyKPI.company_id == company_id,
+            CompanyDailyKPI.day.between(start, end)
+        ).order_by(CompanyDailyKPI.day).all()
+        by_day = {row.day: row for row in rows}
+
+        totals = {field: 0 for field in KPI_FIELDS}
+        series = []
+        day = start
+        while day <= end:
+            row = by_day.get(day)
+            values = {field: (getattr(row, field) if row else 0) for field in KPI_FIELDS}
+            for field in KPI_FIELDS:
+                totals[field] += values[field]
+            series.append(KpiService._derive(values, day=day.isoformat()))
+            day += datetime.timedelta(days=1)
+
+        return {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "totals": KpiService._derive(totals),
+            "days": series
+        }
+
+    @staticmethod
+    def _derive(values: Dict, **extra) -> Dict:
+        """Converte as somas em métricas (taxa de sucesso, valor médio, tempo de resposta)."""
+        closed = values['negotiations_won'] + values['negotiations_lost']
+        result = dict(extra)
+        result.update({
+            "negotiations_opened": values['negotiations_opened'],
+            "negotiations_won": values['negotiations_won'],
+            "negotiations_lost": values['negotiations_lost'],
+            "win_rate": round(values['negotiations_won'] / closed, 4) if closed else None,
+            "proposals": values['proposals_count'],
+            "avg_proposal_value": round(values['proposals_value_sum'] / values['proposals_count'], 2)
+                                  if values['proposals_count'] else None,
+            "responses": values['responses_count'],
+            "avg_response_seconds": round(values['response_seconds_sum'] / values['responses_count'])
+                                    if values['responses_count'] else None
+        })
+        return result
+
+    @staticmethod
+    def backfill(start: datetime.date, end: datetime.date) -> int:
+        """
+        Recalcula o rollup de [start, end] a partir de negotiations/proposals
+        e substitui as linhas do período. Usado pelo comando 'flask backfill_kpis'.
+
+        A tabela fica bloqueada (EXCLUSIVE) até o commit; os incrementos
+        concorrentes esperam e são aplicados por cima do valor recalculado.
+        O fechamento das negociações antigas usa o updated_at como data.
+        Retorna o número de linhas (empresa, dia) gravadas.
+        """
+        tz = DateService.TIMEZONE_STR
+
+        def local_day(column):
+            return func.date(func.timezone(tz, column))
+
+        def in_range(column):
+            return local_day(column).between(start, end)
+
+        try:
+            db.session.execute(db.text("LOCK TABLE company_daily_kpis IN EXCLUSIVE MODE"))
+            rows: Dict[tuple, Dict[str, float]] = {}
+
+            def add(company_id, day, **deltas):
+                target = rows.setdefault((company_id, day), {})
+                for field, delta in deltas.items():
+                    target[field] = target.get(field, 0) + (delta or 0)
+
+            # Negociações abertas e fechadas (as duas empresas participantes)
+            for side in (Negotiation.seller_company_id, Negotiation.buyer_company_id):
+                opened_day = local_day(Negotiation.created_at)
+                for company_id, day, total in db.session.query(side, opened_day, func.count()) \
+                        .filter(in_range(Negotiation.created_at)).group_by(side, opened_day):
+                    add(company_id, day, negotiations_opened=total)
+
+                closed_day = local_day(Negotiation.updated_at)
+                won = func.count().filter(Negotiation.status == StatusNegociacao.FECHADA_SUCESSO)
+                lost = func.count().filter(Negotiation.status == StatusNegociacao.FECHADA_FALHA)
+                for company_id, day, won_total, lost_total in db.session.query(side, closed_day, won, lost) \
+                        .filter(Negotiation.status.in_([StatusNegociacao.FECHADA_SUCESSO, StatusNegociacao.FECHADA_FALHA]),
+                                in_range(Negotiation.updated_at)) \
+                        .group_by(side, closed_day):
+                    add(company_id, day, negotiations_won=won_total, negotiations_lost=lost_total)
+
+                # Propostas enviadas nas negociações da empresa
+                proposal_day = local_day(Proposal.created_at)
+                for company_id, day, total, value_sum in db.session.query(
+                        side, proposal_day, func.count(Proposal.id), func.coalesce(func.sum(Proposal.total_value), 0)) \
+                        .select_from(Proposal) \
+                        .join(Negotiation, Proposal.negotiation_id == Negotiation.id) \
+                        .filter(in_range(Proposal.created_at)).group_by(side, proposal_day):
+                    add(company_id, day, proposals_count=total, proposals_value_sum=value_sum)
+
+            # Respostas: atribuídas à empresa que NÃO fez a proposta
+            responder = db.case(
+                (User.company_id == Negotiation.seller_company_id, Negotiation.buyer_company_id),
+                else_=Negotiation.seller_company_id
+            )
+            response_day = local_day(Proposal.responded_at)
+            seconds = func.extract('epoch', Proposal.responded_at - Proposal.created_at)
+            for company_id, day, total, seconds_sum in db.session.query(
+                    responder, response_day, func.count(Proposal.id), func.coalesce(func.sum(seconds), 0)) \
+                    .select_from(Proposal) \
+                    .join(Negotiation, Proposal.negotiation_id == Negotiation.id) \
+                    .join(User, Proposal.proposer_user_id == User.id) \
+                    .filter(Proposal.responded_at.isnot(None), Proposal.status.in_(RESPONSE_STATUSES),
+                            in_range(Proposal.responded_at)) \
+                    .group_by(responder, response_day):
+                add(company_id, day, responses_count=total, response_seconds_sum=float(seconds_sum))
+
+            db.session.query(CompanyDailyKPI).filter(CompanyDailyKPI.day.between(start, end)) \
+                .delete(synchronize_session=False)
+            KpiService.increment(db.session.connection(), rows)
+            db.session.commit()
+            return len(rows)
+        except Exception:
+            db.session.rollback()
+            raise
+
+# --- Eventos do ORM (registrados na importação deste módulo, feita no app.py) ---
+
+def _status_changed(target) -> bool:
+    return inspect(target).attrs.status.history.has_changes()
+
+@event.listens_for(Negotiation, 'after_insert')
+def _negotiation_inserted(mapper, connection, target):
+    day = KpiService.local_day()
+    KpiService.increment(connection, {
+        (target.seller_company_id, day): {'negotiations_opened': 1},
+        (target.buyer_company_id, day): {'negotiations_opened': 1}
+    })
+
+@event.listens_for(Negotiation, 'after_update')
+def _negotiation_updated(mapper, connection, target):
+    # Só a entrada num status fechado conta (o app não reabre negociações)
+    if not _status_changed(target):
+        return
+    if target.status == StatusNegociacao.FECHADA_SUCESSO:
+        deltas = {'negotiations_won': 1}
+    elif target.status == StatusNegociacao.FECHADA_FALHA:
+        deltas = {'negotiations_lost': 1}
+    else:
+        return
+    day = KpiService.local_day()
+    KpiService.increment(connection, {
+        (target.seller_company_id, day): deltas,
+        (target.buyer_company_id, day): dict(deltas)
+    })
+
+def _negotiation_companies(connection, negotiation_id: str):
+    negotiations = Negotiation.__table__
+    return connection.execute(
+        select(negotiations.c.seller_company_id, negotiations.c.buyer_company_id)
+        .where(negotiations.c.id == negotiation_id)
+    ).first()
+
+@event.listens_for(Proposal, 'after_insert')
+def _proposal_inserted(mapper, connection, target):
+    companies = _negotiation_companies(connection, target.negotiation_id)
+    if not companies:
+        return
+    day = KpiService.local_day()
+    deltas = {'proposals_count': 1, 'proposals_value_sum': target.total_value or 0}
+    KpiService.increment(connection, {
+        (companies.seller_company_id, day): deltas,
+        (companies.buyer_company_id, day): dict(deltas)
+    })
+
+@event.listens_for(Proposal, 'after_update')
+def _proposal_updated(mapper, connection, target):
+    if not _status_changed(target) or target.status not in RESPONSE_STATUSES or not target.responded_at:
+        return
+    # created_at vem do banco; busca junto com as empresas e a empresa de quem propôs
+    proposals, negotiations, users = Proposal.__table__, Negotiation.__table__, User.__table__
+    row = connection.execute(
+        select(proposals.c.created_at, negotiations.c.seller_company_id,
+               negotiations.c.buyer_company_id, users.c.company_id)
+        .select_from(proposals
+                     .join(negotiations, proposals.c.negotiation_id == negotiations.c.id)
+                     .join(users, proposals.c.proposer_user_id == users.c.id))
+        .where(proposals.c.id == target.id)
+    ).first()
+    if not row or not row.created_at:
+        return
+    responder = row.buyer_company_id if row.company_id == row.seller_company_id else row.seller_company_id
+    seconds = max(0.0, (target.responded_at - row.created_at).total_seconds())
+    KpiService.increment(connection, {
+        (responder, KpiService.local_day(target.responded_at)): {
+            'responses_count': 1, 'response_seconds_sum': seconds
+        }
+    })
@@ -0,0 +1,132 @@
+# backend/services/recaptcha_service.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from config import get_config
+
+# Carrega a configuração (chaves, timeout, backend)
+app_config = get_config()
+
+class RecaptchaUnavailableError(Exception):
+    """O serviço de verificação não respondeu a tempo (ou respondeu com erro HTTP)."""
+
+class GoogleRecaptchaVerifier:
+    """
+    Verificador real: chama o 'siteverify' do Google usando uma sessão HTTP
+    com pool de conexões (reaproveita o TLS) e timeout estrito.
+    """
+    VERIFY_URL = 'https://www.google.com/recaptcha/api/siteverify'
+
+    def __init__(self, secret: str, timeout, pool_size: int):
+        self.secret = secret
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+
+    def verify(self, token: str, remote_ip: Optional[str] = None) -> Dict:
+        payload = {'secret': self.secret, 'response': token}
+        if remote_ip:
+            payload['remoteip'] = remote_ip
+        try:
+            response = self.session.post(self.VERIFY_URL, data=payload, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise RecaptchaUnavailableError(str(e))
+
+class StubRecaptchaVerifier:
+    """
+    Verificador local (desenvolvimento e testes offline), sem rede.
+    Aceita qualquer token, exceto os que começam com 'fail'.
+    """
+    def __init__(self, score: float = 0.9):
+        self.score = score
+
+    def verify(self, token: str, remote_ip: Optional[str] = None) -> Dict:
+        if not token or token.startswith('fail'):
+            return {'success': False, 'error-codes': ['invalid-input-response']}
+        return {'success': True, 'score': self.score, 'hostname': 'localhost'}
+
+class RecaptchaService:
+    """
+    Serviço de verificação do reCAPTCHA usado no registro.
+
+    - O verificador é plugável (RECAPTCHA_BACKEND = 'google' ou 'stub',
+      ou RecaptchaService.set_verifier(...) nos testes).
+    - Um token aprovado fica num cache curto (RECAPTCHA_CACHE_TTL), ligado
+      ao IP, e vale para UM reenvio do formulário (ex: e-mail já em uso)
+      sem outra chamada externa. O primeiro acerto no cache o consome: o
+      Google recusa tokens repetidos e o cache não pode ser um passe livre.
+    """
+
+    _verifier = None
+    _cache: "OrderedDict[str, tuple]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_verifier(cls):
+        if cls._verifier is None:
+            if app_config.RECAPTCHA_BACKEND == 'stub':
+                cls._verifier = StubRecaptchaVerifier()
+            else:
+                cls._verifier = GoogleRecaptchaVerifier(
+                    app_config.RECAPTCHA_SECRET_KEY,
+                    app_config.RECAPTCHA_TIMEOUT,
+                    app_config.RECAPTCHA_POOL_SIZE
+                )
+        return cls._verifier
+
+    @classmethod
+    def set_verifier(cls, verifier):
+        """Troca o verificador (ex: StubRecaptchaVerifier nos testes) e limpa o cache."""
+        with cls._lock:
+            cls._verifier = verifier
+            cls._cache.clear()
+
+    @classmethod
+    def _cache_pop(cls, key: str) -> Optional[bool]:
+        """Resultado em cache (removido na leitura: cada entrada serve uma única vez)."""
+        with cls._lock:
+            entry = cls._cache.pop(key, None)
+            if not entry:
+                return None
+            expires_at, result = entry
+            if expires_at < time.monotonic():
+                return None
+            return result
+
+    @classmethod
+    def _cache_put(cls, key: str, result: bool):
+        with cls._lock:
+            cls._cache[key] = (time.monotonic() + app_config.RECAPTCHA_CACHE_TTL, result)
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > app_config.RECAPTCHA_CACHE_MAX:
+                cls._cache.popitem(last=False)
+
+    @classmethod
+    def verify(cls, token: str, remote_ip: Optional[str] = None) -> bool:
+        """
+        Retorna True se o token for válido e tiver score >= RECAPTCHA_MIN_SCORE.
+        Lança RecaptchaUnavailableError se o verificador não responder a tempo.
+        """
+        if not token or not isinstance(token, str):
+            return False
+
+        key = hashlib.sha256(f"{remote_ip or ''}\x1f{token}".encode('utf-8')).hexdigest()
+        cached = cls._cache_pop(key)
+        if cached is not None:
+            return cached
+
+        result = cls.get_verifier().verify(token, remote_ip)
+        valid = bool(result.get('success')) and result.get('score', 0) >= app_config.RECAPTCHA_MIN_SCORE
+        if valid:
+            # Só guarda sucessos (um token recusado pode ser corrigido pelo usuário),
+            # para um único reenvio do mesmo IP
+            cls._cache_put(key, True)
+        return valid
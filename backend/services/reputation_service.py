@@ -0,0 +1,167 @@
+# backend/services/reputation_service.py
+
+from typing import Dict, Optional
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
+from models.evaluations import Evaluation, CompanyReputation
+from models.negotiations import Negotiation
+from models.users import User
+from config import get_config
+from app import db
+
+# Carrega a configuração (meia-vida da média recente)
+app_config = get_config()
+
+EMPTY_REPUTATION = {
+    'ratings_count': 0,
+    'average': None,
+    'recent_average': None,
+    'histogram': {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0}
+}
+
+class ReputationService:
+    """
+    Serviço da reputação das empresas (tabela company_reputations).
+
+    Cada avaliação (1 a 5) é somada, na MESMA transação do insert, à
+    reputação da empresa avaliada (a contraparte de quem avaliou):
+    contagem, soma, histograma por estrelas e as somas com decaimento
+    exponencial da média recente. A leitura é uma busca pela chave primária.
+    """
+
+    @staticmethod
+    def half_life_seconds() -> float:
+        return app_config.REPUTATION_HALF_LIFE_DAYS * 86400
+
+    @staticmethod
+    def decay_since(column):
+        """Fator de decaimento (SQL) entre 'column' e agora."""
+        return func.power(0.5, func.extract('epoch', func.now() - column) / ReputationService.half_life_seconds())
+
+    @staticmethod
+    def rated_company_id(connection, negotiation_id: str, evaluator_id: str) -> Optional[str]:
+        """A empresa avaliada é o outro lado da negociação em relação a quem avaliou."""
+        negotiations, users = Negotiation.__table__, User.__table__
+        row = connection.execute(
+            select(negotiations.c.seller_company_id, negotiations.c.buyer_company_id,
+                   select(users.c.company_id).where(users.c.id == evaluator_id).scalar_subquery())
+            .where(negotiations.c.id == negotiation_id)
+        ).first()
+        if not row:
+            return None
+        seller_id, buyer_id, evaluator_company_id = row
+        if evaluator_company_id == seller_id:
+            return buyer_id
+        if evaluator_company_id == buyer_id:
+            return seller_id
+        # Avaliação de alguém de fora da negociação (ex: Admin): não conta
+        return None
+
+    @staticmethod
+    def add_rating(connection, company_id: str, rating: int):
+        """Soma uma avaliação à reputação da empresa com um único UPSERT."""
+        table = CompanyReputation.__table__
+        star = f"stars_{rating}"
+        values = {'company_id': company_id, 'ratings_count': 1, 'ratings_sum': rating,
+                  'decayed_sum': rating, 'decayed_count': 1}
+        values.update({f"stars_{n}": int(n == rating) for n in range(1, 6)})
+        stmt = pg_insert(table).values(**values)
+        factor = ReputationService.decay_since(table.c.decayed_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.company_id],
+            set_={
+                'ratings_count': table.c.ratings_count + 1,
+                'ratings_sum': table.c.ratings_sum + rating,
+                star: table.c[star] + 1,
+                'decayed_sum': table.c.decayed_sum * factor + rating,
+                'decayed_count': table.c.decayed_count * factor + 1,
+                'decayed_at': func.now(),
+                'updated_at': func.now()
+            }
+        )
+        connection.execute(stmt)
+
+    @staticmethod
+    def remove_rating(connection, company_id: str, rating: int, created_at):
+        """Desfaz uma avaliação (o peso dela na média recente é o decaído desde created_at)."""
+        table = CompanyReputation.__table__
+        star = f"stars_{rating}"
+        weight = ReputationService.decay_since(created_at) / ReputationService.decay_since(table.c.decayed_at)
+        connection.execute(
+            table.update().where(table.c.company_id == company_id).values(
+                ratings_count=func.greatest(table.c.ratings_count - 1, 0),
+                ratings_sum=func.greatest(table.c.ratings_sum - rating, 0),
+                **{star: func.greatest(table.c[star] - 1, 0)},
+                decayed_sum=func.greatest(table.c.decayed_sum - rating * weight, 0),
+                decayed_count=func.greatest(table.c.decayed_count - weight, 0),
+                updated_at=func.now()
+            )
+        )
+
+    @staticmethod
+    def get_reputation(company_id: str) -> Dict:
+        reputation = CompanyReputation.query.get(company_id)
+        return reputation.to_dict() if reputation else dict(EMPTY_REPUTATION)
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Recalcula todas as reputações a partir das avaliações.
+        Usado pelo comando 'flask rebuild_reputation'. Retorna o nº de empresas.
+        """
+        evaluator = db.aliased(User)
+        rated = db.case(
+            (evaluator.company_id == Negotiation.seller_company_id, Negotiation.buyer_company_id),
+            (evaluator.company_id == Negotiation.buyer_company_id, Negotiation.seller_company_id),
+            else_=None
+        ).label('company_id')
+        weight = ReputationService.decay_since(Evaluation.created_at)
+
+        try:
+            db.session.execute(db.text("LOCK TABLE company_reputations IN EXCLUSIVE MODE"))
+            rows = db.session.query(
+                rated,
+                func.count(Evaluation.id),
+                func.sum(Evaluation.rating),
+                *[func.count().filter(Evaluation.rating == n) for n in range(1, 6)],
+                func.sum(Evaluation.rating * weight),
+                func.sum(weight)
+            ).select_from(Evaluation) \
+                .join(Negotiation, Evaluation.negotiation_id == Negotiation.id) \
+                .join(evaluator, Evaluation.user_id == evaluator.id) \
+                .filter(Evaluation.rating.between(1, 5), rated.isnot(None)) \
+                .group_by(rated).all()
+
+            db.session.query(CompanyReputation).delete(synchronize_session=False)
+            db.session.bulk_insert_mappings(CompanyReputation, [{
+                'company_id': row[0],
+                'ratings_count': row[1],
+                'ratings_sum': row[2],
+                **{f"stars_{n}": row[2 + n] for n in range(1, 6)},
+                'decayed_sum': float(row[8] or 0),
+                'decayed_count': float(row[9] or 0)
+            } for row in rows])
+            db.session.commit()
+            return len(rows)
+        except Exception:
+            db.session.rollback()
+            raise
+
+# --- Eventos do ORM (registrados na importação deste módulo, feita no app.py) ---
+
+@event.listens_for(Evaluation, 'after_insert')
+def _evaluation_inserted(mapper, connection, target):
+    if target.rating not in (1, 2, 3, 4, 5):
+        return
+    company_id = ReputationService.rated_company_id(connection, target.negotiation_id, target.user_id)
+    if company_id:
+        ReputationService.add_rating(connection, company_id, target.rating)
+
+@event.listens_for(Evaluation, 'after_delete')
+def _evaluation_deleted(mapper, connection, target):
+    if target.rating not in (1, 2, 3, 4, 5) or target.created_at is None:
+        return
+    company_id = ReputationService.rated_company_id(connection, target.negotiation_id, target.user_id)
+    if company_id:
+        ReputationService.remove_rating(connection, company_id, target.rating, target.created_at)
@@ -1,9 +1,15 @@
 # backend/services/role_service.py
 
-from typing import List  # LINHA CRÍTICA QUE ESTAVA FALTANDO
-from models.users import User, Role
+from typing import List, Dict, Optional  # LINHA CRÍTICA QUE ESTAVA FALTANDO
+from models.users import User
+from models.audit_log import AuditLog
+from services.counter_service import CounterService
+from services.identity_cache import IdentityCache, RoleSnapshot
+from services.date_service import DateService
 from utils.constants import Cargos
 from app import db
+from sqlalchemy import and_, select, update
+import json
 from functools import wraps
 from utils.security import get_user_identity, get_user_role_from_token, jwt_required
 from flask import jsonify
@@ -14,16 +20,16 @@ class RoleService:
     """
 
     @staticmethod
-    def get_role_by_level(level: int) -> Role:
-        """Encontra um objeto Role pelo seu nível (0-7)."""
-        return Role.query.filter_by(permission_level=level).first()
+    def get_role_by_level(level: int) -> RoleSnapshot:
+        """Encontra um cargo pelo seu nível (0-7), a partir do cache de cargos."""
+        return IdentityCache.get_role_by_level(level)
 
     @staticmethod
     def change_user_role(user_id: str, new_role_id: int) -> bool:
         """Muda o cargo de um usuário (usando o ID do cargo)."""
         try:
             user = User.query.get(user_id)
-            new_role = Role.query.get(new_role_id)
+            new_role = IdentityCache.get_role_by_id(new_role_id)
             
             if not user or not new_role:
                 return False
@@ -48,6 +54,105 @@ class RoleService:
             
         return RoleService.change_user_role(user_id, new_role.id)
 
+    # Ações aceitas por bulk_update_users
+    BULK_ACTIONS = ('change_role', 'block', 'unblock')
+
+    @staticmethod
+    def bulk_update_users(action: str, actor_id: str, actor_level: int, user_ids: Optional[List[str]] = None,
+                          criteria: Optional[List] = None, new_role_level: Optional[int] = None,
+                          days: Optional[int] = None, ip_address: Optional[str] = None) -> Dict:
+        """
+        Aplica uma ação ('change_role', 'block' ou 'unblock') a vários utilizadores
+        com um único UPDATE, seja por lista de IDs ('user_ids') ou por filtro ('criteria').
+
+        Nunca atinge o próprio autor nem utilizadores de nível igual ou superior
+        ao dele (nível menor ou igual a 'actor_level'): esses ficam como "forbidden".
+        Grava UM registo de auditoria para o lote e ajusta os contadores de
+        cargos (o UPDATE em massa não dispara os eventos do ORM).
+        Retorna {"results": {user_id: "updated" | "forbidden" | "not_found"},
+                 "updated": n, "forbidden": n, "not_found": n}.
+        Lança ValueError para parâmetros inválidos.
+        """
+        if action not in RoleService.BULK_ACTIONS:
+            raise ValueError(f"Ação inválida. Use: {', '.join(RoleService.BULK_ACTIONS)}.")
+        if not user_ids and not criteria:
+            raise ValueError("Informe 'user_ids' ou ao menos um filtro.")
+
+        # Valores a aplicar
+        if action == 'change_role':
+            if new_role_level is None:
+                raise ValueError("new_role_level é obrigatório para 'change_role'.")
+            new_role = RoleService.get_role_by_level(int(new_role_level))
+            if not new_role:
+                raise ValueError(f"Cargo com nível {new_role_level} não encontrado.")
+            values = {'role_id': new_role.id}
+        elif action == 'block':
+            blocked_until = DateService.add_days(DateService.get_now(), int(days)) if days else None
+            values = {'is_blocked': True, 'blocked_until': blocked_until}
+        else:
+            values = {'is_blocked': False, 'blocked_until': None}
+
+        users = User.__table__
+        conditions = [users.c.id.in_(user_ids)] if user_ids else list(criteria)
+
+        # Alvos permitidos: nem o próprio autor, nem cargos de nível igual ou acima do dele
+        privileged_role_ids = [role.id for role in IdentityCache.get_roles() if role.permission_level <= actor_level]
+        allowed = and_(users.c.id != actor_id, users.c.role_id.notin_(privileged_role_ids))
+
+        try:
+            forbidden_ids = db.session.execute(select(users.c.id).where(*conditions, ~allowed)).scalars().all()
+
+            # Sub-select com o cargo ANTERIOR de cada linha (para os contadores),
+            # travando as linhas; o UPDATE ... FROM devolve tudo num só statement.
+            previous = select(users.c.id.label('target_id'), users.c.role_id.label('old_role_id')) \
+                .where(*conditions, allowed).with_for_update().subquery()
+            stmt = update(users).where(users.c.id == previous.c.target_id).values(**values) \
+                .returning(users.c.id, previous.c.old_role_id)
+            rows = db.session.execute(stmt).all()
+
+            updated_ids = [row.id for row in rows]
+            results = {user_id: 'updated' for user_id in updated_ids}
+            results.update({user_id: 'forbidden' for user_id in forbidden_ids})
+            if user_ids:
+                for user_id in user_ids:
+                    results.setdefault(user_id, 'not_found')
+
+            if action == 'change_role':
+                deltas = {}
+                for row in rows:
+                    if row.old_role_id != new_role.id:
+                        old_key = CounterService.user_role_key(row.old_role_id)
+                        deltas[old_key] = deltas.get(old_key, 0) - 1
+                        new_key = CounterService.user_role_key(new_role.id)
+                        deltas[new_key] = deltas.get(new_key, 0) + 1
+                CounterService.increment(db.session.connection(), deltas)
+
+            # Um único registo de auditoria para o lote
+            db.session.add(AuditLog(
+                action=f"bulk_{action}",
+                user_id=actor_id,
+                ip_address=ip_address,
+                target_type='user',
+                details_json=json.dumps({
+                    "user_ids": updated_ids,
+                    "new_role_level": new_role_level,
+                    "days": days,
+                    "by_filter": not user_ids,
+                    "forbidden": len(forbidden_ids)
+                })
+            ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        # O UPDATE em massa não passa pelos eventos do ORM
+        IdentityCache.invalidate_users(updated_ids)
+
+        not_found = sum(1 for outcome in results.values() if outcome == 'not_found')
+        return {"results": results, "updated": len(updated_ids), "forbidden": len(forbidden_ids),
+                "not_found": not_found}
+
     @staticmethod
     def is_admin(user: User) -> bool:
         """Verifica se o usuário é Admin ZIPBUM (Nível 0)."""
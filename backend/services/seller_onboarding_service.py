@@ -0,0 +1,159 @@
+# backend/services/seller_onboarding_service.py
+
+import json
+import uuid
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from models.users import User
+from models.audit_log import AuditLog
+from services.counter_service import CounterService
+from services.identity_cache import IdentityCache
+from services.import_service import ImportService
+from utils.constants import Cargos
+from utils.password_pool import hash_many
+from utils.vectorized_validators import email_valid
+from app import db
+
+class SellerOnboardingService:
+    """
+    Cadastro em massa de Vendedores (Nível 5) a partir de uma planilha.
+
+    Todas as validações são feitas por coluna (pandas), a checagem de
+    e-mails já cadastrados é uma única query, os hashes bcrypt são gerados
+    em paralelo no pool e os INSERTs vão em lotes.
+    """
+
+    # Nomes aceitos para cada coluna (cabeçalho normalizado em minúsculas)
+    COLUMN_ALIASES = {
+        'full_name': ['full_name', 'nome', 'nome completo', 'nome_completo'],
+        'email': ['email', 'e-mail', 'e_mail'],
+        'password': ['password', 'senha']
+    }
+
+    MAX_ROWS = 2000
+    INSERT_BATCH_SIZE = 500
+
+    @staticmethod
+    def normalize_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
+        """Renomeia as colunas da planilha para full_name / email / password."""
+        headers = {str(col).strip().lower(): col for col in df.columns}
+        rename = {}
+        for target, aliases in SellerOnboardingService.COLUMN_ALIASES.items():
+            found = next((headers[alias] for alias in aliases if alias in headers), None)
+            if found is None:
+                return None, f"Coluna obrigatória ausente: '{target}' (aceita: {', '.join(aliases)})."
+            rename[found] = target
+        return df.rename(columns=rename)[list(SellerOnboardingService.COLUMN_ALIASES)], None
+
+    @staticmethod
+    def validate(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Validação vetorizada. Retorna {mensagem_de_erro: máscara booleana das linhas com erro}.
+        """
+        full_name = df['full_name'].str.strip()
+        email = df['email']
+        password = df['password']
+
+        valid_email = email_valid(email)
+        strong_password = (
+            (password.str.len() >= 8)
+            & password.str.contains(r'[A-Z]', regex=True)
+            & password.str.contains(r'[a-z]', regex=True)
+            & password.str.contains(r'[0-9]', regex=True)
+        )
+
+        return {
+            "Nome é obrigatório.": (full_name == '').to_numpy(),
+            "Formato de e-mail inválido.": ~valid_email,
+            "Senha fraca. Use 8+ caracteres, maiúscula, minúscula e número.": (~strong_password).to_numpy(),
+            "E-mail repetido na planilha.": (email.duplicated(keep='first') & valid_email).to_numpy()
+        }
+
+    @staticmethod
+    def onboard(df: pd.DataFrame, company_id: str, actor_id: str, ip_address: str = None) -> Dict:
+        """
+        Cria os Vendedores válidos da planilha na empresa 'company_id'.
+        Retorna o relatório por linha:
+        {"created": n, "failed": n, "rows": [{"row", "email", "status", "errors"}]}
+        """
+        df = df.copy()
+        df['email'] = df['email'].str.strip().str.lower()
+        row_count = len(df)
+
+        checks = SellerOnboardingService.validate(df)
+        errors: List[List[str]] = [[] for _ in range(row_count)]
+        for message, mask in checks.items():
+            for position in np.flatnonzero(mask):
+                errors[position].append(message)
+
+        # E-mails já cadastrados: uma única query para a planilha toda
+        candidate_emails = df['email'][[not e for e in errors]].tolist()
+        existing = set()
+        if candidate_emails:
+            existing = {row.email for row in db.session.query(User.email).filter(User.email.in_(candidate_emails))}
+        if existing:
+            for position in np.flatnonzero(df['email'].isin(existing).to_numpy()):
+                if not errors[position]:
+                    errors[position].append("Este e-mail já está em uso.")
+
+        valid_positions = [position for position in range(row_count) if not errors[position]]
+        created_ids = []
+
+        if valid_positions:
+            seller_role = IdentityCache.get_role_by_level(Cargos.VENDEDOR)
+            if not seller_role:
+                raise RuntimeError("Cargo de Vendedor não encontrado no sistema.")
+
+            valid = df.iloc[valid_positions]
+            # Hashes bcrypt em paralelo (pool de processos)
+            password_hashes = hash_many(valid['password'].tolist())
+
+            rows = [{
+                'id': str(uuid.uuid4()),
+                'full_name': full_name.strip(),
+                'email': email,
+                'password_hash': password_hash,
+                'company_id': company_id,
+                'role_id': seller_role.id,
+                'is_active': True,
+                'is_blocked': False
+            } for full_name, email, password_hash in zip(valid['full_name'], valid['email'], password_hashes)]
+
+            try:
+                for start in range(0, len(rows), SellerOnboardingService.INSERT_BATCH_SIZE):
+                    db.session.execute(insert(User.__table__), rows[start:start + SellerOnboardingService.INSERT_BATCH_SIZE])
+
+                # INSERT em massa não dispara os eventos do ORM
+                CounterService.increment(db.session.connection(), {
+                    CounterService.USERS_TOTAL: len(rows),
+                    CounterService.user_role_key(seller_role.id): len(rows)
+                })
+                created_ids = [row['id'] for row in rows]
+                db.session.add(AuditLog(
+                    action='bulk_add_sellers',
+                    user_id=actor_id,
+                    ip_address=ip_address,
+                    target_type='company',
+                    target_id=company_id,
+                    details_json=json.dumps({"user_ids": created_ids})
+                ))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+        report = [{
+            # Índice do DataFrame, não a posição: linhas vazias já foram descartadas
+            "row": ImportService.sheet_row(df.index[position]),
+            "email": df['email'].iat[position],
+            "status": "error" if errors[position] else "created",
+            "errors": errors[position]
+        } for position in range(row_count)]
+
+        return {
+            "created": len(created_ids),
+            "failed": row_count - len(created_ids),
+            "rows": report
+        }
@@ -0,0 +1,223 @@
+# backend/services/throttle_service.py
+
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+from config import get_config
+
+# Carrega a configuração (limites e backend)
+app_config = get_config()
+
+class MemoryThrottleBackend:
+    """
+    Backend em memória (um processo). Guarda só as contagens das
+    janelas fixas (atual e anterior) de cada chave.
+    """
+    # Acima deste número de chaves, as expiradas são descartadas
+    PRUNE_THRESHOLD = 50000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, tuple] = {}  # chave -> (expira_em, contagem)
+
+    def _prune(self, now: float):
+        expired = [key for key, (expires_at, _) in self._counts.items() if expires_at <= now]
+        for key in expired:
+            del self._counts[key]
+
+    def incr(self, key: str, ttl: int, amount: int = 1) -> int:
+        now = time.time()
+        with self._lock:
+            expires_at, count = self._counts.get(key, (now + ttl, 0))
+            if expires_at <= now:
+                expires_at, count = now + ttl, 0
+            count = max(0, count + amount)
+            self._counts[key] = (expires_at, count)
+            if len(self._counts) > self.PRUNE_THRESHOLD:
+                self._prune(now)
+            return count
+
+    def get_many(self, keys: List[str]) -> List[int]:
+        now = time.time()
+        with self._lock:
+            values = []
+            for key in keys:
+                expires_at, count = self._counts.get(key, (0, 0))
+                values.append(count if expires_at > now else 0)
+            return values
+
+    def delete(self, keys: List[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._counts.pop(key, None)
+
+class RedisThrottleBackend:
+    """
+    Backend compartilhado (vários workers/servidores) em Redis.
+    Requer o pacote opcional 'redis'.
+    """
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("LOGIN_THROTTLE_BACKEND='redis' requer o pacote 'redis' (pip install redis).")
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def incr(self, key: str, ttl: int, amount: int = 1) -> int:
+        pipe = self._client.pipeline()
+        pipe.incrby(key, amount)
+        pipe.expire(key, ttl)
+        count = pipe.execute()[0]
+        if count < 0:
+            # Devolução de uma reserva cuja janela já expirou
+            self._client.set(key, 0, keepttl=True)
+            return 0
+        return count
+
+    def get_many(self, keys: List[str]) -> List[int]:
+        return [int(value or 0) for value in self._client.mget(keys)]
+
+    def delete(self, keys: List[str]) -> None:
+        self._client.delete(*keys)
+
+class ThrottleService:
+    """
+    Limitador de taxa por janela deslizante (aproximação de duas janelas fixas:
+    contagem_atual + contagem_anterior * fração da janela anterior ainda "visível").
+    Custa O(1) em memória por chave e funciona igual nos dois backends.
+    """
+
+    _backend = None
+    _backend_lock = threading.Lock()
+
+    @classmethod
+    def get_backend(cls):
+        with cls._backend_lock:
+            if cls._backend is None:
+                if app_config.LOGIN_THROTTLE_BACKEND == 'redis':
+                    cls._backend = RedisThrottleBackend(app_config.LOGIN_THROTTLE_REDIS_URL)
+                else:
+                    cls._backend = MemoryThrottleBackend()
+            return cls._backend
+
+    @classmethod
+    def set_backend(cls, backend):
+        """Troca o backend (ex: um MemoryThrottleBackend novo nos testes)."""
+        with cls._backend_lock:
+            cls._backend = backend
+
+    @staticmethod
+    def _window_keys(scope: str, key: str, window: int, now: float):
+        index = int(now // window)
+        prefix = f"throttle:{scope}:{key}"
+        return f"{prefix}:{index}", f"{prefix}:{index - 1}", (now % window) / window
+
+    @classmethod
+    def hit(cls, scope: str, key: str, window: int):
+        """Registra uma tentativa na janela atual."""
+        current_key, _, _ = cls._window_keys(scope, key, window, time.time())
+        # TTL de duas janelas: a atual ainda é usada como "anterior" na próxima
+        cls.get_backend().incr(current_key, window * 2)
+
+    @classmethod
+    def retry_after(cls, scope: str, key: str, limit: int, window: int) -> int:
+        """
+        Retorna 0 se a chave ainda está dentro do limite, ou os segundos
+        estimados até que uma nova tentativa seja aceita.
+        """
+        now = time.time()
+        current_key, previous_key, elapsed = cls._window_keys(scope, key, window, now)
+        current, previous = cls.get_backend().get_many([current_key, previous_key])
+        return cls._wait(current, previous, elapsed, now, limit, window)
+
+    @classmethod
+    def acquire(cls, scope: str, key: str, limit: int, window: int) -> int:
+        """
+        Reserva uma tentativa: incrementa a janela atual e compara com o
+        limite na mesma operação (INCR atômico). Com retry_after + hit,
+        requisições simultâneas liam a mesma contagem e passavam todas.
+        Retorna 0 se a tentativa cabe no limite; senão devolve a reserva e
+        retorna os segundos de espera.
+        """
+        now = time.time()
+        current_key, previous_key, elapsed = cls._window_keys(scope, key, window, now)
+        backend = cls.get_backend()
+        current = backend.incr(current_key, window * 2)
+        previous, = backend.get_many([previous_key])
+        wait = cls._wait(current - 1, previous, elapsed, now, limit, window)
+        if wait:
+            backend.incr(current_key, window * 2, amount=-1)
+        return wait
+
+    @classmethod
+    def release(cls, scope: str, key: str, window: int):
+        """Devolve uma tentativa reservada com acquire (ex: a operação nem chegou a ser feita)."""
+        current_key, _, _ = cls._window_keys(scope, key, window, time.time())
+        cls.get_backend().incr(current_key, window * 2, amount=-1)
+
+    @staticmethod
+    def _wait(current: int, previous: int, elapsed: float, now: float, limit: int, window: int) -> int:
+        """Segundos de espera para as contagens (atual e anterior) da janela deslizante."""
+        estimated = current + previous * (1 - elapsed)
+        if estimated < limit:
+            return 0
+        if current >= limit or previous == 0:
+            # Só libera na próxima janela
+            return max(1, math.ceil(window - (now % window)))
+        # Tempo até o peso da janela anterior cair o suficiente
+        needed_elapsed = 1 - (limit - current) / previous
+        return max(1, math.ceil((needed_elapsed - elapsed) * window))
+
+    @classmethod
+    def reset(cls, scope: str, key: str, window: int):
+        current_key, previous_key, _ = cls._window_keys(scope, key, window, time.time())
+        cls.get_backend().delete([current_key, previous_key])
+
+class LoginThrottle:
+    """
+    Regras de limitação do login (/api/auth/login), verificadas ANTES de
+    qualquer consulta ao banco ou bcrypt:
+      - por IP: todas as tentativas
+      - por conta (e-mail): apenas as tentativas falhas; zera no sucesso.
+        A tentativa é reservada antes do bcrypt (conta como falha até o
+        sucesso), para rajadas simultâneas não passarem todas do limite.
+    Se o backend (ex: Redis) falhar, o login segue sem limitação (fail open):
+    uma queda do Redis não pode derrubar o login de todo mundo.
+    """
+
+    @staticmethod
+    def _fail_open(action: str, error: Exception):
+        print(f"[Throttle] Erro no backend ao {action}; login sem limitação: {error}")
+
+    @staticmethod
+    def acquire(ip: str, email: str) -> Optional[int]:
+        """
+        Reserva a tentativa por IP e por conta.
+        Retorna os segundos de espera (Retry-After) ou None se liberado.
+        """
+        try:
+            wait = ThrottleService.acquire('login_ip', ip, app_config.LOGIN_THROTTLE_IP_LIMIT,
+                                           app_config.LOGIN_THROTTLE_IP_WINDOW)
+            if not wait:
+                wait = ThrottleService.acquire('login_account', email, app_config.LOGIN_THROTTLE_ACCOUNT_LIMIT,
+                                               app_config.LOGIN_THROTTLE_ACCOUNT_WINDOW)
+            return wait or None
+        except Exception as e:
+            LoginThrottle._fail_open("verificar o limite", e)
+            return None
+
+    @staticmethod
+    def release(email: str):
+        """A senha não chegou a ser verificada (ex: pool ocupado): devolve a reserva da conta."""
+        try:
+            ThrottleService.release('login_account', email, app_config.LOGIN_THROTTLE_ACCOUNT_WINDOW)
+        except Exception as e:
+            LoginThrottle._fail_open("devolver a tentativa", e)
+
+    @staticmethod
+    def register_success(email: str):
+        try:
+            ThrottleService.reset('login_account', email, app_config.LOGIN_THROTTLE_ACCOUNT_WINDOW)
+        except Exception as e:
+            LoginThrottle._fail_open("zerar as falhas", e)
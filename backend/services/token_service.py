@@ -0,0 +1,101 @@
+# backend/services/token_service.py
+
+import datetime
+import json
+import uuid
+from typing import Tuple
+from flask_jwt_extended import decode_token
+from models.refresh_tokens import RefreshToken
+from models.audit_log import AuditLog
+from services.date_service import DateService
+from utils.security import create_access_token, create_refresh_token
+from config import get_config
+from app import db
+
+# Carrega a configuração (janela de tolerância do refresh)
+app_config = get_config()
+
+class RefreshTokenReuseError(Exception):
+    """Um refresh token já consumido (ou revogado) foi apresentado de novo."""
+
+class TokenService:
+    """
+    Serviço de emissão e rotação dos tokens JWT (access + refresh).
+    """
+
+    @staticmethod
+    def issue_tokens(identity, family_id: str = None) -> Tuple[str, str]:
+        """
+        Emite um par (access_token, refresh_token) para a 'identity'
+        (objeto User, fotografia do IdentityCache ou ID) e registra o
+        refresh token na família informada (ou numa nova família).
+        Não faz commit: quem chama confirma a transação.
+        """
+        family_id = family_id or str(uuid.uuid4())
+        access_token = create_access_token(identity=identity)
+        refresh_token = create_refresh_token(identity=identity, additional_claims={"fam": family_id})
+
+        decoded = decode_token(refresh_token)
+        db.session.add(RefreshToken(
+            jti=decoded['jti'],
+            user_id=decoded['sub'],
+            family_id=family_id,
+            expires_at=datetime.datetime.fromtimestamp(decoded['exp'], tz=datetime.timezone.utc)
+        ))
+        return access_token, refresh_token
+
+    @staticmethod
+    def revoke_family(family_id: str):
+        """Revoga todos os refresh tokens ainda válidos de uma família."""
+        db.session.query(RefreshToken) \
+            .filter(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None)) \
+            .update({RefreshToken.revoked_at: DateService.get_now()}, synchronize_session=False)
+
+    @staticmethod
+    def rotate(jti: str, identity, ip_address: str = None) -> Tuple[str, str]:
+        """
+        Consome o refresh token 'jti' e emite o próximo par da mesma família.
+        Lança RefreshTokenReuseError (e revoga a família) se o token já
+        tiver sido usado ou revogado. Um token trocado há menos de
+        REFRESH_TOKEN_REUSE_GRACE_SECONDS, pelo mesmo IP, ainda é aceito
+        UMA vez (renovações simultâneas de duas abas do mesmo navegador);
+        uma segunda reapresentação é tratada como roubo.
+        """
+        try:
+            # FOR UPDATE: dois /refresh simultâneos com o mesmo token não passam os dois
+            token = db.session.query(RefreshToken).filter_by(jti=jti).with_for_update().first()
+            if not token:
+                raise RefreshTokenReuseError("Refresh token desconhecido.")
+
+            now = DateService.get_now()
+            grace = datetime.timedelta(seconds=app_config.REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+            if (token.revoked_at is None and token.used_at is not None and token.grace_used_at is None
+                    and now - token.used_at <= grace and ip_address == token.used_ip):
+                token.grace_used_at = now
+                tokens = TokenService.issue_tokens(identity, family_id=token.family_id)
+                db.session.commit()
+                return tokens
+
+            if token.used_at is not None or token.revoked_at is not None:
+                TokenService.revoke_family(token.family_id)
+                db.session.add(AuditLog(
+                    action='refresh_token_reuse',
+                    user_id=token.user_id,
+                    ip_address=ip_address,
+                    target_type='refresh_token_family',
+                    target_id=token.family_id,
+                    details_json=json.dumps({"jti": jti, "grace_used": token.grace_used_at is not None})
+                ))
+                db.session.commit()
+                raise RefreshTokenReuseError("Refresh token reutilizado. Sessão revogada.")
+
+            token.used_at = now
+            token.used_ip = ip_address
+            tokens = TokenService.issue_tokens(identity, family_id=token.family_id)
+            db.session.commit()
+            return tokens
+        except RefreshTokenReuseError:
+            raise
+        except Exception:
+            db.session.rollback()
+            raise
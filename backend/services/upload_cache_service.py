@@ -0,0 +1,244 @@
+# backend/services/upload_cache_service.py
+
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+from services.csv_service import CSVService
+
+# Coluna extra com o índice original (número da linha na planilha)
+ROW_INDEX_COLUMN = '__row__'
+CACHE_SUFFIX = '.feather'
+
+class UploadCacheService:
+    """
+    Cache colunar das planilhas já lidas, ao lado do upload
+    (ex: static/uploads/<id>_pedidos.csv.feather).
+
+    A planilha é lida uma única vez; as etapas seguintes (mapeamento,
+    validação, importação) carregam do arquivo Feather/Arrow sem compressão,
+    mapeado em memória, apenas as colunas de que precisam.
+    O cache é ignorado (e apagado) se o upload for mais novo, e é removido
+    junto com ele em remove(). Uploads pequenos, lidos direto da memória
+    (UploadStoreService.ingest), existem só como cache, sem o arquivo original.
+    Requer o pacote opcional 'pyarrow'; sem ele, a planilha é relida.
+    """
+
+    _arrow_available = None
+
+    @classmethod
+    def _feather(cls):
+        if cls._arrow_available is None:
+            try:
+                import pyarrow.feather  # noqa: F401
+                cls._arrow_available = True
+            except ImportError:
+                print("[UploadCache] 'pyarrow' não instalado; cache colunar desativado.")
+                cls._arrow_available = False
+        if not cls._arrow_available:
+            return None
+        import pyarrow.feather as feather
+        return feather
+
+    @staticmethod
+    def cache_path(file_path: str) -> str:
+        return file_path + CACHE_SUFFIX
+
+    @staticmethod
+    def _temporary(target: str) -> str:
+        return f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    @staticmethod
+    def _to_table(df: pd.DataFrame, schema=None):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.append_column(ROW_INDEX_COLUMN, pa.array(df.index.to_numpy(), type=pa.int64()))
+        # Colunas só com vazios num bloco viram null no Arrow: usa o schema do arquivo
+        return table.cast(schema) if schema is not None else table
+
+    @classmethod
+    def store(cls, file_path: str, df: pd.DataFrame) -> bool:
+        """Grava o DataFrame (de strings) no cache. Retorna False se não foi possível."""
+        feather = cls._feather()
+        if feather is None:
+            return False
+
+        table = cls._to_table(df)
+        target = cls.cache_path(file_path)
+        temporary = cls._temporary(target)
+        try:
+            # Sem compressão: permite ler por memory-map sem descompactar
+            feather.write_feather(table, temporary, compression='uncompressed')
+            os.replace(temporary, target) # Atômico: leitores nunca veem um arquivo pela metade
+            return True
+        except Exception as e:
+            print(f"[UploadCache] Erro ao gravar cache de {file_path}: {e}")
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return False
+
+    @classmethod
+    def store_chunks(cls, file_path: str, chunks: Iterable[pd.DataFrame]) -> bool:
+        """
+        Grava o cache a partir de blocos (CSVService.iter_chunks), sem ter a
+        planilha inteira na memória: cada bloco vira um record batch do arquivo.
+        Retorna False se não foi possível (sem 'pyarrow' ou planilha vazia).
+        """
+        if cls._feather() is None:
+            return False
+        import pyarrow as pa
+
+        target = cls.cache_path(file_path)
+        temporary = cls._temporary(target)
+        writer = None
+        try:
+            for chunk in chunks:
+                if writer is None:
+                    schema = pa.schema([(str(column), pa.string()) for column in chunk.columns]
+                                       + [(ROW_INDEX_COLUMN, pa.int64())])
+                    # Formato IPC de arquivo = Feather v2 (sem compressão)
+                    writer = pa.ipc.new_file(temporary, schema)
+                writer.write_table(cls._to_table(chunk, schema))
+            if writer is None:
+                return False
+            writer.close()
+            writer = None
+            os.replace(temporary, target)
+            return True
+        except Exception as e:
+            print(f"[UploadCache] Erro ao gravar cache de {file_path}: {e}")
+            return False
+        finally:
+            if writer is not None:
+                writer.close()
+            cls._remove_quietly(temporary)
+
+    @classmethod
+    def load(cls, file_path: str, columns: Optional[List[str]] = None,
+             rows: Optional[int] = None, offset: int = 0) -> Optional[pd.DataFrame]:
+        """
+        Carrega do cache (só as 'columns' e as 'rows' linhas a partir de
+        'offset', se informadas) ou None se não houver cache válido.
+        """
+        feather = cls._feather()
+        target = cls.cache_path(file_path)
+        if feather is None or not os.path.exists(target):
+            return None
+        if os.path.exists(file_path) and os.path.getmtime(target) < os.path.getmtime(file_path):
+            # Upload substituído: o cache expira com ele
+            cls._remove_quietly(target)
+            return None
+
+        wanted = None if columns is None else list(columns) + [ROW_INDEX_COLUMN]
+        try:
+            table = feather.read_table(target, columns=wanted, memory_map=True)
+        except Exception as e:
+            print(f"[UploadCache] Cache inválido para {file_path}: {e}")
+            cls._remove_quietly(target)
+            return None
+        if rows is not None or offset:
+            table = table.slice(offset, rows) # Sem cópia: só as linhas convertidas para pandas
+        df = table.to_pandas()
+        return df.set_index(ROW_INDEX_COLUMN).rename_axis(None)
+
+    @classmethod
+    def read(cls, file_path: str, columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, str]:
+        """
+        Lê a planilha do cache colunar ou, na primeira vez, do arquivo
+        original (gravando o cache). Retorna (DataFrame, erro).
+        """
+        cached_columns = cls.columns(file_path)
+        if cached_columns is not None and columns is not None:
+            missing = [column for column in columns if column not in cached_columns]
+            if missing:
+                return None, f"Colunas não encontradas na planilha: {', '.join(missing)}."
+
+        df = cls.load(file_path, columns)
+        if df is not None:
+            return df, None
+
+        df, error = CSVService.read_dataframe(file_path)
+        if error:
+            return None, error
+        cls.store(file_path, df)
+
+        if columns is not None:
+            missing = [column for column in columns if column not in df.columns]
+            if missing:
+                return None, f"Colunas não encontradas na planilha: {', '.join(missing)}."
+            df = df[list(columns)]
+        return df, None
+
+    @classmethod
+    def ensure(cls, file_path: str) -> Tuple[bool, str]:
+        """
+        Garante o cache lendo a planilha em blocos (modo de memória limitada).
+        Retorna (cache disponível, erro); sem 'pyarrow', (False, None).
+        """
+        if cls._feather() is None:
+            return False, None
+        if cls.row_count(file_path) is None:
+            if not os.path.exists(file_path):
+                return False, "Arquivo não encontrado no servidor."
+            try:
+                stored = cls.store_chunks(file_path, CSVService.iter_chunks(file_path))
+            except Exception as e:
+                print(f"Erro ao ler planilha: {e}")
+                return False, f"Erro ao processar o arquivo: {e}"
+            if not stored:
+                return False, "A planilha está vazia ou em formato incorreto."
+        if not cls.row_count(file_path):
+            return False, "A planilha está vazia ou em formato incorreto."
+        return True, None
+
+    @classmethod
+    def row_count(cls, file_path: str) -> Optional[int]:
+        """Quantidade de linhas no cache (lê só os metadados), ou None se não houver cache."""
+        target = cls.cache_path(file_path)
+        if cls._feather() is None or not os.path.exists(target):
+            return None
+        import pyarrow as pa
+        try:
+            with pa.memory_map(target) as source:
+                reader = pa.ipc.open_file(source)
+                return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        except Exception:
+            return None
+
+    @classmethod
+    def preview(cls, file_path: str, rows: int = 10) -> Tuple[List[str], List[Dict]]:
+        """
+        Cabeçalhos e primeiras 'rows' linhas a partir do cache (upload repetido),
+        sem reler a planilha. Retorna (None, None) se não houver cache válido.
+        """
+        df = cls.load(file_path, rows=rows)
+        if df is None:
+            return None, None
+        return list(df.columns), df.to_dict('records')
+
+    @classmethod
+    def columns(cls, file_path: str) -> Optional[List[str]]:
+        """Colunas da planilha em cache (lê só o schema), ou None."""
+        feather = cls._feather()
+        target = cls.cache_path(file_path)
+        if feather is None or not os.path.exists(target):
+            return None
+        import pyarrow.ipc as ipc
+        try:
+            with ipc.open_file(target) as reader:
+                return [name for name in reader.schema.names if name != ROW_INDEX_COLUMN]
+        except Exception:
+            return None
+
+    @classmethod
+    def remove(cls, file_path: str):
+        """Remove o upload e o seu cache."""
+        cls._remove_quietly(cls.cache_path(file_path))
+        cls._remove_quietly(file_path)
+
+    @staticmethod
+    def _remove_quietly(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,357 @@
+# backend/services/upload_store_service.py
+
+import hashlib
+import io
+import os
+import tempfile
+import time
+from typing import BinaryIO, Dict, List, Tuple
+from flask import Request
+from models.imports import ImportBatch
+from services.csv_service import CSVService
+from services.upload_cache_service import UploadCacheService, CACHE_SUFFIX
+from utils import memory_meter
+from config import get_config
+
+# Carrega a configuração (UPLOAD_FOLDER, TTL e cota)
+app_config = get_config()
+
+# Bytes lidos por vez ao copiar um stream para o spool
+STREAM_BLOCK_BYTES = 1024 * 1024
+# Prefixo dos arquivos temporários de upload em UPLOAD_FOLDER
+TEMP_PREFIX = '.upload-'
+# Temporários mais antigos que isso são lixo de uploads interrompidos
+TEMP_MAX_AGE_SECONDS = 3600
+
+class UploadSpool(io.BufferedIOBase):
+    """
+    Destino dos arquivos recebidos no multipart (ver UploadRequest).
+
+    Guarda os bytes em memória até UPLOAD_SPOOL_BYTES e, acima disso, num
+    arquivo temporário nomeado em UPLOAD_FOLDER (que depois vira o upload
+    definitivo sem cópia). O SHA-256 é calculado durante a escrita, na
+    mesma passada em que o corpo da requisição é lido.
+    É um io.BufferedIOBase: o pandas o reconhece como arquivo binário e o
+    decodifica com a codificação detectada (TextIOWrapper).
+    """
+
+    mode = 'w+b'
+
+    def __init__(self, threshold: int = None):
+        super().__init__()
+        self.threshold = app_config.UPLOAD_SPOOL_BYTES if threshold is None else threshold
+        self.size = 0
+        self.path = None
+        self._hash = hashlib.sha256()
+        self._memory = io.BytesIO()
+        self._file = None
+
+    @classmethod
+    def from_stream(cls, stream: BinaryIO) -> 'UploadSpool':
+        """Copia um stream qualquer (ex: upload fora do UploadRequest) para um spool."""
+        spool = cls()
+        while True:
+            block = stream.read(STREAM_BLOCK_BYTES)
+            if not block:
+                break
+            spool.write(block)
+        spool.seek(0)
+        return spool
+
+    @property
+    def in_memory(self) -> bool:
+        return self._file is None
+
+    @property
+    def buffer(self) -> BinaryIO:
+        """O arquivo ou buffer em uso (para ler de volta)."""
+        return self._memory if self._file is None else self._file
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def write(self, data: bytes) -> int:
+        self._hash.update(data)
+        self.size += len(data)
+        if self._file is None and self.size > self.threshold:
+            self._rollover()
+        return self.buffer.write(data)
+
+    def _rollover(self):
+        """Passou do limite: despeja o que está em memória num arquivo temporário."""
+        descriptor, self.path = tempfile.mkstemp(dir=UploadStoreService.folder(), prefix=TEMP_PREFIX, suffix='.tmp')
+        self._file = os.fdopen(descriptor, 'w+b')
+        self._file.write(self._memory.getbuffer())
+        self._memory = None
+
+    def write_to_temporary(self) -> str:
+        """Grava o conteúdo em memória num temporário em UPLOAD_FOLDER e retorna o caminho."""
+        descriptor, temporary = tempfile.mkstemp(dir=UploadStoreService.folder(), prefix=TEMP_PREFIX, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as out:
+            out.write(self._memory.getbuffer())
+        return temporary
+
+    def detach(self) -> str:
+        """Fecha o temporário e o entrega a quem chama (não é mais apagado no close())."""
+        self._file.close()
+        path, self.path = self.path, None
+        return path
+
+    def read(self, size: int = -1) -> bytes:
+        return self.buffer.read(size)
+
+    def read1(self, size: int = -1) -> bytes:
+        return self.buffer.read1(size)
+
+    def readinto(self, target) -> int:
+        return self.buffer.readinto(target)
+
+    def readline(self, size: int = -1) -> bytes:
+        return self.buffer.readline(size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self.buffer.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self.buffer.tell()
+
+    def flush(self):
+        if not self.buffer.closed:
+            self.buffer.flush()
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        if self.path:
+            # Se o temporário não virou o upload definitivo, é descartado
+            UploadStoreService._remove_quietly(self.path)
+            self.path = None
+        super().close()
+
+
+class UploadRequest(Request):
+    """
+    Requisição do Flask que recebe os arquivos do multipart num UploadSpool
+    (em vez do SpooledTemporaryFile padrão do Werkzeug), para que o upload
+    seja lido e tenha o hash calculado sem uma ida e volta pelo disco.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return UploadSpool()
+
+
+class UploadStoreService:
+    """
+    Armazenamento dos uploads endereçado pelo conteúdo.
+
+    O arquivo é gravado com o nome <sha256>.<extensão> (hash calculado
+    durante a cópia, sem reler o arquivo). Reenviar a mesma planilha
+    reaproveita o arquivo e o cache colunar já lido (UploadCacheService).
+    O "último uso" de um upload é o mtime do arquivo (e do seu cache),
+    atualizado a cada reenvio/importação; 'flask gc_uploads' remove os
+    uploads sem uso há mais de UPLOAD_TTL_HOURS e, se a pasta passar de
+    UPLOAD_QUOTA_MB, os menos usados recentemente.
+    """
+
+    @staticmethod
+    def folder() -> str:
+        folder = app_config.UPLOAD_FOLDER
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    @staticmethod
+    def extension(filename: str) -> str:
+        """Extensão do nome original (já validada por CSVService.allowed_file)."""
+        return filename.rsplit('.', 1)[1].lower()
+
+    @staticmethod
+    def exists(file_path: str) -> bool:
+        """O upload existe (o arquivo original ou só a sua leitura em cache)."""
+        return os.path.exists(file_path) or os.path.exists(UploadCacheService.cache_path(file_path))
+
+    @staticmethod
+    def memory_plan(file_path: str) -> str:
+        """
+        Modo de processamento da planilha pelo orçamento de memória
+        ('full', 'chunked' ou 'reject'; ver utils/memory_meter.plan).
+        Se só existe o cache colunar, o tamanho dele é próximo ao do texto (CSV).
+        """
+        if os.path.exists(file_path):
+            return memory_meter.plan(os.path.getsize(file_path), UploadStoreService.extension(file_path))
+        cache = UploadCacheService.cache_path(file_path)
+        if os.path.exists(cache):
+            return memory_meter.plan(os.path.getsize(cache), 'csv')
+        return 'full'
+
+    @staticmethod
+    def ingest(stream: BinaryIO, filename: str, preview_rows: int = 10) -> Tuple[str, List[str], List[Dict], str]:
+        """
+        Guarda o upload e lê a prévia, a partir do stream recebido na requisição.
+        Retorna (file_path_id, cabeçalhos, prévia, erro).
+
+        Com o UploadSpool (UploadRequest), o hash já foi calculado enquanto o
+        multipart era recebido:
+          - conteúdo já conhecido: reaproveita o arquivo/cache, sem ler de novo;
+          - upload em memória: a planilha inteira é lida direto do buffer e só
+            o cache colunar é gravado (o arquivo original não vai para o disco);
+          - upload grande (já despejado em disco) ou acima do orçamento de
+            memória: o arquivo é gravado (o temporário vira o definitivo, sem
+            cópia), só a prévia é lida e a importação é feita em blocos;
+          - acima de IMPORT_MEMORY_MAX_MB (estimado): recusado.
+        """
+        spool = stream if isinstance(stream, UploadSpool) else UploadSpool.from_stream(stream)
+        try:
+            ext = UploadStoreService.extension(filename)
+            file_path_id = f"{spool.hexdigest()}.{ext}"
+            file_path = os.path.join(UploadStoreService.folder(), file_path_id)
+
+            if UploadStoreService.exists(file_path):
+                UploadStoreService.touch(file_path)
+                headers, preview = UploadCacheService.preview(file_path, rows=preview_rows)
+                if headers is not None:
+                    return file_path_id, headers, preview, None
+                headers, preview, error = CSVService.read_preview(file_path, rows=preview_rows)
+                return file_path_id, headers, preview, error
+
+            mode = memory_meter.plan(spool.size, ext)
+            if mode == 'reject':
+                return None, None, None, "A planilha é grande demais para ser importada."
+
+            meter = memory_meter.MemoryMeter(f"upload {file_path_id[:12]} ({spool.size / 1024 / 1024:.1f} MB, {mode})")
+            try:
+                if spool.in_memory and mode == 'full':
+                    with meter.stage('leitura'):
+                        df, error = CSVService.read_dataframe(spool.buffer, ext=ext)
+                    if error:
+                        return None, None, None, error
+                    with meter.stage('cache'):
+                        stored = UploadCacheService.store(file_path, df)
+                    # Sem 'pyarrow' não há cache: grava o arquivo original
+                    if not stored:
+                        UploadStoreService._publish(spool.write_to_temporary(), file_path)
+                    head = df.iloc[:preview_rows]
+                    return file_path_id, list(head.columns), head.to_dict('records'), None
+
+                temporary = spool.write_to_temporary() if spool.in_memory else spool.detach()
+                UploadStoreService._publish(temporary, file_path)
+                with meter.stage('prévia'):
+                    headers, preview, error = CSVService.read_preview(file_path, rows=preview_rows)
+                if error:
+                    UploadCacheService.remove(file_path)
+                    return None, None, None, error
+                return file_path_id, headers, preview, None
+            finally:
+                meter.log()
+        finally:
+            spool.close()
+
+    @staticmethod
+    def _publish(temporary: str, file_path: str):
+        """Dá ao temporário o nome definitivo (sem sobrescrever um upload igual já existente)."""
+        try:
+            # link() falha se o destino existe: dois envios simultâneos do mesmo
+            # arquivo não trocam o upload (nem invalidam o cache) um do outro
+            os.link(temporary, file_path)
+        except FileExistsError:
+            UploadStoreService.touch(file_path)
+        finally:
+            UploadStoreService._remove_quietly(temporary)
+
+    @staticmethod
+    def touch(file_path: str):
+        """Marca o upload (e o cache, com o mesmo horário) como usado agora."""
+        now = time.time()
+        for path in (file_path, UploadCacheService.cache_path(file_path)):
+            try:
+                os.utime(path, (now, now))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _remove_quietly(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _entries(folder: str) -> Dict[str, Dict]:
+        """Uploads da pasta com os arquivos ligados a eles (cache), tamanho e último uso."""
+        entries: Dict[str, Dict] = {}
+        for entry in os.scandir(folder):
+            if not entry.is_file():
+                continue
+            name = entry.name
+            # O cache (<upload>.feather) conta junto com o seu upload
+            upload = name[:-len(CACHE_SUFFIX)] if name.endswith(CACHE_SUFFIX) else name
+            stat = entry.stat()
+            item = entries.setdefault(upload, {"paths": [], "size": 0, "last_used": 0})
+            item["paths"].append(entry.path)
+            item["size"] += stat.st_size
+            item["last_used"] = max(item["last_used"], stat.st_mtime)
+        return entries
+
+    @staticmethod
+    def collect_garbage(ttl_hours: float = None, quota_mb: float = None) -> Dict[str, int]:
+        """
+        Remove uploads sem uso há mais de 'ttl_hours' e, se a pasta ainda passar
+        de 'quota_mb', os usados há mais tempo. Uploads de importações na fila
+        ou em andamento nunca são removidos.
+        Retorna {"removed", "freed_bytes", "kept", "kept_bytes"}.
+        """
+        ttl_hours = app_config.UPLOAD_TTL_HOURS if ttl_hours is None else ttl_hours
+        quota_mb = app_config.UPLOAD_QUOTA_MB if quota_mb is None else quota_mb
+        folder = UploadStoreService.folder()
+
+        in_use = {file_path_id for (file_path_id,) in ImportBatch.query
+                  .with_entities(ImportBatch.file_path_id)
+                  .filter(ImportBatch.status.in_(['queued', 'processing']))}
+
+        now = time.time()
+        entries = UploadStoreService._entries(folder)
+        removed: List[Dict] = []
+        kept: List[Dict] = []
+        for name, item in entries.items():
+            temporary = name.startswith(TEMP_PREFIX) or name.endswith('.tmp')
+            max_age = TEMP_MAX_AGE_SECONDS if temporary else ttl_hours * 3600
+            if name not in in_use and now - item["last_used"] > max_age:
+                removed.append(item)
+            else:
+                item["name"] = name
+                item["temporary"] = temporary
+                kept.append(item)
+
+        # Cota: remove os menos usados recentemente até caber
+        quota_bytes = quota_mb * 1024 * 1024
+        total = sum(item["size"] for item in kept)
+        if total > quota_bytes:
+            for item in sorted(kept, key=lambda item: item["last_used"]):
+                if total <= quota_bytes:
+                    break
+                # Temporários recentes são uploads em andamento
+                if item["name"] in in_use or item["temporary"]:
+                    continue
+                removed.append(item)
+                total -= item["size"]
+            removed_ids = {id(item) for item in removed}
+            kept = [item for item in kept if id(item) not in removed_ids]
+
+        for item in removed:
+            for path in item["paths"]:
+                UploadStoreService._remove_quietly(path)
+
+        return {
+            "removed": len(removed),
+            "freed_bytes": sum(item["size"] for item in removed),
+            "kept": len(kept),
+            "kept_bytes": sum(item["size"] for item in kept)
+        }
@@ -0,0 +1,100 @@
+# backend/services/validation_service.py
+
+from collections import namedtuple
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from utils import vectorized_validators as vv
+
+# Especificação de um campo: tipo ('cnpj', 'email', 'money', 'quantity', 'text'),
+# rótulo (para as mensagens), obrigatório, tamanho máximo e coluna de saída
+FieldSpec = namedtuple('FieldSpec', ['kind', 'label', 'required', 'max_length', 'output'])
+FieldSpec.__new__.__defaults__ = (False, None, None)
+
+class ValidationResult:
+    """
+    Resultado da validação de uma planilha:
+      - typed: DataFrame com os valores convertidos (CNPJ só dígitos, centavos, inteiros)
+      - error_bits: um inteiro por linha; o bit i ligado = messages[i] vale para a linha
+    """
+
+    def __init__(self, typed: pd.DataFrame, error_bits: np.ndarray, messages: List[str]):
+        self.typed = typed
+        self.error_bits = error_bits
+        self.messages = messages
+
+    @property
+    def invalid(self) -> np.ndarray:
+        """Máscara booleana das linhas com pelo menos um erro."""
+        return self.error_bits != 0
+
+    def errors_at(self, position: int) -> List[str]:
+        bits = int(self.error_bits[position])
+        return [message for bit, message in enumerate(self.messages) if bits >> bit & 1]
+
+    def summary(self) -> Dict[str, int]:
+        """Quantidade de linhas por mensagem de erro (só as que ocorreram)."""
+        counts = {}
+        for bit, message in enumerate(self.messages):
+            total = int(np.count_nonzero(self.error_bits & (1 << bit)))
+            if total:
+                counts[message] = total
+        return counts
+
+class ValidationService:
+    """
+    Motor de validação de planilhas por coluna (vetorizado).
+
+    Cada regra produz uma máscara booleana para a coluna inteira; as
+    máscaras viram bits de um array compacto (uint16/uint32 por linha),
+    e as mensagens só são montadas para as linhas que forem exibidas.
+    """
+
+    @staticmethod
+    def validate(df: pd.DataFrame, schema: Dict[str, FieldSpec]) -> ValidationResult:
+        """Valida e converte as colunas de 'df' segundo o 'schema' ({coluna: FieldSpec})."""
+        typed = {}
+        checks: List[Tuple[str, np.ndarray]] = []
+
+        for column, spec in schema.items():
+            values = df[column] if column in df.columns else pd.Series('', index=df.index)
+            output = spec.output or column
+            text = values.str.strip()
+            empty = (text == '').to_numpy(dtype=bool)
+            if spec.required:
+                checks.append((f"{spec.label} é obrigatório.", empty))
+
+            if spec.kind == 'cnpj':
+                typed[output] = vv.clean_digits(text).astype(object)
+                checks.append((f"{spec.label} inválido.", ~empty & ~vv.cnpj_valid(text)))
+
+            elif spec.kind == 'email':
+                typed[output] = text.str.lower()
+                checks.append((f"{spec.label} inválido.", ~empty & ~vv.email_valid(text)))
+
+            elif spec.kind == 'money':
+                cents, _, invalid = vv.parse_brl_cents(text)
+                negative = (cents < 0).fillna(False).to_numpy(dtype=bool)
+                typed[output] = cents.where(~negative)
+                checks.append((f"{spec.label} não é um valor válido (ex: R$ 1.234,56).", invalid | negative))
+
+            elif spec.kind == 'quantity':
+                quantity, invalid = vv.parse_quantity(text)
+                typed[output] = quantity
+                checks.append((f"{spec.label} deve ser um número inteiro positivo.", ~empty & invalid))
+
+            else:
+                typed[output] = text
+
+            if spec.max_length:
+                too_long = (text.str.len() > spec.max_length).to_numpy(dtype=bool)
+                checks.append((f"{spec.label} excede {spec.max_length} caracteres.", too_long))
+
+        dtype = np.uint16 if len(checks) <= 16 else np.uint32
+        if len(checks) > 32:
+            raise ValueError("Regras demais para a máscara de erros (máximo 32).")
+        error_bits = np.zeros(len(df), dtype=dtype)
+        for bit, (_, mask) in enumerate(checks):
+            error_bits |= mask.astype(dtype) << dtype(bit)
+
+        return ValidationResult(pd.DataFrame(typed, index=df.index), error_bits, [message for message, _ in checks])
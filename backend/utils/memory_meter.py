@@ -0,0 +1,147 @@
+# backend/utils/memory_meter.py
+
+"""
+Medição de memória por etapa do processamento de planilhas.
+
+Uma planilha de 16 MB vira várias vezes isso em DataFrames de strings
+(objetos Python, cópias intermediárias). Aqui cada etapa (leitura, chaves,
+blocos...) é medida e o resultado é registrado no log, para dimensionar os
+workers e decidir quando processar em blocos.
+
+Medidas:
+  - RSS do processo antes/depois de cada etapa (psutil, /proc ou nada);
+  - pico de alocações Python na etapa com tracemalloc, se
+    IMPORT_MEMORY_TRACEMALLOC estiver ligado (custa ~10-30% de CPU).
+O tracemalloc e o RSS são do processo inteiro: com várias importações em
+paralelo no mesmo processo, os números incluem as outras.
+
+Configuração (config.py):
+  - IMPORT_MEMORY_BUDGET_MB: acima da estimativa, processa em blocos
+  - IMPORT_MEMORY_MAX_MB: acima da estimativa, recusa o arquivo
+  - IMPORT_MEMORY_EXPANSION: fator tamanho em disco -> memória por formato
+"""
+
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config import get_config
+
+app_config = get_config()
+
+MB = 1024 * 1024
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def current_rss_mb() -> Optional[float]:
+    """RSS atual do processo em MB (None se não for possível medir)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / MB
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / MB
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def estimate_mb(size_bytes: int, ext: str) -> float:
+    """Estimativa da memória para ler a planilha inteira num DataFrame de strings."""
+    factor = app_config.IMPORT_MEMORY_EXPANSION.get(ext, max(app_config.IMPORT_MEMORY_EXPANSION.values()))
+    return size_bytes * factor / MB
+
+
+def plan(size_bytes: int, ext: str) -> str:
+    """
+    Decide como processar a planilha pelo orçamento de memória:
+    'full' (inteira na memória), 'chunked' (em blocos) ou 'reject'.
+    """
+    estimate = estimate_mb(size_bytes, ext)
+    if estimate > app_config.IMPORT_MEMORY_MAX_MB:
+        return 'reject'
+    if estimate > app_config.IMPORT_MEMORY_BUDGET_MB:
+        return 'chunked'
+    return 'full'
+
+
+class MemoryMeter:
+    """
+    Acumula as medidas das etapas de uma importação.
+
+        meter = MemoryMeter('import 1234')
+        with meter.stage('leitura'):
+            df = ...
+        meter.log()
+
+    Etapas repetidas (ex: cada bloco) são agregadas: maior pico, tempo somado.
+    """
+
+    def __init__(self, label: str, trace: Optional[bool] = None):
+        self.label = label
+        self.trace = app_config.IMPORT_MEMORY_TRACEMALLOC if trace is None else trace
+        self.stages: Dict[str, Dict] = {}
+
+    @staticmethod
+    def _start_tracing():
+        global _tracemalloc_users
+        with _tracemalloc_lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            _tracemalloc_users += 1
+
+    @staticmethod
+    def _stop_tracing():
+        global _tracemalloc_users
+        with _tracemalloc_lock:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0:
+                tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str):
+        if self.trace:
+            MemoryMeter._start_tracing()
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            rss_after = current_rss_mb()
+            peak = None
+            if self.trace:
+                peak = (tracemalloc.get_traced_memory()[1] - traced_before) / MB
+                MemoryMeter._stop_tracing()
+
+            entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "peak_mb": None,
+                                                  "rss_mb": None, "rss_delta_mb": None})
+            entry["calls"] += 1
+            entry["seconds"] += elapsed
+            if peak is not None:
+                entry["peak_mb"] = max(entry["peak_mb"] or 0.0, peak)
+            if rss_after is not None:
+                entry["rss_mb"] = max(entry["rss_mb"] or 0.0, rss_after)
+                if rss_before is not None:
+                    entry["rss_delta_mb"] = max(entry["rss_delta_mb"] or 0.0, rss_after - rss_before)
+
+    def summary(self) -> Dict[str, Dict]:
+        return {name: {key: round(value, 1) if isinstance(value, float) else value
+                       for key, value in entry.items()}
+                for name, entry in self.stages.items()}
+
+    def log(self):
+        """Registra as medidas das etapas (uma linha por etapa)."""
+        for name, entry in self.summary().items():
+            peak = f"pico={entry['peak_mb']}MB " if entry['peak_mb'] is not None else ""
+            print(f"[Memória] {self.label} | {name}: {peak}rss={entry['rss_mb']}MB "
+                  f"(+{entry['rss_delta_mb']}MB) em {entry['seconds']}s ({entry['calls']}x)")
@@ -0,0 +1,99 @@
+# backend/utils/pagination.py
+import base64
+import datetime
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+# Limites de página (evita que um cliente peça a tabela inteira)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_limit(raw_limit) -> int:
+    """Converte o parâmetro 'limit' da query string, respeitando o máximo."""
+    try:
+        limit = int(raw_limit) if raw_limit is not None else DEFAULT_PAGE_SIZE
+    except (TypeError, ValueError):
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Codifica os valores da última linha da página (coluna de ordenação + id)
+    em um cursor opaco (base64 url-safe).
+    """
+    serializable = [v.isoformat() if isinstance(v, (datetime.datetime, datetime.date)) else v for v in values]
+    raw = json.dumps(serializable, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Optional[List[Any]]:
+    """
+    Decodifica um cursor gerado por encode_cursor.
+    Retorna None se o cursor estiver corrompido.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return values if isinstance(values, list) else None
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_datetime(value):
+    """Converte um valor ISO 8601 (vindo do cursor ou da query string) em datetime."""
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def apply_keyset(query, sort_column, id_column, cursor_values: Optional[List[Any]], descending: bool = False):
+    """
+    Aplica a paginação por cursor (keyset) em uma query SQLAlchemy.
+
+    A ordenação é sempre (coluna_de_ordenação, id), garantindo uma ordem total
+    e estável. O filtro usa comparação de tuplas, que o PostgreSQL resolve
+    com um range scan no índice composto correspondente, sem OFFSET.
+    """
+    if cursor_values is not None:
+        boundary = tuple_(sort_column, id_column)
+        if descending:
+            query = query.filter(boundary < tuple_(*cursor_values))
+        else:
+            query = query.filter(boundary > tuple_(*cursor_values))
+
+    if descending:
+        return query.order_by(sort_column.desc(), id_column.desc())
+    return query.order_by(sort_column.asc(), id_column.asc())
+
+
+def fetch_page(query, limit: int, cursor_of) -> Tuple[List[Any], Optional[str]]:
+    """
+    Busca 'limit' + 1 linhas para saber se existe uma próxima página.
+    'cursor_of' recebe a última linha e devolve os valores do cursor.
+    Retorna (linhas, next_cursor).
+    """
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(cursor_of(rows[-1])) if has_more and rows else None
+    return rows, next_cursor
+
+
+def page_response(items: List[Dict], next_cursor: Optional[str], limit: int, **extra) -> Dict:
+    """Formato padrão das respostas paginadas da API."""
+    response = {
+        "items": items,
+        "next_cursor": next_cursor,
+        "limit": limit
+    }
+    response.update(extra)
+    return response
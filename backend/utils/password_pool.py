@@ -0,0 +1,159 @@
+# backend/utils/password_pool.py
+
+"""
+Pool de processos para o hash/verificação de senhas (bcrypt).
+
+O bcrypt é caro de propósito (~0,25 s por operação com custo 12). Rodando
+dentro da thread da requisição, uma rajada de logins ou cadastros ocupa a CPU
+do worker e atrasa todas as outras rotas. Aqui o trabalho vai para um pool
+de processos com tamanho fixo e fila limitada.
+
+Configuração (config.py):
+  - BCRYPT_LOG_ROUNDS: custo do bcrypt para novos hashes
+  - PASSWORD_POOL_WORKERS: processos do pool (0 = executa na própria thread)
+  - PASSWORD_POOL_MAX_PENDING: operações em espera antes de recusar
+  - PASSWORD_POOL_TIMEOUT: segundos de espera por uma vaga / resultado
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import List, Optional
+
+import bcrypt
+
+from config import get_config
+
+app_config = get_config()
+
+
+class PasswordPoolBusyError(RuntimeError):
+    """A fila do pool está cheia (ex: ataque de força bruta ou pico de logins)."""
+
+
+# --- Funções executadas nos processos do pool (precisam ser "picklable") ---
+
+def _bcrypt_hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _bcrypt_check(password_hash: str, password: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        # Hash corrompido ou em formato desconhecido
+        return False
+
+# --- Estado do pool (um por processo do servidor) ---
+
+_lock = threading.Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def _workers() -> int:
+    workers = getattr(app_config, 'PASSWORD_POOL_WORKERS', None)
+    if workers is None:
+        return os.cpu_count() or 1
+    return int(workers)
+
+def _get_executor() -> ProcessPoolExecutor:
+    """
+    Cria o pool na primeira utilização. Se o processo foi "forkado" depois
+    (ex: workers do gunicorn), cada worker cria o seu próprio pool.
+    """
+    global _executor, _executor_pid, _slots
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(
+                max_workers=_workers(),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _executor_pid = os.getpid()
+            _slots = threading.BoundedSemaphore(app_config.PASSWORD_POOL_MAX_PENDING)
+        return _executor
+
+def _submit(fn, *args) -> Future:
+    """
+    Envia 'fn' ao pool, respeitando o limite de operações pendentes. A vaga
+    é liberada quando a operação termina de fato (não quando quem esperava
+    desiste): um bcrypt abandonado continua ocupando um processo do pool.
+    """
+    executor = _get_executor()
+    slots = _slots
+    if not slots.acquire(timeout=app_config.PASSWORD_POOL_TIMEOUT):
+        raise PasswordPoolBusyError("Pool de senhas ocupado.")
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+def _result(future: Future):
+    """Resultado de uma operação do pool; esgotado o tempo, o pool é tratado como ocupado."""
+    try:
+        return future.result(timeout=app_config.PASSWORD_POOL_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel() # Se ainda estava na fila, nem chega a rodar
+        raise PasswordPoolBusyError("Tempo esgotado no pool de senhas.")
+
+def _run(fn, *args):
+    """Executa 'fn' no pool e espera o resultado."""
+    if _workers() == 0:
+        return fn(*args)
+    return _result(_submit(fn, *args))
+
+# --- API pública ---
+
+def get_rounds(password_hash: str) -> Optional[int]:
+    """Extrai o custo de um hash bcrypt ('$2b$12$...' -> 12)."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """Gera o hash bcrypt de uma senha num processo do pool."""
+    return _run(_bcrypt_hash, password, rounds or app_config.BCRYPT_LOG_ROUNDS)
+
+def check_password(password_hash: str, password: str) -> bool:
+    """Verifica uma senha contra o hash num processo do pool."""
+    if not password_hash or password is None:
+        return False
+    return _run(_bcrypt_check, password_hash, password)
+
+def needs_rehash(password_hash: str) -> bool:
+    """True se o hash foi gerado com um custo diferente do configurado."""
+    return get_rounds(password_hash) != app_config.BCRYPT_LOG_ROUNDS
+
+def hash_many(passwords: List[str], rounds: Optional[int] = None) -> List[str]:
+    """
+    Gera os hashes de várias senhas em paralelo (usado no cadastro em massa).
+    Mantém a ordem da lista recebida.
+    """
+    rounds = rounds or app_config.BCRYPT_LOG_ROUNDS
+    if _workers() == 0:
+        return [_bcrypt_hash(password, rounds) for password in passwords]
+
+    # Cada senha ocupa uma vaga, como no login; e no máximo uma por processo
+    # do pool fica pendente, para a planilha não passar na frente dos logins
+    window = _workers()
+    pending = deque()
+    hashes = []
+    try:
+        for password in passwords:
+            if len(pending) >= window:
+                hashes.append(_result(pending.popleft()))
+            pending.append(_submit(_bcrypt_hash, password, rounds))
+        while pending:
+            hashes.append(_result(pending.popleft()))
+    except Exception:
+        for future in pending:
+            future.cancel()
+        raise
+    return hashes
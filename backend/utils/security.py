@@ -1,9 +1,10 @@
 # backend/utils/security.py
 
-from app import bcrypt, jwt
+from app import jwt
+from utils import password_pool
 from flask_jwt_extended import (
     create_access_token as flask_create_access_token,
-    create_refresh_token,
+    create_refresh_token as flask_create_refresh_token,
     jwt_required as flask_jwt_required,
     get_jwt_identity,
     get_jwt
@@ -12,17 +13,27 @@ import datetime
 
 # --- Gerenciamento de Senhas (Bcrypt) ---
 
+# O bcrypt roda no pool de processos (utils/password_pool.py),
+# fora da thread da requisição.
+
 def hash_password(password: str) -> str:
     """
     Gera um hash seguro para uma senha.
     """
-    return bcrypt.generate_password_hash(password).decode('utf-8')
+    return password_pool.hash_password(password)
 
 def check_password(password_hash: str, password: str) -> bool:
     """
     Verifica se a senha fornecida corresponde ao hash.
     """
-    return bcrypt.check_password_hash(password_hash, password)
+    return password_pool.check_password(password_hash, password)
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """
+    Indica se o hash usa um custo diferente de BCRYPT_LOG_ROUNDS
+    (deve ser refeito no próximo login bem-sucedido).
+    """
+    return password_pool.needs_rehash(password_hash)
 
 # --- Gerenciamento de Token (JWT) ---
 
@@ -33,11 +44,13 @@ def create_access_token(identity, expires_delta=datetime.timedelta(hours=1)):
     """
     return flask_create_access_token(identity=identity, expires_delta=expires_delta)
 
-def create_refresh_token(identity):
+def create_refresh_token(identity, expires_delta=datetime.timedelta(days=30), additional_claims=None):
     """
     Cria um token de atualização (refresh token).
+    Use TokenService.issue_tokens para registrá-lo (rotação/reuso).
     """
-    return create_refresh_token(identity=identity)
+    return flask_create_refresh_token(identity=identity, expires_delta=expires_delta,
+                                      additional_claims=additional_claims)
 
 def get_user_identity():
     """
@@ -67,7 +80,10 @@ def user_identity_lookup(user):
     """
     Define qual parte do objeto 'user' será armazenada 
     como 'identity' no token. Usamos o ID.
+    Aceita o objeto User, a fotografia do IdentityCache ou o próprio ID.
     """
+    if isinstance(user, str):
+        return user
     return user.id
 
 @jwt.additional_claims_loader
@@ -77,14 +93,17 @@ def add_claims_to_access_token(user):
     Vamos adicionar o nível de permissão (role) aqui.
     Isso é SUPER útil para o frontend e backend.
     """
+    # Fotografia do IdentityCache (ex: /refresh): sem query
+    if hasattr(user, 'role_level'):
+        return {"role": user.role_level} if user.role_level is not None else {}
     if hasattr(user, 'role') and user.role:
         return {"role": user.role.permission_level}
     # Caso o usuário seja carregado de outra forma (ex: refresh token)
     if isinstance(user, str):
-        from models.users import User
-        u = User.query.get(user)
-        if u and u.role:
-            return {"role": u.role.permission_level}
+        from services.identity_cache import IdentityCache
+        snapshot = IdentityCache.get_user(user)
+        if snapshot and snapshot.role_level is not None:
+            return {"role": snapshot.role_level}
     return {}
 
 @jwt.user_lookup_loader
@@ -0,0 +1,132 @@
+# backend/utils/vectorized_validators.py
+
+"""
+Versões vetorizadas (por coluna) dos validadores de utils/validators.py,
+para planilhas com muitas linhas. Recebem uma pd.Series de strings e
+devolvem arrays NumPy alinhados com ela, sem laço Python por valor.
+"""
+
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+from utils.validators import EMAIL_REGEX
+
+# Pesos dos dígitos verificadores do CNPJ (os mesmos de validators.validate_cnpj)
+CNPJ_WEIGHTS_DV1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], dtype=np.int64)
+CNPJ_WEIGHTS_DV2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], dtype=np.int64)
+
+# Maior parte inteira aceita em valores monetários (evita estouro em centavos int64)
+MAX_MONEY_INT_DIGITS = 13
+# Maior quantidade aceita (cabe numa coluna Integer do PostgreSQL)
+MAX_QUANTITY = 2 ** 31 - 1
+
+
+def _fast_strings(series: pd.Series) -> pd.Series:
+    """
+    Converte para strings do Arrow quando o 'pyarrow' está instalado: as
+    operações .str passam a rodar em C++ em vez de um laço por objeto Python.
+    """
+    try:
+        return series.astype('string[pyarrow]')
+    except (ImportError, TypeError, ValueError):
+        return series.astype(str)
+
+
+def _to_bool(result: pd.Series) -> np.ndarray:
+    return result.fillna(False).to_numpy(dtype=bool)
+
+
+def clean_digits(series: pd.Series) -> pd.Series:
+    """
+    Remove tudo o que não é dígito ASCII (ex: pontuação do CNPJ). Não usa \\D:
+    dígitos Unicode (ex: '٣') passariam e quebrariam o .encode('ascii') adiante.
+    """
+    return _fast_strings(series).str.replace(r'[^0-9]', '', regex=True)
+
+
+def cnpj_valid(series: pd.Series) -> np.ndarray:
+    """
+    Valida CNPJs (com ou sem pontuação), incluindo os dígitos verificadores.
+    Os dígitos dos CNPJs com 14 posições viram uma matriz (n x 14) e os
+    verificadores são calculados com aritmética de arrays.
+    """
+    digits = clean_digits(series)
+    valid = _to_bool(digits.str.len() == 14)
+    positions = np.flatnonzero(valid)
+    if positions.size == 0:
+        return valid
+
+    candidates = digits.iloc[positions].astype(str).to_numpy()
+    matrix = (np.frombuffer(''.join(candidates).encode('ascii'), dtype=np.uint8)
+              .reshape(-1, 14).astype(np.int64) - 48)
+
+    def check_digit(partial, weights):
+        rest = (partial * weights).sum(axis=1) % 11
+        return np.where(rest < 2, 0, 11 - rest)
+
+    ok = (
+        (check_digit(matrix[:, :12], CNPJ_WEIGHTS_DV1) == matrix[:, 12])
+        & (check_digit(matrix[:, :13], CNPJ_WEIGHTS_DV2) == matrix[:, 13])
+        # Todos os dígitos iguais (ex: 00000000000000) são inválidos
+        & ~(matrix == matrix[:, :1]).all(axis=1)
+    )
+    valid[positions] = ok
+    return valid
+
+
+def email_valid(series: pd.Series) -> np.ndarray:
+    """Valida e-mails com a mesma regex de validators.validate_email."""
+    return _to_bool(_fast_strings(series).str.strip().str.match(EMAIL_REGEX))
+
+
+def _normalize_number_text(text: pd.Series) -> pd.Series:
+    """
+    Padroniza números escritos no formato brasileiro ou internacional para
+    '1234.56': "1.234,56" -> "1234.56", "1.234" -> "1234", "12.5" -> "12.5".
+    Com vírgula, ou com pontos só em grupos de milhar, o ponto é separador de milhar.
+    """
+    brazilian = (
+        text.str.contains(',', regex=False).fillna(False)
+        | text.str.match(r'^-?\d{1,3}(\.\d{3})+$').fillna(False)
+    ).to_numpy(dtype=bool)
+    normalized = text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    return normalized.where(brazilian, text)
+
+
+def parse_brl_cents(series: pd.Series) -> Tuple[pd.Series, np.ndarray, np.ndarray]:
+    """
+    Converte valores monetários ("R$ 1.234,56", "500,75", "1200.25") em centavos
+    (inteiros, sem ponto flutuante). Mesmos formatos aceitos por
+    Utilitarios.parseMoedaParaDouble (java-modules).
+    Retorna (centavos como Int64, máscara de vazios, máscara de inválidos).
+    """
+    text = _fast_strings(series).str.replace('R$', '', regex=False).str.replace(r'\s', '', regex=True)
+    empty = _to_bool(text == '')
+
+    parts = _normalize_number_text(text).str.extract(
+        rf'^(?P<sign>-?)(?P<integer>\d{{1,{MAX_MONEY_INT_DIGITS}}})(?:\.(?P<fraction>\d+))?$').astype(object)
+    matched = parts['integer'].notna().to_numpy(dtype=bool)
+
+    integer = pd.to_numeric(parts['integer'], errors='coerce').astype('Int64')
+    # Três casas decimais para arredondar a segunda (meio para cima)
+    fraction = parts['fraction'].fillna('').astype(str).str.pad(3, side='right', fillchar='0').str.slice(0, 3)
+    fraction = pd.to_numeric(fraction.where(matched), errors='coerce').astype('Int64')
+    cents = integer * 100 + (fraction + 5) // 10
+    negative = (parts['sign'] == '-').to_numpy(dtype=bool)
+    cents = cents.mask(negative, -cents)
+
+    invalid = ~empty & ~matched
+    return cents.where(matched), empty, invalid
+
+
+def parse_quantity(series: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+    """
+    Converte quantidades ("10", "1.000", "12,0") em inteiros positivos.
+    Retorna (quantidades como Int64, máscara de inválidos).
+    """
+    text = _normalize_number_text(_fast_strings(series).str.strip())
+    number = pd.to_numeric(text.astype(object), errors='coerce')
+    valid = (number.notna() & (number > 0) & (number % 1 == 0) & (number <= MAX_QUANTITY)).to_numpy(dtype=bool)
+    quantity = number.where(valid).astype('Int64')
+    return quantity, ~valid
@@ -47,7 +47,9 @@ document.addEventListener('DOMContentLoaded', () => {
     async function loadAllUsers() {
         try {
             usersTableBody.innerHTML = '<tr><td colspan="5">Carregando...</td></tr>';
-            const users = await fetchApi('/admin/users', 'GET', null, true);
+            // A API devolve uma página: { items, next_cursor, limit }
+            const page = await fetchApi('/admin/users', 'GET', null, true);
+            const users = page.items;
             
             usersTableBody.innerHTML = '';
             if (users.length === 0) {
@@ -94,7 +96,8 @@ document.addEventListener('DOMContentLoaded', () => {
     async function loadAllCompanies() {
         try {
             companiesTableBody.innerHTML = '<tr><td colspan="5">Carregando...</td></tr>';
-            const companies = await fetchApi('/admin/companies', 'GET', null, true);
+            const page = await fetchApi('/admin/companies', 'GET', null, true);
+            const companies = page.items;
 
             companiesTableBody.innerHTML = '';
             companies.forEach(company => {
@@ -15,6 +15,51 @@ function getToken() {
     return localStorage.getItem('jwt_token');
 }
 
+// Renovação em andamento (compartilhada pelas requisições que recebem 401 juntas)
+let refreshInFlight = null;
+
+/**
+ * Troca o refresh token salvo por um novo par de tokens (/auth/refresh).
+ * Cada refresh token só pode ser usado uma vez (reuso revoga a sessão), então:
+ *  - requisições simultâneas aguardam a mesma renovação;
+ *  - se outra aba já renovou (o access token salvo mudou), só repete a requisição.
+ * @param {string | null} failedToken O access token que recebeu 401.
+ * @returns {Promise<boolean>} true se o access token foi renovado.
+ */
+function refreshAccessToken(failedToken = null) {
+    const currentToken = getToken();
+    if (failedToken && currentToken && currentToken !== failedToken) {
+        return Promise.resolve(true);
+    }
+    if (!refreshInFlight) {
+        refreshInFlight = requestNewTokens().finally(() => { refreshInFlight = null; });
+    }
+    return refreshInFlight;
+}
+
+async function requestNewTokens() {
+    // Lido agora (não antes): outra aba pode ter acabado de trocar o token
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (!refreshToken) return false;
+
+    const response = await fetch(`${API_BASE_URL}/auth/refresh`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${refreshToken}` }
+    });
+    if (!response.ok) {
+        // Só descarta se ninguém salvou um token mais novo enquanto isso
+        if (localStorage.getItem('refresh_token') === refreshToken) {
+            localStorage.removeItem('refresh_token');
+            return false;
+        }
+        return true;
+    }
+    const data = await response.json();
+    localStorage.setItem('jwt_token', data.access_token);
+    localStorage.setItem('refresh_token', data.refresh_token);
+    return true;
+}
+
 /**
  * Função principal para realizar requisições à API.
  * Lida automaticamente com a adição do Token de Autorização
@@ -26,7 +71,7 @@ function getToken() {
  * @param {boolean} requiresAuth Se a rota exige um token JWT.
  * @returns {Promise<object>} Os dados da resposta (JSON).
  */
-async function fetchApi(endpoint, method = 'GET', body = null, requiresAuth = false) {
+async function fetchApi(endpoint, method = 'GET', body = null, requiresAuth = false, isRetry = false) {
     const url = `${API_BASE_URL}${endpoint}`;
     
     const headers = new Headers();
@@ -56,6 +101,12 @@ async function fetchApi(endpoint, method = 'GET', body = null, requiresAuth = fa
     try {
         const response = await fetch(url, config);
 
+        // Access token expirado: renova uma vez com o refresh token e repete
+        if (response.status === 401 && requiresAuth && !isRetry
+                && await refreshAccessToken(headers.get('Authorization').slice('Bearer '.length))) {
+            return fetchApi(endpoint, method, body, requiresAuth, true);
+        }
+
         // Tenta pegar o JSON mesmo se a resposta for um erro (ex: 400, 401)
         // O backend envia um JSON de erro (ex: {"error": "..."})
         const responseData = await response.json();
@@ -104,6 +104,7 @@ function setupLogout() {
         logoutButton.addEventListener('click', () => {
             // Limpa o localStorage
             localStorage.removeItem('jwt_token');
+            localStorage.removeItem('refresh_token');
             localStorage.removeItem('current_user');
             
             // Redireciona para o login
@@ -115,6 +115,10 @@ function initRegisterPage() {
 function handleAuthSuccess(data) {
     // 1. Salva o token e os dados do usuário no localStorage
     localStorage.setItem('jwt_token', data.access_token);
+    // O refresh token renova o acesso quando o token de 1h expira (sem novo login)
+    if (data.refresh_token) {
+        localStorage.setItem('refresh_token', data.refresh_token);
+    }
     
     // O backend envia o objeto 'user' no login
     localStorage.setItem('current_user', JSON.stringify(data.user)); 
@@ -59,7 +59,9 @@ document.addEventListener('DOMContentLoaded', () => {
      */
     async function loadTeam() {
         try {
-            const team = await fetchApi('/company/team', 'GET', null, true);
+            // A API devolve uma página: { items, next_cursor, limit }
+            const page = await fetchApi('/company/team', 'GET', null, true);
+            const team = page.items;
             
             teamTableBody.innerHTML = ''; // Limpa a tabela
             if (team.length === 0) {
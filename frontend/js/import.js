@@ -170,7 +170,52 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     /**
-     * (Futuro) Envia o mapeamento final para o backend.
+     * Acompanha o job de importação até terminar, mostrando o progresso.
+     */
+    const IMPORT_POLL_MS = 2000;
+    async function pollImportJob(jobId) {
+        let job;
+        try {
+            job = await fetchApi(`/import/jobs/${jobId}`, 'GET', null, true);
+        } catch (error) {
+            showMessage('mapping-error-message', error.message);
+            return;
+        }
+
+        if (job.status === 'queued' || job.status === 'processing') {
+            let message = 'Importando...';
+            if (job.percent !== null) {
+                message = `Importando: ${job.rows_done} de ${job.total_rows} linha(s) (${job.percent}%)`;
+                if (job.eta_seconds !== null) {
+                    message += `, cerca de ${Math.max(1, Math.ceil(job.eta_seconds / 60))} min restante(s)`;
+                }
+            }
+            showMessage('mapping-error-message', message + '.', 'success');
+            setTimeout(() => pollImportJob(jobId), IMPORT_POLL_MS);
+            return;
+        }
+
+        if (job.status === 'failed') {
+            showMessage('mapping-error-message', `Falha na importação: ${job.error_message || 'erro desconhecido'}.`);
+            return;
+        }
+
+        let message = `Importação concluída: ${job.imported_rows} linha(s) importada(s)`;
+        if (job.unchanged_rows || job.updated_rows || job.deleted_rows) {
+            const inserted = job.imported_rows - job.updated_rows - job.unchanged_rows;
+            message += ` (${inserted} nova(s), ${job.updated_rows} alterada(s), `
+                + `${job.unchanged_rows} sem alteração, ${job.deleted_rows} removida(s))`;
+        }
+        if (job.rejected_rows) {
+            const firstErrors = job.errors.slice(0, 3)
+                .map(err => `linha ${err.row}: ${err.errors.join(' ')}`).join('; ');
+            message += `, ${job.rejected_rows} rejeitada(s) (${firstErrors})`;
+        }
+        showMessage('mapping-error-message', message + '.', job.rejected_rows ? 'error' : 'success');
+    }
+
+    /**
+     * Envia o mapeamento final para o backend, que enfileira a importação.
      */
     mappingForm.addEventListener('submit', async (e) => {
         e.preventDefault();
@@ -186,13 +231,18 @@ document.addEventListener('DOMContentLoaded', () => {
             }
         });
 
-        console.log("Mapeamento final:", mapping);
-        console.log("ID do arquivo no servidor:", serverFileId);
-
-        // (Aqui viria a chamada 'fetchApi' para /api/import/process_mapping
-        // que ainda não criamos no backend)
-        
-        showMessage('mapping-error-message', 'Em construção. O mapeamento foi logado no console.', 'success');
+        hideMessage('mapping-error-message');
+        try {
+            const job = await fetchApi('/import/process_mapping', 'POST', {
+                file_path_id: serverFileId,
+                mapping: mapping,
+                replace_missing: $('#replace-missing').checked
+            }, true);
+            showMessage('mapping-error-message', 'Importação na fila...', 'success');
+            pollImportJob(job.id);
+        } catch (error) {
+            showMessage('mapping-error-message', error.message);
+        }
     });
 
 });
\ No newline at end of file
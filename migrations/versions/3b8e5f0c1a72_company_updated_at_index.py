@@ -0,0 +1,26 @@
+"""Company updated_at index (autocomplete sync)
+
+Revision ID: 3b8e5f0c1a72
+Revises: f41d7a2c08e6
+Create Date: 2026-10-19 16:05:38.214907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e5f0c1a72'
+down_revision = 'f41d7a2c08e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.create_index('ix_companies_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.drop_index('ix_companies_updated_at')
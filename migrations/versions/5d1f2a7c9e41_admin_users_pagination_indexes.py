@@ -0,0 +1,40 @@
+"""Admin users pagination indexes
+
+Revision ID: 5d1f2a7c9e41
+Revises: b34c091d8f00
+Create Date: 2026-10-19 09:12:04.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1f2a7c9e41'
+down_revision = 'b34c091d8f00'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_company_id'), ['company_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_role_id'), ['role_id'], unique=False)
+        batch_op.create_index('ix_users_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_users_email_id', ['email', 'id'], unique=False)
+        batch_op.create_index('ix_users_full_name_id', ['full_name', 'id'], unique=False)
+        batch_op.create_index('ix_users_email_pattern', ['email'], unique=False,
+                              postgresql_ops={'email': 'varchar_pattern_ops'})
+        batch_op.create_index('ix_users_blocked', ['id'], unique=False,
+                              postgresql_where=sa.text('is_blocked'))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_blocked')
+        batch_op.drop_index('ix_users_email_pattern')
+        batch_op.drop_index('ix_users_full_name_id')
+        batch_op.drop_index('ix_users_email_id')
+        batch_op.drop_index('ix_users_created_at_id')
+        batch_op.drop_index(batch_op.f('ix_users_role_id'))
+        batch_op.drop_index(batch_op.f('ix_users_company_id'))
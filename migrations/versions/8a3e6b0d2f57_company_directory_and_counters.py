@@ -0,0 +1,54 @@
+"""Company directory indexes and platform counters
+
+Revision ID: 8a3e6b0d2f57
+Revises: 5d1f2a7c9e41
+Create Date: 2026-10-19 10:41:27.503318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a3e6b0d2f57'
+down_revision = '5d1f2a7c9e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('platform_counters',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.create_index('ix_companies_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_companies_uf_created_at_id', ['uf', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_companies_active_created_at_id', ['is_active', 'created_at', 'id'], unique=False)
+    op.create_index('ix_companies_uf_cidade_created_at', 'companies',
+                    ['uf', sa.text('lower(cidade)'), 'created_at'], unique=False)
+
+    # Popula os contadores de empresas com os dados já existentes
+    op.execute("""
+        INSERT INTO platform_counters (name, value)
+        SELECT 'companies.total', COUNT(*) FROM companies
+        UNION ALL
+        SELECT 'companies.active', COUNT(*) FROM companies WHERE is_active
+        UNION ALL
+        SELECT 'companies.uf.' || uf, COUNT(*) FROM companies GROUP BY uf
+        UNION ALL
+        SELECT 'companies.uf.' || uf || '.active', COUNT(*) FROM companies WHERE is_active GROUP BY uf
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_companies_uf_cidade_created_at', table_name='companies')
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.drop_index('ix_companies_active_created_at_id')
+        batch_op.drop_index('ix_companies_uf_created_at_id')
+        batch_op.drop_index('ix_companies_created_at_id')
+
+    op.drop_table('platform_counters')
@@ -0,0 +1,44 @@
+"""Company daily KPI rollup
+
+Revision ID: 9c4d2e7b5a10
+Revises: 3b8e5f0c1a72
+Create Date: 2026-10-19 16:31:05.772410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4d2e7b5a10'
+down_revision = '3b8e5f0c1a72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('company_daily_kpis',
+    sa.Column('company_id', sa.String(length=36), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('negotiations_opened', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('negotiations_won', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('negotiations_lost', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('proposals_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('proposals_value_sum', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('responses_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('response_seconds_sum', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('company_id', 'day')
+    )
+    with op.batch_alter_table('proposals', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('responded_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Os dados históricos são carregados com: flask backfill_kpis --days N
+
+
+def downgrade():
+    with op.batch_alter_table('proposals', schema=None) as batch_op:
+        batch_op.drop_column('responded_at')
+
+    op.drop_table('company_daily_kpis')
@@ -0,0 +1,61 @@
+"""Company reputation aggregates
+
+Revision ID: a6f3c8d1e920
+Revises: 9c4d2e7b5a10
+Create Date: 2026-10-19 16:58:44.130296
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6f3c8d1e920'
+down_revision = '9c4d2e7b5a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('company_reputations',
+    sa.Column('company_id', sa.String(length=36), nullable=False),
+    sa.Column('ratings_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('ratings_sum', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('stars_1', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('stars_2', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('stars_3', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('stars_4', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('stars_5', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('decayed_sum', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('decayed_count', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('decayed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+
+    # Popula com as avaliações já existentes (meia-vida padrão de 90 dias = 7776000 s;
+    # 'flask rebuild_reputation' recalcula com o valor configurado)
+    op.execute("""
+        INSERT INTO company_reputations (company_id, ratings_count, ratings_sum,
+            stars_1, stars_2, stars_3, stars_4, stars_5, decayed_sum, decayed_count)
+        SELECT rated.company_id, COUNT(*), SUM(e.rating),
+            COUNT(*) FILTER (WHERE e.rating = 1), COUNT(*) FILTER (WHERE e.rating = 2),
+            COUNT(*) FILTER (WHERE e.rating = 3), COUNT(*) FILTER (WHERE e.rating = 4),
+            COUNT(*) FILTER (WHERE e.rating = 5),
+            SUM(e.rating * power(0.5, extract(epoch FROM now() - e.created_at) / 7776000)),
+            SUM(power(0.5, extract(epoch FROM now() - e.created_at) / 7776000))
+        FROM evaluations e
+        JOIN negotiations n ON n.id = e.negotiation_id
+        JOIN users u ON u.id = e.user_id
+        CROSS JOIN LATERAL (SELECT CASE
+            WHEN u.company_id = n.seller_company_id THEN n.buyer_company_id
+            WHEN u.company_id = n.buyer_company_id THEN n.seller_company_id
+        END AS company_id) rated
+        WHERE e.rating BETWEEN 1 AND 5 AND rated.company_id IS NOT NULL
+        GROUP BY rated.company_id
+    """)
+
+
+def downgrade():
+    op.drop_table('company_reputations')
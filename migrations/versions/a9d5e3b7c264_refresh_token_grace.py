@@ -0,0 +1,28 @@
+"""Single-use grace window for refresh token reuse
+
+Revision ID: a9d5e3b7c264
+Revises: f3a7c2d9b816
+Create Date: 2026-10-19 21:48:03.117592
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d5e3b7c264'
+down_revision = 'f3a7c2d9b816'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('used_ip', sa.String(length=45), nullable=True))
+        batch_op.add_column(sa.Column('grace_used_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.drop_column('grace_used_at')
+        batch_op.drop_column('used_ip')
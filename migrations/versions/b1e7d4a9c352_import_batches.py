@@ -0,0 +1,68 @@
+"""Import batches and imported order items
+
+Revision ID: b1e7d4a9c352
+Revises: a6f3c8d1e920
+Create Date: 2026-10-19 17:24:16.581203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1e7d4a9c352'
+down_revision = 'a6f3c8d1e920'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_batches',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('company_id', sa.String(length=36), nullable=True),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('file_path_id', sa.String(length=255), nullable=False),
+    sa.Column('import_type', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total_rows', sa.Integer(), nullable=False),
+    sa.Column('imported_rows', sa.Integer(), nullable=False),
+    sa.Column('rejected_rows', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('import_batches', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_import_batches_company_id'), ['company_id'], unique=False)
+
+    op.create_table('import_order_items',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('batch_id', sa.String(length=36), nullable=False),
+    sa.Column('company_id', sa.String(length=36), nullable=True),
+    sa.Column('row_number', sa.Integer(), nullable=False),
+    sa.Column('cnpj_comprador', sa.String(length=14), nullable=False),
+    sa.Column('razao_social', sa.String(length=255), nullable=True),
+    sa.Column('sku_produto', sa.String(length=100), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('preco_unitario_centavos', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['import_batches.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('import_order_items', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_import_order_items_batch_id'), ['batch_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_import_order_items_company_id'), ['company_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('import_order_items', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_order_items_company_id'))
+        batch_op.drop_index(batch_op.f('ix_import_order_items_batch_id'))
+
+    op.drop_table('import_order_items')
+    with op.batch_alter_table('import_batches', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_batches_company_id'))
+
+    op.drop_table('import_batches')
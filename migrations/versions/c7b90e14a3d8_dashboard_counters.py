@@ -0,0 +1,45 @@
+"""Dashboard counters for users, negotiations, reports and messages
+
+Revision ID: c7b90e14a3d8
+Revises: 8a3e6b0d2f57
+Create Date: 2026-10-19 11:58:40.271944
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7b90e14a3d8'
+down_revision = '8a3e6b0d2f57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_messages_created_at'), ['created_at'], unique=False)
+
+    # Popula os novos contadores com os dados já existentes.
+    # (Para as mensagens por dia, rode 'flask reconcile_counters' após o upgrade.)
+    op.execute("""
+        INSERT INTO platform_counters (name, value)
+        SELECT 'users.total', COUNT(*) FROM users
+        UNION ALL
+        SELECT 'users.role.' || role_id, COUNT(*) FROM users GROUP BY role_id
+        UNION ALL
+        SELECT 'negotiations.open', COUNT(*) FROM negotiations WHERE status = 'active'
+        UNION ALL
+        SELECT 'reports.pending', COUNT(*) FROM reports WHERE status = 'pending'
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DELETE FROM platform_counters
+        WHERE name LIKE 'users.%' OR name LIKE 'negotiations.%'
+           OR name LIKE 'reports.%' OR name LIKE 'messages.%'
+    """)
+
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_messages_created_at'))
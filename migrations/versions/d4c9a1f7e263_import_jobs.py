@@ -0,0 +1,44 @@
+"""Resumable import jobs (checkpoint and worker columns on import_batches)
+
+Revision ID: d4c9a1f7e263
+Revises: b1e7d4a9c352
+Create Date: 2026-10-19 18:02:41.337519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4c9a1f7e263'
+down_revision = 'b1e7d4a9c352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('import_batches', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('mapping_json', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('next_row', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('chunk_size', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('worker_id', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('error_message', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('errors_json', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('started_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_index(batch_op.f('ix_import_batches_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('import_batches', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_batches_status'))
+        batch_op.drop_column('started_at')
+        batch_op.drop_column('errors_json')
+        batch_op.drop_column('error_message')
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('worker_id')
+        batch_op.drop_column('chunk_size')
+        batch_op.drop_column('next_row')
+        batch_op.drop_column('mapping_json')
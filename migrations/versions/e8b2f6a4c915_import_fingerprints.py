@@ -0,0 +1,50 @@
+"""Per-row import fingerprints for delta imports
+
+Revision ID: e8b2f6a4c915
+Revises: d4c9a1f7e263
+Create Date: 2026-10-19 18:47:09.214836
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b2f6a4c915'
+down_revision = 'd4c9a1f7e263'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_fingerprints',
+    sa.Column('company_id', sa.String(length=36), nullable=False),
+    sa.Column('import_type', sa.String(length=50), nullable=False),
+    sa.Column('row_key', sa.BigInteger(), nullable=False),
+    sa.Column('row_hash', sa.BigInteger(), nullable=False),
+    sa.Column('batch_id', sa.String(length=36), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['import_batches.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('company_id', 'import_type', 'row_key')
+    )
+    with op.batch_alter_table('import_batches', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_rows', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('unchanged_rows', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('deleted_rows', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('import_order_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('row_key', sa.BigInteger(), nullable=True))
+        batch_op.create_index('ix_import_order_items_company_row_key', ['company_id', 'row_key'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('import_order_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_import_order_items_company_row_key')
+        batch_op.drop_column('row_key')
+
+    with op.batch_alter_table('import_batches', schema=None) as batch_op:
+        batch_op.drop_column('deleted_rows')
+        batch_op.drop_column('unchanged_rows')
+        batch_op.drop_column('updated_rows')
+
+    op.drop_table('import_fingerprints')
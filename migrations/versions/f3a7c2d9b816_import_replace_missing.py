@@ -0,0 +1,26 @@
+"""Opt-in replace mode for delta imports
+
+Revision ID: f3a7c2d9b816
+Revises: e8b2f6a4c915
+Create Date: 2026-10-19 21:12:40.531207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a7c2d9b816'
+down_revision = 'e8b2f6a4c915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('import_batches', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('replace_missing', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('import_batches', schema=None) as batch_op:
+        batch_op.drop_column('replace_missing')
@@ -0,0 +1,26 @@
+"""Company team pagination index
+
+Revision ID: f41d7a2c08e6
+Revises: e2a4c6f81b39
+Create Date: 2026-10-19 15:47:12.903561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f41d7a2c08e6'
+down_revision = 'e2a4c6f81b39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_company_full_name_id', ['company_id', 'full_name', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_company_full_name_id')